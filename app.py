@@ -1,95 +1,147 @@
+import shutil
+import tempfile
 import streamlit as st
 import pandas as pd
-from config_import import Config, ConfigKeys
-from model import model, Logger, Timer
-from typing import Any, Dict, cast
-from logger import Logger, Log_Action
+from config_import import Config
+from model import model
+from typing import Dict, Tuple, Union
+from logger import Columnar_log, Log_Action, Sim_logger
+from batch import kpis_from_logs, run_cohort, Cohort_result
+from compiled_config import CompiledConfig
+from graphs import PLOT_ACTIONS, chart_frames, downsample
+from profiler import Sim_profiler, Profile_report
+from log_sinks import Parquet_sink, logged_actions, read_action_frames, read_log
+from result_cache import Result_cache, run_key
 
 
 
-def filtered_log(log_df: pd.DataFrame) -> None:
+# ------------------------------------------------------------------
+# Derived frames are built once per run and cached under its run id, so widget
+# interactions only slice them. The log source is the run's Columnar_log or,
+# for streamed runs, its Parquet directory; underscore arguments are not hashed.
+# st.cache_data hands every rerun its own copy, so a caller mutating a frame
+# never changes what the next rerun reads.
+# ------------------------------------------------------------------
+PAGE_SIZES = [100, 500, 1000, 5000]
+
+LogSource = Union[Columnar_log, str]
+
+def source_actions(source: LogSource) -> list:
+    if isinstance(source, str):
+        return logged_actions(source)
+    return [action for action in Log_Action if action in source.tables]
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def log_view(run_id: str, actions: Tuple[str, ...], _source: LogSource) -> pd.DataFrame:
+    """Events of actions in logging order."""
+    selected = [Log_Action(action) for action in actions]
+    if isinstance(_source, str):
+        return read_log(_source, selected)
+    return _source.to_combined_frame(selected)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def run_charts(run_id: str, _source: LogSource) -> Dict[str, pd.DataFrame]:
+    """The run's plot frames, line charts downsampled."""
+    if isinstance(_source, str):
+        log_frames = read_action_frames(_source, PLOT_ACTIONS)
+    else:
+        log_frames = {action.value: _source.to_frame(action) for action in PLOT_ACTIONS if action in _source.tables}
+    return chart_frames(log_frames)
+
+def paged_dataframe(df: pd.DataFrame, key: str) -> None:
+
+    #only the rows of the selected page are sent to the browser
+    columns = st.columns(2)
+    page_size = columns[0].selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    pages = max(1, -(-len(df) // page_size))
+    # clamped rather than bounded, so a narrower filter never leaves the widget out of range
+    page = min(int(columns[1].number_input(f"Page (of {pages})", min_value=1, value=1, step=1, key=f"{key}_page")), pages)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(df))
+    st.caption(f"Rows {start + 1 if len(df) else 0}-{end} of {len(df)}")
+    st.dataframe(df.iloc[start:end])
+
+    return
+
+def filtered_log(run_id: str, source: LogSource, streamed: bool = False) -> None:
 
-    #filters by action tag
+    #filters by action tag; a streamed log can be too long to show whole, so it starts on the plotted actions
     st.header("Simulation Log")
-    st.text("This is a log of all the simulation. You can filter the log by action tag. May take a pair of seconds to load.")
+    if streamed:
+        st.text("The log was streamed to disk; only the actions you select are read back.")
+    else:
+        st.text("This is a log of all the simulation. You can filter the log by action tag.")
 
-    actions_available = sorted(log_df["action"].unique())
+    actions_available = source_actions(source)
+    default_actions = [action for action in actions_available if action in PLOT_ACTIONS] if streamed else actions_available
     selected_actions = st.multiselect(
-        "Filter by action", options=actions_available, default=actions_available
+        "Filter by action", options=actions_available, default=default_actions, format_func=lambda action: action.value
     )
-    filtered_df = log_df[log_df["action"].isin(selected_actions)]
 
-    # show the log
-    
-    st.dataframe(filtered_df)
+    # show one page of the log
+    paged_dataframe(log_view(run_id, tuple(action.value for action in selected_actions), source), "log")
 
     return
 
-def plots(log_df: pd.DataFrame) -> None:
+def profile_panel(report: Profile_report) -> None:
 
-    st.header("Simulation Plots")
+    with st.expander("Profiler"):
+        st.text(f"Run took {report.total_seconds:.3f} s. Phase times are inclusive: meta progression contains merge, level up and equip.")
+        st.dataframe(report.phases)
+        st.json(report.counters)
 
-    st.text("For context, when revering to Session, it means a loop of: one combat and level up and merging with the earned resources")
+        if len(report.sessions):
+            st.subheader("Seconds per Session by Phase")
+            st.line_chart(downsample(report.sessions[[column for column in report.sessions.columns if column.endswith("_seconds")]]))
 
-    # -------------------
-    # Combat & Chapter Plots
-    # -------------------
+    return
 
-    st.subheader("Combat Results Log")
-    st.text("This is a log of all the combats. it contains information about player proximity to winning every chapter.")
-    mask = log_df["action"].isin([Log_Action.LOSE_CHAPTER.value, Log_Action.WIN_CHAPTER.value])
-    combats_df = log_df.loc[mask].copy()
+def cohort_plots(cohort: Cohort_result) -> None:
 
-    if "payload" in combats_df.columns:
-        payload_cols = combats_df["payload"].apply(pd.Series).add_prefix("combat_")
-        combats_df = pd.concat([combats_df.drop(columns=["payload"]), payload_cols], axis=1)
+    st.header("Player Archetypes")
+    st.text("Every player type flagged to simulate, run with the same seeds. Curves are the median across seeds.")
 
-    st.dataframe(combats_df)
+    st.dataframe(cohort.summary())
 
-    mask = log_df["action"].isin([Log_Action.WIN_CHAPTER.value])
-    results_df = log_df.loc[mask].copy()
+    st.subheader("Player Progression: Chapter Level per Session")
+    st.line_chart(downsample(cohort.curve_quantile("chapter_curve")))
 
-    if "payload" in results_df.columns:
-        payload_cols = results_df["payload"].apply(pd.Series)
-        results_df = pd.concat([results_df.drop(columns=["payload"]), payload_cols], axis=1)
+    st.subheader("Resources: Storaged Coins per Session")
+    st.line_chart(downsample(cohort.curve_quantile("gold_curve")))
 
-    counts = (
-        results_df.groupby(["current_day", "action"])
-        .size()
-        .unstack(fill_value=0)
-        .rename_axis(None, axis=1)  # cleaner column labels
-        .sort_index()
-    )
+    st.subheader("Resources: Storaged Designs per Session")
+    st.line_chart(downsample(cohort.curve_quantile("designs_curve")))
 
-    st.subheader("Player Progression: Victories per Day")
-    st.line_chart(counts)
+    return
 
+def plots(run_id: str, source: LogSource) -> None:
 
-    ### Show the log of combats per session
+    st.header("Simulation Plots")
 
-    mask = log_df["action"].isin([Log_Action.SESSION_END.value])
-    resources_df = log_df.loc[mask].copy()
+    st.text("For context, when revering to Session, it means a loop of: one combat and level up and merging with the earned resources")
 
-    if "payload" in resources_df.columns:
-        payload_cols = resources_df["payload"].apply(pd.Series).add_prefix("session_")
-        resources_df = pd.concat([resources_df.drop(columns=["payload"]), payload_cols], axis=1)
+    frames = run_charts(run_id, source)
 
-    
-    graph_data = resources_df.set_index("current_day").sort_index().copy()
+    # -------------------
+    # Combat & Chapter Plots
+    # -------------------
 
-    st.subheader("Player Progression: Max Chapter Level per Day")
-    st.line_chart(graph_data["session_chapter_level"])
+    st.subheader("Combat Results Log")
+    st.text("This is a log of all the combats. it contains information about player proximity to winning every chapter.")
+    paged_dataframe(frames["combats"], "combats")
 
-   
+    st.subheader("Player Progression: Victories per Day")
+    st.line_chart(frames["victories_per_day"])
 
-    graph_data = resources_df.set_index("session_current_session").sort_index().copy()
-    #st.dataframe(graph_data)
+    st.subheader("Player Progression: Max Chapter Level per Day")
+    st.line_chart(frames["chapter_per_day"])
 
     st.subheader("Player Progression: Max Chapter Level per Session")
-    st.line_chart(graph_data["session_chapter_level"])
+    st.line_chart(frames["chapter_per_session"])
 
     st.subheader("Player Progression: Max Level per Equiped Gear Piece")
-    st.line_chart(graph_data[["session_weapon_gear_level", "session_ring_gear_level", "session_gloves_gear_level", "session_helmet_gear_level", "session_armor_gear_level", "session_boots_gear_level"]])
+    st.line_chart(frames["gear_levels"])
 
 
      # -------------------
@@ -97,15 +149,13 @@ def plots(log_df: pd.DataFrame) -> None:
     # -------------------
 
     st.subheader("Resources: Storaged Coins")
-    st.line_chart(graph_data["session_current_coins"])
+    st.line_chart(frames["coins"])
 
     #st.subheader("Gacha Rarity")
-    #st.bar_chart(graph_data[["session_weapon_gear_rarity", "session_ring_gear_rarity", "session_gloves_gear_rarity", "session_helmet_gear_rarity", "session_armor_gear_rarity", "session_boots_gear_rarity"]])
+    #st.bar_chart(graph_data[["weapon_gear_rarity", "ring_gear_rarity", "gloves_gear_rarity", "helmet_gear_rarity", "armor_gear_rarity", "boots_gear_rarity"]])
 
     st.subheader("Resources: Storaged Designs, group by Gear Piece")
-    if "session_designs" in graph_data.columns:
-        designs_df = pd.DataFrame(graph_data["session_designs"].tolist(), index=graph_data.index).fillna(0)
-        st.line_chart(designs_df)
+    st.line_chart(frames["designs"])
 
     return
 
@@ -113,15 +163,18 @@ def plots(log_df: pd.DataFrame) -> None:
 
 
 # ------------------------------------------------------------------
-# Manual cache refresh: clears st.cache_data and reruns the script
+# Manual refresh: clears st.cache_data, refetches the sheets into the local snapshot and reruns the script
 # ------------------------------------------------------------------
 if st.button("Reload config from Google Sheets ↻"):
     st.cache_data.clear()
+    st.session_state["refresh_config"] = True
     st.rerun() 
 
 st.title("Cup Heroes Gear and Chapters Simulator")
 
-config = Config.initialize()
+config = Config.initialize(refresh=st.session_state.pop("refresh_config", False))
+if config.snapshot is not None:
+    st.caption(f"Config snapshot fetched {config.snapshot.fetched_at} from {config.snapshot.source} ({config.snapshot.content_hash[:12]})")
 
 # Display the config to allow editing
 st.subheader("Config Editor")
@@ -135,12 +188,7 @@ edited_gacha_config = st.data_editor(config.gacha_df)
 edited_offers_config = st.data_editor(config.offers_df)
 edited_players_config = st.data_editor(config.players_df)
 
-# Simulation
-if "simulation_done" not in st.session_state:
-    st.session_state.simulation_done = False
-
-if st.button("Run Simulation & Graphs"):
-
+def apply_edits() -> None:
     config.reasign_config(
     new_gear_levels_config=edited_gear_levels_config,
     new_gear_merge_config=edited_gear_merge_config,
@@ -150,18 +198,56 @@ if st.button("Run Simulation & Graphs"):
     new_players_config=edited_players_config
     )
 
-    Logger.clear_logs()
-    model_instance = model.initialize(config)
-    model_instance.simulate()
+# Simulation
+if "simulation_done" not in st.session_state:
+    st.session_state.simulation_done = False
+
+seed = int(st.number_input("Seed", min_value=0, value=0, step=1, help="Same config and seed give the same run, served from the result cache."))
+profile_run = st.checkbox("Profile the run", value=False, help="Time every phase of the simulation; profiled runs are always simulated, never served from the cache.")
+stream_log = st.checkbox("Stream the log to disk", value=False, help="For long runs: events are written to Parquet as the run goes and read back one action at a time.")
+
+if st.button("Run Simulation & Graphs"):
+
+    apply_edits()
+
+    # Identical config and seed: reuse the stored run instead of simulating again
+    compiled_config = CompiledConfig.initialize(config)
+    result_cache = Result_cache.initialize()
+    key = run_key(compiled_config, seed)
+    cached = None if profile_run or stream_log else result_cache.get(key, with_log=True)
+    # The previous streamed log is replaced by this run
+    if "log_dir" in st.session_state:
+        shutil.rmtree(st.session_state["log_dir"], ignore_errors=True)
+    for state_key in ("profile", "log_dir", "event_log", "run_id"):
+        st.session_state.pop(state_key, None)
+
+    if cached is not None:
+        # The cached log is the Parquet directory it was stored in, read back per action like a streamed one
+        event_log = cached.log_dir
+    else:
+        # Every run gets its own logger, so simultaneous sessions never share a log
+        sink = Parquet_sink(tempfile.mkdtemp(prefix="cupheroes_log_")) if stream_log else None
+        run_logger = Sim_logger(sink=sink)
+        profiler = Sim_profiler() if profile_run else None
+        model_instance = model.initialize(compiled_config, seed=seed, logger=run_logger, profiler=profiler)
+        model_instance.simulate()
+        run_logger.close()
+
+        if sink is not None:
+            # The log is on disk only; it is read back per action below
+            st.session_state["log_dir"] = sink.directory
+            event_log = None
+        else:
+            event_log = run_logger.get_event_log()
+            result_cache.put(key, kpis_from_logs(0, seed, event_log), event_log)
+        if profiler is not None:
+            st.session_state["profile"] = profiler.report()
     st.session_state.simulation_done = True
-    log_df = Logger.get_logs_as_dataframe()
 
-        # Expand the 'time' dict column into separate columns
-    if 'time' in log_df.columns:
-        time_cols = log_df['time'].apply(pd.Series)
-        log_df = pd.concat([log_df.drop(columns=['time']), time_cols], axis=1)
-        # Persist log dataframe in session state so it survives reruns
-        st.session_state["log_df"] = log_df
+    # Persist the log in session state so it survives reruns; its frames are derived lazily, once per run id
+    if event_log is not None:
+        st.session_state["event_log"] = event_log
+    st.session_state["run_id"] = f"{key}-stream" if stream_log else key
 
 
     # Show results
@@ -171,6 +257,20 @@ if st.button("Run Simulation & Graphs"):
         #plots(log_df)
         
 # Display cached logs/plots if simulation was run
-if "log_df" in st.session_state:
-    filtered_log(st.session_state["log_df"])
-    plots(st.session_state["log_df"])
\ No newline at end of file
+if "profile" in st.session_state:
+    profile_panel(st.session_state["profile"])
+
+log_source = st.session_state.get("event_log", st.session_state.get("log_dir"))
+if log_source is not None:
+    filtered_log(st.session_state["run_id"], log_source, streamed="log_dir" in st.session_state)
+    plots(st.session_state["run_id"], log_source)
+
+# Cohort: all archetypes flagged simulate == TRUE in one parallel run
+cohort_seeds = int(st.number_input("Seeds per player type", min_value=1, value=5, step=1))
+
+if st.button("Run All Player Types"):
+    apply_edits()
+    st.session_state["cohort"] = run_cohort(config, cohort_seeds, seed=seed, cache=Result_cache.initialize())
+
+if "cohort" in st.session_state:
+    cohort_plots(st.session_state["cohort"])
\ No newline at end of file
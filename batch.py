@@ -0,0 +1,427 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import Model_checkpoint
+from compiled_config import CompiledConfig
+from config_import import Config
+from kpi_aggregator import Kpi_aggregator
+from logger import Columnar_log, Log_level, Log_settings, Log_Action, Sim_logger
+from model import model
+from result_cache import Result_cache, run_key
+from rng import spawn_run_seeds
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo batch runner: N independently seeded simulations of one Config
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Run_result:
+    run_index: int
+    seed: int
+    completed: bool
+    days_to_finish: Optional[int]
+    final_day: int
+    final_chapter: int
+    total_sessions: int
+    sessions_per_chapter: Dict[int, int]
+    gold_curve: np.ndarray
+    designs_curve: np.ndarray
+    chapter_curve: np.ndarray
+
+    def kpis(self) -> Dict[str, Any]:
+        return {
+            "run_index": self.run_index,
+            "seed": self.seed,
+            "completed": self.completed,
+            "days_to_finish": self.days_to_finish,
+            "final_day": self.final_day,
+            "final_chapter": self.final_chapter,
+            "total_sessions": self.total_sessions,
+            "final_gold": float(self.gold_curve[-1]) if len(self.gold_curve) else 0.0,
+            "final_designs": float(self.designs_curve[-1]) if len(self.designs_curve) else 0.0,
+        }
+
+
+@dataclass
+class Batch_result:
+    runs: List[Run_result] = field(default_factory=list)
+
+    def kpis_df(self) -> pd.DataFrame:
+        """One row of scalar KPIs per run."""
+        return pd.DataFrame([run.kpis() for run in self.runs])
+
+    def sessions_per_chapter_df(self) -> pd.DataFrame:
+        """Sessions spent on every chapter, one row per run and one column per chapter."""
+        df = pd.DataFrame(
+            [run.sessions_per_chapter for run in self.runs],
+            index=[run.run_index for run in self.runs],
+        )
+        return df.reindex(sorted(df.columns), axis=1).fillna(0).astype(int)
+
+    def curve_quantiles(self, curve: str, quantiles: Sequence[float] = (0.1, 0.5, 0.9)) -> pd.DataFrame:
+        """
+        Quantiles across runs of a per-session curve ('gold_curve', 'designs_curve' or 'chapter_curve').
+        Runs that finished earlier keep their last value, so every session has len(runs) samples.
+        """
+        curves = [getattr(run, curve) for run in self.runs if len(getattr(run, curve))]
+        if not curves:
+            return pd.DataFrame(columns=list(quantiles))
+
+        length = max(len(c) for c in curves)
+        padded = np.empty((len(curves), length), dtype=float)
+        for i, c in enumerate(curves):
+            padded[i, :len(c)] = c
+            padded[i, len(c):] = c[-1]
+
+        values = np.quantile(padded, quantiles, axis=0).T
+        df = pd.DataFrame(values, columns=list(quantiles))
+        df.index = pd.RangeIndex(1, length + 1, name="session")
+        return df
+
+    def summary(self) -> pd.DataFrame:
+        """Distribution of the scalar KPIs across runs."""
+        kpis = self.kpis_df().drop(columns=["run_index", "seed"])
+        return kpis.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T
+
+
+def kpis_from_logs(run_index: int, seed: int, event_log: Columnar_log) -> Run_result:
+
+    sessions = event_log.table(Log_Action.SESSION_END)
+    chapter_level = sessions.column_values("chapter_level")
+    gold_curve = sessions.column_values("current_coins").copy()
+    designs_curve = np.zeros(sessions.size, dtype=np.float64)
+    for column in sessions.payload_columns:
+        if column.name.endswith("_designs"):
+            designs_curve += sessions.column_values(column.name)
+
+    chapters, counts = np.unique(chapter_level, return_counts=True)
+
+    completed = event_log.table(Log_Action.SIMULATION_COMPLETED)
+    days_to_finish = int(completed.column_values("current_day")[-1]) if completed.size else None
+
+    return Run_result(
+        run_index=run_index,
+        seed=seed,
+        completed=days_to_finish is not None,
+        days_to_finish=days_to_finish,
+        final_day=int(sessions.column_values("current_day")[-1]) if sessions.size else 1,
+        final_chapter=int(chapter_level[-1]) if sessions.size else 1,
+        total_sessions=sessions.size,
+        sessions_per_chapter={int(chapter): int(count) for chapter, count in zip(chapters, counts)},
+        gold_curve=gold_curve,
+        designs_curve=designs_curve,
+        chapter_curve=chapter_level.astype(np.int64),
+    )
+
+
+def kpis_from_aggregator(run_index: int, seed: int, kpis: Kpi_aggregator) -> Run_result:
+    """The same Run_result kpis_from_logs builds, from the curves the run aggregated as it went."""
+    arrays = kpis.arrays()
+    sessions = kpis.sessions
+    return Run_result(
+        run_index=run_index,
+        seed=seed,
+        completed=kpis.completed_day is not None,
+        days_to_finish=kpis.completed_day,
+        final_day=int(arrays["session_day"][-1]) if sessions else 1,
+        final_chapter=int(arrays["session_chapter"][-1]) if sessions else 1,
+        total_sessions=sessions,
+        sessions_per_chapter=kpis.sessions_per_chapter(),
+        gold_curve=arrays["session_gold"].copy(),
+        designs_curve=arrays["session_designs"].sum(axis=1),
+        chapter_curve=arrays["session_chapter"].copy(),
+    )
+
+
+# Each worker process receives the compiled config once, through the pool initializer,
+# instead of once per task.
+_worker_config: Optional[CompiledConfig] = None
+_worker_model_options: Dict[str, Any] = {}
+
+def _init_worker(config: CompiledConfig, model_options: Optional[Dict[str, Any]] = None) -> None:
+    global _worker_config, _worker_model_options
+    _worker_config = config
+    _worker_model_options = model_options or {}
+
+def simulate_run(config: CompiledConfig, run_index: int, seed: int, model_options: Optional[Dict[str, Any]] = None) -> Run_result:
+    """One seeded simulation of config, reduced to its KPIs."""
+    # Runs are isolated: own random streams for every simulation.
+    # The KPIs are aggregated during the run, so nothing is logged.
+    logger = Sim_logger(Log_settings(level=Log_level.OFF))
+
+    model_instance = model.initialize(config, seed=seed, logger=logger, track_kpis=True, **(model_options or {}))
+    model_instance.simulate()
+
+    return kpis_from_aggregator(run_index, seed, model_instance.kpis)
+
+def _run_one(task: tuple) -> Run_result:
+    run_index, seed = task
+    return simulate_run(_worker_config, run_index, seed, _worker_model_options)
+
+
+def _run_archetype(task: tuple) -> Tuple[str, Run_result]:
+    player_type, run_index, seed = task
+    options = {**_worker_model_options, "player_type": player_type}
+    return player_type, simulate_run(_worker_config, run_index, seed, options)
+
+
+def spawn_seeds(seed: Optional[int], n_runs: int) -> List[int]:
+    """Independent per-run seeds derived from one root seed; model.initialize(config, seed=run.seed) replays a run."""
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) for child in spawn_run_seeds(seed, n_runs)]
+
+
+def run_batch(config: "Config | CompiledConfig", n_runs: int, seed: Optional[int] = None, workers: Optional[int] = None, chunksize: Optional[int] = None, cache: Optional[Result_cache] = None, **model_options: Any) -> Batch_result:
+    """
+    Run n_runs independently seeded simulations of the same config across a process pool.
+    Parameters
+    ----------
+    config : Config | CompiledConfig
+        The config every run simulates, compiled once for the whole batch.
+    n_runs : int
+        Number of simulations.
+    seed : int, optional
+        Root seed; the same root seed reproduces the same batch.
+    workers : int, optional
+        Worker processes, all CPU cores by default. 1 runs in the current process.
+    chunksize : int, optional
+        Runs sent to a worker at once, balanced across workers by default.
+    cache : Result_cache, optional
+        Runs found in the cache are not simulated again; new runs are added to it.
+    **model_options
+        Passed to model.initialize for every run, e.g. player_type, max_allowed_rounds, max_days or fast_forward.
+    """
+    tasks = list(enumerate(spawn_seeds(seed, n_runs)))
+    workers = workers or os.cpu_count() or 1
+    config = config if isinstance(config, CompiledConfig) else CompiledConfig.initialize(config)
+
+    runs: List[Optional[Run_result]] = [None] * n_runs
+    keys: Dict[int, str] = {}
+    if cache is not None:
+        for run_index, run_seed in tasks:
+            keys[run_index] = run_key(config, run_seed, model_options)
+            cached = cache.get(keys[run_index])
+            if cached is not None:
+                runs[run_index] = replace(cached.result, run_index=run_index)
+        tasks = [task for task in tasks if runs[task[0]] is None]
+
+    if workers == 1 or not tasks:
+        _init_worker(config, model_options)
+        simulated = [_run_one(task) for task in tasks]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (workers * 4))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, model_options)) as executor:
+            simulated = list(executor.map(_run_one, tasks, chunksize=chunksize))
+
+    for run in simulated:
+        runs[run.run_index] = run
+        if cache is not None:
+            cache.put(keys[run.run_index], run)
+
+    return Batch_result(runs=runs)
+
+
+# ---------------------------------------------------------------------------
+# Cohort mode: every player type flagged simulate == TRUE, each with the same
+# n_seeds seeds, in one process pool sharing one compiled config.
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Cohort_result:
+    batches: Dict[str, Batch_result] = field(default_factory=dict)
+
+    @property
+    def player_types(self) -> List[str]:
+        return list(self.batches)
+
+    def kpis_df(self) -> pd.DataFrame:
+        """One row of scalar KPIs per run, labelled by player type."""
+        frames = [batch.kpis_df().assign(player_type=player_type) for player_type, batch in self.batches.items()]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        return df[["player_type"] + [column for column in df.columns if column != "player_type"]]
+
+    def summary(self) -> pd.DataFrame:
+        """Mean of every scalar KPI per player type, plus the share of runs that finished the game."""
+        kpis = self.kpis_df().drop(columns=["run_index", "seed"])
+        kpis["days_to_finish"] = pd.to_numeric(kpis["days_to_finish"])
+        return kpis.groupby("player_type", sort=False).mean()
+
+    def curve_quantile(self, curve: str, quantile: float = 0.5) -> pd.DataFrame:
+        """One quantile across runs of a per-session curve, one column per player type, for overlaying archetypes."""
+        columns = {player_type: batch.curve_quantiles(curve, (quantile,))[quantile] for player_type, batch in self.batches.items()}
+        return pd.DataFrame(columns)
+
+
+def run_cohort(config: "Config | CompiledConfig", n_seeds: int = 1, seed: Optional[int] = None, workers: Optional[int] = None, player_types: Optional[Sequence[str]] = None, cache: Optional[Result_cache] = None, **model_options: Any) -> Cohort_result:
+    """
+    Simulate every player type flagged simulate == TRUE, n_seeds runs each, across one process pool.
+    Every player type runs with the same seeds, so differences between them come from their behaviour.
+    Parameters
+    ----------
+    config : Config | CompiledConfig
+        The config every run simulates, compiled once and shared by all workers.
+    n_seeds : int
+        Runs per player type.
+    seed : int, optional
+        Root seed the per-run seeds are derived from.
+    workers : int, optional
+        Worker processes, all CPU cores by default. 1 runs in the current process.
+    player_types : sequence of str, optional
+        Player types to simulate instead of the flagged ones.
+    cache : Result_cache, optional
+        Runs found in the cache are not simulated again; new runs are added to it.
+    **model_options
+        Passed to model.initialize for every run, e.g. max_allowed_rounds, max_days or fast_forward.
+    """
+    config = config if isinstance(config, CompiledConfig) else CompiledConfig.initialize(config)
+    player_types = list(player_types) if player_types is not None else config.simulated_player_types()
+    if not player_types:
+        raise ValueError("No player type in players config has simulate == TRUE")
+
+    seeds = list(enumerate(spawn_seeds(seed, n_seeds)))
+    runs: Dict[str, List[Optional[Run_result]]] = {player_type: [None] * n_seeds for player_type in player_types}
+    keys: Dict[Tuple[str, int], str] = {}
+    tasks = []
+    for player_type in player_types:
+        for run_index, run_seed in seeds:
+            if cache is not None:
+                keys[player_type, run_index] = run_key(config, run_seed, {**model_options, "player_type": player_type})
+                cached = cache.get(keys[player_type, run_index])
+                if cached is not None:
+                    runs[player_type][run_index] = replace(cached.result, run_index=run_index)
+                    continue
+            tasks.append((player_type, run_index, run_seed))
+
+    workers = min(workers or os.cpu_count() or 1, max(1, len(tasks)))
+    if workers == 1:
+        _init_worker(config, model_options)
+        simulated = [_run_archetype(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, model_options)) as executor:
+            simulated = list(executor.map(_run_archetype, tasks, chunksize=chunksize))
+
+    for player_type, run in simulated:
+        runs[player_type][run.run_index] = run
+        if cache is not None:
+            cache.put(keys[player_type, run.run_index], run)
+
+    return Cohort_result(batches={player_type: Batch_result(runs=player_runs) for player_type, player_runs in runs.items()})
+
+
+# ---------------------------------------------------------------------------
+# What-if branches: a run paused part way (model.simulate(until_day=...) or
+# until_chapter) continued in several branches, each with its own behaviour
+# override or random stream. The shared prefix is simulated once; every
+# worker restores the branches from one checkpoint.
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Branch:
+    """name labels the branch; behavior overrides player columns (model.override_behavior); seed gives fresh streams."""
+    name: str
+    behavior: Dict[str, Any] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+
+@dataclass
+class Branch_result:
+    runs: Dict[str, Run_result] = field(default_factory=dict)
+
+    def kpis_df(self) -> pd.DataFrame:
+        """One row of scalar KPIs per branch."""
+        df = pd.DataFrame([run.kpis() for run in self.runs.values()])
+        df.insert(0, "branch", list(self.runs))
+        return df
+
+    def curves(self, curve: str) -> pd.DataFrame:
+        """A per-session curve of every branch, one column each; branches that finished earlier keep their last value."""
+        columns = {name: pd.Series(getattr(run, curve), index=pd.RangeIndex(1, run.total_sessions + 1)) for name, run in self.runs.items()}
+        df = pd.DataFrame(columns).ffill()
+        df.index.name = "session"
+        return df
+
+
+_worker_checkpoint: Optional[Model_checkpoint] = None
+
+def _init_branch_worker(config: CompiledConfig, checkpoint: Model_checkpoint) -> None:
+    global _worker_config, _worker_checkpoint
+    _worker_config = config
+    _worker_checkpoint = checkpoint
+
+def _run_branch(task: tuple) -> Run_result:
+    branch_index, branch = task
+    branch_model = model.restore(_worker_config, _worker_checkpoint, logger=Sim_logger(Log_settings(level=Log_level.OFF)))
+    if branch.behavior:
+        branch_model.override_behavior(branch.behavior)
+    if branch.seed is not None:
+        branch_model.reseed(branch.seed)
+    branch_model.simulate()
+
+    seed = branch.seed if branch.seed is not None else _worker_checkpoint.rng["entropy"]
+    return kpis_from_aggregator(branch_index, seed, branch_model.kpis)
+
+
+def run_branches(parent: model, branches: Sequence[Branch], workers: Optional[int] = None) -> Branch_result:
+    """
+    Continue parent, a run built with track_kpis=True and paused by simulate(until_day=...) or until_chapter,
+    once per branch across a process pool. Every branch's KPIs cover the whole run, the shared prefix included.
+    """
+    if parent.kpis is None:
+        raise ValueError("Branches report KPIs of the whole run: build the parent with model.initialize(..., track_kpis=True).")
+    names = [branch.name for branch in branches]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Branch names must be unique, got {names}")
+
+    checkpoint = parent.checkpoint()
+    tasks = list(enumerate(branches))
+    workers = min(workers or os.cpu_count() or 1, max(1, len(tasks)))
+    if workers == 1:
+        _init_branch_worker(parent.compiled_config, checkpoint)
+        simulated = [_run_branch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_branch_worker, initargs=(parent.compiled_config, checkpoint)) as executor:
+            simulated = list(executor.map(_run_branch, tasks))
+
+    return Branch_result(runs={branch.name: run for branch, run in zip(branches, simulated)})
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo batch of Cup Heroes simulations.")
+    parser.add_argument("--runs", type=int, default=1000, help="number of simulations")
+    parser.add_argument("--seed", type=int, default=None, help="root seed of the batch")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", type=str, default=None, help="CSV file for the per-run KPIs")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="sessions after which a run stops")
+    parser.add_argument("--max-days", type=int, default=None, help="day after which a run stops")
+    parser.add_argument("--fast-forward", action="store_true", help="skip gear updates in sessions where the player is stuck")
+    parser.add_argument("--refresh-config", action="store_true", help="fetch the config from Google Sheets instead of the local snapshot")
+    parser.add_argument("--cohort", action="store_true", help="simulate every player type flagged to simulate, --runs runs each")
+    parser.add_argument("--no-cache", action="store_true", help="simulate every run even if the result cache has it")
+    args = parser.parse_args(argv)
+
+    config = Config.initialize(refresh=args.refresh_config)
+    run = run_cohort if args.cohort else run_batch
+    result = run(
+        config, args.runs, seed=args.seed, workers=args.workers,
+        cache=None if args.no_cache else Result_cache.initialize(),
+        max_allowed_rounds=args.max_sessions, max_days=args.max_days, fast_forward=args.fast_forward,
+    )
+
+    print(result.summary().to_string())
+    if args.output:
+        result.kpis_df().to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import json
+import platform
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from compiled_config import CompiledConfig
+from graphs import plot_frames
+from logger import Sim_logger
+from model import model
+from result_cache import engine_version
+from synthetic_config import synthetic_config
+
+# ---------------------------------------------------------------------------
+# Benchmark suite: times every phase of a run on synthetic configs of growing
+# size, without Google Sheets, and writes the timings as JSON so two runs of
+# the suite can be compared.
+# ---------------------------------------------------------------------------
+
+PHASES = ("compile", "initialize", "simulate", "materialize_log", "plot_frames")
+
+
+@dataclass(frozen=True)
+class Benchmark_scale:
+    """A named config size; params are synthetic_config arguments."""
+    name: str
+    params: Dict[str, int] = field(default_factory=dict)
+
+
+DEFAULT_SCALES = (
+    Benchmark_scale("sheet", dict(chapters=20, gear_levels=50, merge_rules=5, chests=2, offers=2, player_types=3)),
+    Benchmark_scale("medium", dict(chapters=60, gear_levels=150, merge_rules=5, chests=4, offers=8, player_types=5)),
+    Benchmark_scale("large", dict(chapters=200, gear_levels=400, merge_rules=5, chests=8, offers=20, player_types=8)),
+)
+
+
+def _timed(function: Callable[[], Any]) -> tuple:
+    start = time.perf_counter()
+    value = function()
+    return value, time.perf_counter() - start
+
+
+def run_once(config, seed: int, max_sessions: int) -> Dict[str, Any]:
+    """Seconds spent in every phase of one run of config, with its session and event counts."""
+    compiled, compile_time = _timed(lambda: CompiledConfig.initialize(config))
+    logger = Sim_logger()
+    instance, initialize_time = _timed(lambda: model.initialize(compiled, seed=seed, logger=logger, max_allowed_rounds=max_sessions))
+    _, simulate_time = _timed(instance.simulate)
+
+    event_log = logger.get_event_log()
+
+    def materialize():
+        frames = {action.value: df for action, df in event_log.to_frames().items()}
+        event_log.to_combined_frame()
+        return frames
+
+    log_frames, materialize_time = _timed(materialize)
+    _, plot_time = _timed(lambda: plot_frames(log_frames))
+
+    return {
+        "seconds": {
+            "compile": compile_time,
+            "initialize": initialize_time,
+            "simulate": simulate_time,
+            "materialize_log": materialize_time,
+            "plot_frames": plot_time,
+        },
+        "sessions": instance.rounds_done,
+        "events": len(event_log),
+    }
+
+
+def benchmark_scale(scale: Benchmark_scale, repeats: int = 3, max_sessions: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """Repeat run_once on the scale's config, each repeat with its own seed; per-phase min, median and mean."""
+    config = synthetic_config(**scale.params)
+    runs = [run_once(config, seed + repeat, max_sessions) for repeat in range(repeats)]
+
+    phases = {}
+    for phase in PHASES:
+        seconds = [run["seconds"][phase] for run in runs]
+        phases[phase] = {
+            "min": float(np.min(seconds)),
+            "median": float(np.median(seconds)),
+            "mean": float(np.mean(seconds)),
+        }
+
+    sessions = int(np.sum([run["sessions"] for run in runs]))
+    simulate_seconds = float(np.sum([run["seconds"]["simulate"] for run in runs]))
+    return {
+        "scale": asdict(scale),
+        "repeats": repeats,
+        "max_sessions": max_sessions,
+        "phases": phases,
+        "sessions": [run["sessions"] for run in runs],
+        "events": [run["events"] for run in runs],
+        "sessions_per_second": sessions / simulate_seconds if simulate_seconds else None,
+    }
+
+
+def run_suite(scales: Sequence[Benchmark_scale] = DEFAULT_SCALES, repeats: int = 3, max_sessions: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """Benchmark every scale, with the environment the timings were taken in."""
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "engine_version": engine_version(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": [benchmark_scale(scale, repeats, max_sessions, seed) for scale in scales],
+    }
+
+
+def results_frame(suite: Dict[str, Any]) -> pd.DataFrame:
+    """Median seconds of every phase, one row per scale."""
+    rows = {result["scale"]["name"]: {phase: stats["median"] for phase, stats in result["phases"].items()} for result in suite["results"]}
+    return pd.DataFrame.from_dict(rows, orient="index")[list(PHASES)]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> pd.DataFrame:
+    """Median seconds of current over baseline per scale and phase; below 1 is faster."""
+    base = results_frame(baseline)
+    now = results_frame(current)
+    scales = [scale for scale in now.index if scale in base.index]
+    return now.loc[scales] / base.loc[scales]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Cup Heroes simulator on synthetic configs.")
+    parser.add_argument("--scales", type=str, default=",".join(scale.name for scale in DEFAULT_SCALES), help="comma separated scales to run")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per scale")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="sessions after which a run stops")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first repeat")
+    parser.add_argument("--output", type=str, default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--compare", type=str, default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    scales_by_name = {scale.name: scale for scale in DEFAULT_SCALES}
+    names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown = [name for name in names if name not in scales_by_name]
+    if unknown:
+        parser.error(f"unknown scales {unknown}, expected some of {list(scales_by_name)}")
+
+    suite = run_suite([scales_by_name[name] for name in names], args.repeats, args.max_sessions, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(suite, f, indent=2)
+
+    print(results_frame(suite).to_string(float_format=lambda seconds: f"{seconds:.4f}"))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\nRelative to", args.compare)
+        print(compare(baseline, suite).to_string(float_format=lambda ratio: f"{ratio:.2f}x"))
+
+
+if __name__ == "__main__":
+    main()
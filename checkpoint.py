@@ -0,0 +1,123 @@
+import io
+import json
+import zlib
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Checkpoints: the mutable state of a running model and nothing else. The gear
+# rules, chapter tables and offers stay in the CompiledConfig the checkpoint is
+# restored against (checked by content hash), so a snapshot is a few kilobytes:
+# timer, resources, per-gear level and rarity counts, equipped map, session
+# counters and the state of every random stream.
+# Built by model.checkpoint(), turned back into a model by model.restore(...).
+# On disk the arrays go in an npz archive and everything else in one JSON
+# document stored beside them, so loading a checkpoint never unpickles anything.
+# ---------------------------------------------------------------------------
+
+CHECKPOINT_MAGIC = b"CHSIM"
+CHECKPOINT_FORMAT = 2
+# npz entries: the JSON state, the array fields, and the KPI arrays under this prefix
+STATE_ENTRY = "state"
+KPI_PREFIX = "kpis."
+ARRAY_FIELDS = ("gear_levels", "gear_max_rarity", "gear_rarity_counts", "equipped")
+# JSON objects only have string keys; dicts keyed otherwise (Block_sampler's integer_blocks) become item lists
+ITEMS_KEY = "__items__"
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _to_json(item) for key, item in value.items()}
+        return {ITEMS_KEY: [[_to_json(key), _to_json(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        if ITEMS_KEY in value:
+            return {_from_json(key): _from_json(item) for key, item in value[ITEMS_KEY]}
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    return value
+
+
+@dataclass
+class Model_checkpoint:
+    # Identity: the config and player the state belongs to
+    config_hash: str
+    player_type: str
+    # Run counters and options: rounds_done, max_allowed_rounds, current_day, current_day_session,
+    # current_session, max_days, fast_forward, started, finished
+    run: Dict[str, Any]
+    # Timer: (total_time, session_time)
+    timer: Tuple[int, int]
+    # Meta progression; designs in Gear_pieces order, gears in inventory order
+    gold: Any
+    chapter_level: int
+    designs: Tuple[Any, ...]
+    gear_levels: np.ndarray
+    gear_max_rarity: np.ndarray
+    gear_rarity_counts: np.ndarray
+    # Equipped gear per GEAR_PIECES entry as an inventory index, -1 when nothing is equipped
+    equipped: np.ndarray
+    stuck: bool
+    stuck_min_gold: Any
+    # Sim_rng.get_state()
+    rng: Dict[str, Any]
+    # Kpi_aggregator.arrays() of runs that track KPIs, with its completed_day
+    kpis: Optional[Dict[str, np.ndarray]] = None
+    kpis_completed_day: Optional[int] = None
+
+    @property
+    def day(self) -> int:
+        """Day of the last session played."""
+        return self.timer[0] // 1440 + 1
+
+    def to_bytes(self) -> bytes:
+        """Compressed binary form: magic, format version, then the zlib compressed npz archive."""
+        arrays = {name: getattr(self, name) for name in ARRAY_FIELDS}
+        if self.kpis is not None:
+            arrays.update({KPI_PREFIX + name: values for name, values in self.kpis.items()})
+        state = {field.name: getattr(self, field.name) for field in fields(self) if field.name not in ARRAY_FIELDS and field.name != "kpis"}
+        state["has_kpis"] = self.kpis is not None
+        arrays[STATE_ENTRY] = np.frombuffer(json.dumps(_to_json(state)).encode("utf-8"), dtype=np.uint8)
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return CHECKPOINT_MAGIC + bytes([CHECKPOINT_FORMAT]) + zlib.compress(buffer.getvalue())
+
+    @staticmethod
+    def from_bytes(data: bytes) -> 'Model_checkpoint':
+        """The checkpoint to_bytes encoded; only arrays and JSON are read, nothing is unpickled."""
+        header = len(CHECKPOINT_MAGIC)
+        if data[:header] != CHECKPOINT_MAGIC:
+            raise ValueError("Not a model checkpoint.")
+        if data[header] != CHECKPOINT_FORMAT:
+            raise ValueError(f"Checkpoint format {data[header]} is not supported, expected {CHECKPOINT_FORMAT}.")
+
+        with np.load(io.BytesIO(zlib.decompress(data[header + 1:])), allow_pickle=False) as archive:
+            state = _from_json(json.loads(archive[STATE_ENTRY].tobytes().decode("utf-8")))
+            arrays = {name: archive[name] for name in ARRAY_FIELDS}
+            kpis = {name[len(KPI_PREFIX):]: archive[name] for name in archive.files if name.startswith(KPI_PREFIX)}
+
+        has_kpis = state.pop("has_kpis")
+        state["timer"] = tuple(state["timer"])
+        state["designs"] = tuple(state["designs"])
+        return Model_checkpoint(**state, **arrays, kpis=kpis if has_kpis else None)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path: str) -> 'Model_checkpoint':
+        with open(path, "rb") as f:
+            return Model_checkpoint.from_bytes(f.read())
@@ -0,0 +1,439 @@
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config_import import CONFIG_WORKSHEETS, Config, ConfigKeys
+from config_snapshot import combined_hash, frame_hash
+from gear_types import GEAR_PIECES, GEAR_SETS, PIECE_INDEX, SET_INDEX, Gear_pieces, Gear_rarity, Gear_sets
+
+# ---------------------------------------------------------------------------
+# Compiled config: the Config DataFrames turned into flat lookup tables once,
+# so the simulation never queries pandas inside its loop.
+# Compiling works on copies; the caller's DataFrames are never modified.
+# ---------------------------------------------------------------------------
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() == "") or (not isinstance(value, str) and pd.isna(value))
+
+def _as_number(value: Any, default: float = 0) -> Any:
+    """Sheet cell as int or float; blank or non numeric cells become default."""
+    if _is_blank(value):
+        return default
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float)):
+        return int(value) if float(value).is_integer() else value
+    try:
+        number = float(str(value).replace(",", "."))
+    except ValueError:
+        return default
+    return int(number) if number.is_integer() else number
+
+def _number_array(values: List[Any]) -> np.ndarray:
+    """Integer array when every value is whole, float array otherwise."""
+    array = np.asarray(values)
+    return array.astype(np.int64) if np.issubdtype(array.dtype, np.integer) or array.size == 0 else array.astype(np.float64)
+
+def _as_rarity(value: Any) -> Gear_rarity:
+    if isinstance(value, np.generic):
+        value = value.item()
+    return Gear_rarity.parse(value)
+
+
+@dataclass(frozen=True)
+class Gear_level_table:
+    """
+    Level-up costs indexed by the level being reached; index 0 is never reached.
+    cumulative_gold[l] and cumulative_designs[l] cost every level up to l; blocked_after[h][l] is the first level above l
+    that needs a rarity above h (max_level + 1 if none). They are tuples: Gear_inventory.level_up reads them one value at a time.
+    closed_form is False when costs are fractional or negative, where only the level-by-level climb is exact.
+    """
+    max_level: int
+    gold_cost: np.ndarray
+    design_cost: np.ndarray
+    required_rarity: np.ndarray
+    cumulative_gold: Tuple[Any, ...]
+    cumulative_designs: Tuple[Any, ...]
+    blocked_after: Tuple[Tuple[int, ...], ...]
+    closed_form: bool
+
+    @staticmethod
+    def initialize(gear_levels_df: pd.DataFrame) -> 'Gear_level_table':
+        # Levels are looked up by index label, the way level ups always did;
+        # the climb stops at the first level missing from the index.
+        levels = [0]
+        while levels[-1] + 1 in gear_levels_df.index:
+            levels.append(levels[-1] + 1)
+        max_level = levels[-1]
+
+        gold_cost: List[Any] = [0]
+        design_cost: List[Any] = [0]
+        required_rarity: List[int] = [int(Gear_rarity.COMMON)]
+
+        for level in levels[1:]:
+            row = gear_levels_df.loc[level]
+            gold_cost.append(_as_number(row[ConfigKeys.GOLD_COST.value]))
+            design_cost.append(_as_number(row[ConfigKeys.DESIGN_COST.value]))
+            required_rarity.append(int(_as_rarity(row[ConfigKeys.REQUIRED_RARITY.value])))
+
+        # Highest owned rarity h (0 when nothing is owned) -> first level the climb cannot pass from each level
+        blocked_after = []
+        for highest_rarity in range(int(max(Gear_rarity)) + 1):
+            first_blocked = [0] * (max_level + 1)
+            next_blocked = max_level + 1
+            for level in range(max_level, -1, -1):
+                first_blocked[level] = next_blocked
+                if level > 0 and required_rarity[level] > highest_rarity:
+                    next_blocked = level
+            blocked_after.append(tuple(first_blocked))
+
+        gold_cost_array = _number_array(gold_cost)
+        design_cost_array = _number_array(design_cost)
+
+        return Gear_level_table(
+            max_level=max_level,
+            gold_cost=gold_cost_array,
+            design_cost=design_cost_array,
+            required_rarity=np.asarray(required_rarity, dtype=np.int64),
+            cumulative_gold=tuple(itertools.accumulate(gold_cost)),
+            cumulative_designs=tuple(itertools.accumulate(design_cost)),
+            blocked_after=tuple(blocked_after),
+            closed_form=bool(
+                gold_cost_array.dtype == np.int64 and design_cost_array.dtype == np.int64
+                and (gold_cost_array >= 0).all() and (design_cost_array >= 0).all()
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Alias_table:
+    """
+    Walker/Vose alias table: O(1) draws from a fixed discrete distribution.
+    Draw a column i uniformly, keep it with probability prob[i], otherwise take alias[i].
+    """
+    prob: np.ndarray
+    alias: np.ndarray
+
+    @staticmethod
+    def initialize(weights: List[float]) -> 'Alias_table':
+        n = len(weights)
+        scaled = np.asarray(weights, dtype=np.float64) * n / float(np.sum(weights))
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int64)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding error and keeps prob 1
+
+        return Alias_table(prob=prob, alias=alias)
+
+    def sample(self, uniform_columns: np.ndarray, uniform_floats: np.ndarray) -> np.ndarray:
+        """Outcomes for uniform column draws in [0, n) and uniform floats in [0, 1)."""
+        return np.where(uniform_floats < self.prob[uniform_columns], uniform_columns, self.alias[uniform_columns])
+
+
+@dataclass(frozen=True)
+class MergeRequirement:
+    piece_requirement: Gear_pieces
+    rarity_requirement: Gear_rarity
+    set_requirement: Gear_sets
+
+
+@dataclass(frozen=True)
+class Merge_requirement_template:
+    """One merge requirement relative to the gear being merged: a rarity, and whether it must share its piece / set."""
+    rarity: Gear_rarity
+    same_piece: bool
+    same_set: bool
+
+
+@dataclass(frozen=True)
+class Merge_rule_table:
+    """
+    Merge rules parsed once per config. templates are per target rarity, in sheet order;
+    resolved holds them already bound to every (piece, set), shared by all gears of all runs.
+    A requirement not on the same piece / set resolves to DEFAULT, which Gear_inventory.merge treats as before.
+    """
+    templates: Dict[Gear_rarity, Tuple[Merge_requirement_template, ...]]
+    resolved: Dict[Tuple[Gear_pieces, Gear_sets], Dict[Gear_rarity, Tuple[MergeRequirement, ...]]]
+
+    @staticmethod
+    def initialize(gear_merge_df: pd.DataFrame) -> 'Merge_rule_table':
+        templates: Dict[Gear_rarity, Tuple[Merge_requirement_template, ...]] = {}
+
+        for _, row in gear_merge_df.iterrows():
+            requirements = []
+            for i in range(1, 4):
+                rarity = row[f"req{i}_rarity"]
+                if _is_blank(rarity):
+                    # No requirement in this slot
+                    continue
+                requirements.append(Merge_requirement_template(
+                    rarity=_as_rarity(rarity),
+                    same_piece=row[f"req{i}_piece"] == "SAME_PIECE",
+                    same_set=row[f"req{i}_set"] == "SAME_SET",
+                ))
+            templates[_as_rarity(row[ConfigKeys.TARGET_RARITY.value])] = tuple(requirements)
+
+        resolved = {
+            (piece, gear_set): Merge_rule_table.resolve(templates, piece, gear_set)
+            for gear_set in GEAR_SETS
+            for piece in GEAR_PIECES
+        }
+        return Merge_rule_table(templates=templates, resolved=resolved)
+
+    @staticmethod
+    def resolve(templates: Dict[Gear_rarity, Tuple[Merge_requirement_template, ...]], piece: Gear_pieces, gear_set: Gear_sets) -> Dict[Gear_rarity, Tuple[MergeRequirement, ...]]:
+        return {
+            target_rarity: tuple(
+                MergeRequirement(
+                    piece_requirement=piece if template.same_piece else Gear_pieces.DEFAULT,
+                    rarity_requirement=template.rarity,
+                    set_requirement=gear_set if template.same_set else Gear_sets.DEFAULT,
+                )
+                for template in requirements
+            )
+            for target_rarity, requirements in templates.items()
+        }
+
+    def rules_for(self, piece: Gear_pieces, gear_set: Gear_sets) -> Dict[Gear_rarity, Tuple[MergeRequirement, ...]]:
+        rules = self.resolved.get((piece, gear_set))
+        return rules if rules is not None else Merge_rule_table.resolve(self.templates, piece, gear_set)
+
+
+@dataclass(frozen=True, eq=False, slots=True)
+class Gear_slot:
+    """
+    One gear a player can own and its rules, shared by every player of a config. A player's gear state
+    lives in flat arrays indexed by slot; slots are set-major, slot = SET_INDEX[set] * len(GEAR_PIECES) + piece_index,
+    with piece_index = PIECE_INDEX[piece] kept so the hot paths index per-piece state without hashing the enum.
+    """
+    slot: int
+    set: Gear_sets
+    piece: Gear_pieces
+    piece_index: int
+    merge_rules: Dict[Gear_rarity, Tuple[MergeRequirement, ...]]
+    level_up_rules: Gear_level_table
+
+    @staticmethod
+    def catalog(gear_levels: Gear_level_table, merge_rules: Merge_rule_table) -> Tuple['Gear_slot', ...]:
+        """Every ownable gear, in slot order."""
+        return tuple(
+            Gear_slot(slot=SET_INDEX[gear_set] * len(GEAR_PIECES) + PIECE_INDEX[piece], set=gear_set, piece=piece,
+                      piece_index=PIECE_INDEX[piece], merge_rules=merge_rules.rules_for(piece, gear_set), level_up_rules=gear_levels)
+            for gear_set in GEAR_SETS
+            for piece in GEAR_PIECES
+        )
+
+
+@dataclass(frozen=True)
+class Chest_table:
+    """
+    Rarity draw of one chest: rarities with positive weight and their cumulative weights.
+    The alias table covers the joint (rarity, piece, set) outcome; outcome o decodes through
+    outcome_rarity[o], outcome_piece[o] and outcome_set[o] (indices into GEAR_PIECES and GEAR_SETS).
+    """
+    chest_name: str
+    rarities: Tuple[Gear_rarity, ...]
+    cumulative_weights: Tuple[float, ...]
+    alias: Alias_table
+    outcome_rarity: np.ndarray
+    outcome_piece: np.ndarray
+    outcome_set: np.ndarray
+
+    @staticmethod
+    def initialize(row: pd.Series) -> 'Chest_table':
+        rarities: List[Gear_rarity] = []
+        weights: List[float] = []
+
+        for rarity in Gear_rarity:
+            rarity_column = rarity.name.lower()
+            if rarity_column not in row.index or _is_blank(row[rarity_column]):
+                continue
+            weight = float(row[rarity_column])
+            if weight > 0:
+                rarities.append(rarity)
+                weights.append(weight)
+
+        # Piece and set are uniform and independent of the rarity
+        joint_weights = [
+            weight
+            for weight in weights
+            for _ in GEAR_PIECES
+            for _ in GEAR_SETS
+        ]
+        outcomes = np.asarray([
+            (int(rarity), piece_index, set_index)
+            for rarity in rarities
+            for piece_index in range(len(GEAR_PIECES))
+            for set_index in range(len(GEAR_SETS))
+        ], dtype=np.int64).reshape(-1, 3)
+
+        return Chest_table(
+            chest_name=str(row[ConfigKeys.CHEST_NAME.value]),
+            rarities=tuple(rarities),
+            cumulative_weights=tuple(itertools.accumulate(weights)),
+            alias=Alias_table.initialize(joint_weights) if joint_weights else Alias_table(np.zeros(0), np.zeros(0, dtype=np.int64)),
+            outcome_rarity=outcomes[:, 0],
+            outcome_piece=outcomes[:, 1],
+            outcome_set=outcomes[:, 2],
+        )
+
+
+@dataclass(frozen=True)
+class Chapter_table:
+    """Per-chapter values indexed by chapter number; index 0 is unused."""
+    total_chapters: int
+    required_points: np.ndarray
+    win_reward_gold: np.ndarray
+    win_reward_designs: np.ndarray
+    win_reward_gacha: Tuple[str, ...]
+    lose_reward_gold: np.ndarray
+    lose_reward_designs: np.ndarray
+    lose_reward_gacha: Tuple[str, ...]
+
+    @staticmethod
+    def initialize(chapters_df: pd.DataFrame) -> 'Chapter_table':
+        rows = {int(row[ConfigKeys.CHAPTER_NUM.value]): row for _, row in chapters_df.iterrows()}
+        total_chapters = max(rows) if rows else 0
+
+        missing = [chapter for chapter in range(1, total_chapters + 1) if chapter not in rows]
+        if missing:
+            raise ValueError(f"Chapters config has no row for chapters {missing}")
+
+        def column(key: ConfigKeys) -> np.ndarray:
+            return _number_array([0] + [_as_number(rows[chapter][key.value]) for chapter in range(1, total_chapters + 1)])
+
+        def chest_column(key: ConfigKeys) -> Tuple[str, ...]:
+            return ("",) + tuple(str(rows[chapter][key.value]) for chapter in range(1, total_chapters + 1))
+
+        return Chapter_table(
+            total_chapters=total_chapters,
+            required_points=column(ConfigKeys.AVG_GEAR_LEVEL_REQUIRED) * column(ConfigKeys.UNIQUE_GEAR_PIECES_REQUIRED),
+            win_reward_gold=column(ConfigKeys.WIN_REWARD_GOLD),
+            win_reward_designs=column(ConfigKeys.WIN_REWARD_DESIGNS),
+            win_reward_gacha=chest_column(ConfigKeys.WIN_REWARD_GACHA),
+            lose_reward_gold=column(ConfigKeys.LOSE_REWARD_GOLD),
+            lose_reward_designs=column(ConfigKeys.LOSE_REWARD_DESIGNS),
+            lose_reward_gacha=chest_column(ConfigKeys.LOSE_REWARD_GACHA),
+        )
+
+
+@dataclass(frozen=True)
+class Offer:
+    offer_name: str
+    rare_chest: int
+    epic_chest: int
+    gold: int
+    designs: int
+
+    @staticmethod
+    def initialize(row: pd.Series) -> 'Offer':
+        return Offer(
+            offer_name=str(row[ConfigKeys.OFFER_NAME.value]),
+            rare_chest=int(_as_number(row.get(ConfigKeys.OFFER_RARE_CHEST.value, 0))),
+            epic_chest=int(_as_number(row.get(ConfigKeys.OFFER_EPIC_CHEST.value, 0))),
+            gold=int(_as_number(row.get("gold", 0))),
+            designs=int(_as_number(row.get(ConfigKeys.OFFER_DESIGN.value, 0))),
+        )
+
+
+@dataclass(frozen=True)
+class Player_profile:
+    """One row of players_df, plus the offers it buys keyed by the chapter that triggers them."""
+    player_type: str
+    behavior: Dict[str, Any]
+    sessions_per_day: int
+    free_daily_rare_chest: int
+    free_daily_epic_chest: int
+    simulate: bool
+    offer_triggers: Dict[int, Tuple[str, ...]]
+
+    @staticmethod
+    def initialize(behavior: Dict[str, Any], offer_names: List[str]) -> 'Player_profile':
+        behavior = {key: (value.item() if isinstance(value, np.generic) else value) for key, value in behavior.items()}
+
+        offer_triggers: Dict[int, List[str]] = {}
+        for offer_name in offer_names:
+            trigger_chapter = _as_number(behavior.get(offer_name, 0))
+            if isinstance(trigger_chapter, int) and trigger_chapter > 0:
+                offer_triggers.setdefault(int(trigger_chapter), []).append(offer_name)
+
+        return Player_profile(
+            player_type=str(behavior[ConfigKeys.PLAYER_TYPE.value]),
+            behavior=behavior,
+            sessions_per_day=int(_as_number(behavior[ConfigKeys.PLAYER_SESSIONS_PER_DAY.value])),
+            free_daily_rare_chest=int(_as_number(behavior[ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value])),
+            free_daily_epic_chest=int(_as_number(behavior[ConfigKeys.PLAYER_FREE_DAILY_EPIC_CHEST.value])),
+            simulate=str(behavior.get(ConfigKeys.PLAYER_SIMULATE.value, "")).strip().upper() == "TRUE",
+            offer_triggers={chapter: tuple(names) for chapter, names in offer_triggers.items()},
+        )
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    gear_levels: Gear_level_table
+    merge_rules: Merge_rule_table
+    chapters: Chapter_table
+    chests: Dict[str, Chest_table]
+    offers: Dict[str, Offer]
+    players: Dict[str, Player_profile]
+    # Every ownable gear with its rules, shared by all players of all runs
+    gear_slots: Tuple[Gear_slot, ...]
+    # Hash of the Config tables compiled, identifying the config in result caches
+    content_hash: str = ""
+
+    @staticmethod
+    def initialize(config: Config) -> 'CompiledConfig':
+        offers = {}
+        for _, row in config.offers_df.iterrows():
+            offer = Offer.initialize(row)
+            offers[offer.offer_name] = offer
+
+        players = {}
+        for behavior in config.players_df.to_dict(orient="records"):
+            player = Player_profile.initialize(behavior, list(offers))
+            players.setdefault(player.player_type, player)
+
+        chests = {}
+        for _, row in config.gacha_df.iterrows():
+            chest = Chest_table.initialize(row)
+            chests.setdefault(chest.chest_name, chest)
+
+        gear_levels = Gear_level_table.initialize(config.gear_levels_df)
+        merge_rules = Merge_rule_table.initialize(config.gear_merge_df)
+
+        return CompiledConfig(
+            gear_levels=gear_levels,
+            merge_rules=merge_rules,
+            chapters=Chapter_table.initialize(config.chapters_df),
+            chests=chests,
+            offers=offers,
+            players=players,
+            gear_slots=Gear_slot.catalog(gear_levels, merge_rules),
+            content_hash=combined_hash({field_name: frame_hash(getattr(config, field_name)) for field_name in CONFIG_WORKSHEETS}),
+        )
+
+    def simulated_player_types(self) -> List[str]:
+        """Player types flagged with simulate == TRUE, in sheet order."""
+        return [player_type for player_type, player in self.players.items() if player.simulate]
+
+    def get_player(self, player_type: Optional[str] = None) -> Player_profile:
+        """The given player type, or the first one flagged to simulate."""
+        if player_type is None:
+            flagged = self.simulated_player_types()
+            if not flagged:
+                raise ValueError("No player type in players config has simulate == TRUE")
+            player_type = flagged[0]
+        return self.players[player_type]
@@ -1,30 +1,35 @@
-import gspread
-from google.oauth2.service_account import Credentials
 import pandas as pd
 import streamlit as st
-import json
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 from enum import Enum
-from dataclasses import dataclass, field
-from logger import Logger, Log_Action
+from dataclasses import dataclass
+from config_snapshot import Config_snapshot_store, Grid_source, Snapshot_manifest, Worksheet_source
+
+if TYPE_CHECKING:
+    import gspread
 
 # ---------------------------------------------------------------------------
-# Cached Google Sheets fetcher to avoid hitting read‑quota limits
+# Cached Google Sheets fetcher to avoid hitting read‑quota limits
 # ---------------------------------------------------------------------------
-@st.cache_data(ttl=300)  # cache for 5 minutes
-def _fetch_worksheet_df(spreadsheet_name: str, worksheet_name: str) -> pd.DataFrame:
+@st.cache_data(ttl=300)  # cache for 5 minutes
+def _fetch_worksheet_grids(spreadsheet_name: str, worksheet_names: Tuple[str, ...]) -> Dict[str, List[List[Any]]]:
     """
-    Return the worksheet as DataFrame, caching the result to spare Google API calls.
+    Return the cells of every worksheet, caching the result to spare Google API calls.
+    Authorises and opens the spreadsheet once and reads all tabs with a single batchGet request.
     Parameters
     ----------
     spreadsheet_name : str
-        The Google Sheets file name.
-    worksheet_name : str
-        The tab to fetch inside that file.
+        The Google Sheets file name.
+    worksheet_names : tuple of str
+        The tabs to fetch inside that file.
     """
+    from gspread.utils import absolute_range_name
+
     client = connect_to_API()
     sheet = client.open(spreadsheet_name)
-    return pd.DataFrame(sheet.worksheet(worksheet_name).get_all_records())
+    response = sheet.values_batch_get([absolute_range_name(name) for name in worksheet_names])
+    value_ranges = response.get("valueRanges", [])
+    return {name: value_range.get("values", []) for name, value_range in zip(worksheet_names, value_ranges)}
 
 class ConfigSheets(Enum):
     SPREADSHEET_NAME = "cupheroes_sim_data"
@@ -85,6 +90,32 @@ class ConfigKeys(Enum):
 
 
 
+# Config field filled by every worksheet the simulation reads
+CONFIG_WORKSHEETS: Dict[str, ConfigSheets] = {
+    "gear_levels_df": ConfigSheets.GEAR_LEVELS_SHEET_NAMEE,
+    "gear_merge_df": ConfigSheets.GEAR_MERGE_SHEET_NAME,
+    "chapters_df": ConfigSheets.CHAPTERS_SHEET_NAME,
+    "gacha_df": ConfigSheets.CHESTS_SHEET_NAME,
+    "offers_df": ConfigSheets.OFFERS_SHEET_NAME,
+    "players_df": ConfigSheets.PLAYERS_SHEET_NAME,
+}
+
+def config_worksheet_names() -> Sequence[str]:
+    return [sheet.value for sheet in CONFIG_WORKSHEETS.values()]
+
+
+class Google_sheets_source(Grid_source):
+    """The balancing spreadsheet on Google Sheets, all tabs in one round trip."""
+
+    name = "google_sheets"
+
+    def __init__(self, spreadsheet_name: str = ConfigSheets.SPREADSHEET_NAME.value):
+        self.spreadsheet_name = spreadsheet_name
+
+    def fetch_grids(self, worksheet_names: Sequence[str]) -> Dict[str, List[List[Any]]]:
+        return _fetch_worksheet_grids(self.spreadsheet_name, tuple(worksheet_names))
+
+
 @dataclass
 class Config:
     gear_merge_df: pd.DataFrame
@@ -93,48 +124,40 @@ class Config:
     gacha_df: pd.DataFrame
     offers_df: pd.DataFrame
     players_df: pd.DataFrame
+    snapshot: Optional[Snapshot_manifest] = None
 
     @staticmethod
-    def initialize() -> 'Config':
-        # Connect to Google Sheets
-        #client = connect_to_API()
+    def initialize(refresh: bool = False, source: Optional[Worksheet_source] = None, snapshot_dir: Optional[str] = None) -> 'Config':
+        """
+        Load the config from the local snapshot. With refresh, or when there is no snapshot yet,
+        fetch every worksheet from source (Google Sheets by default) and save a new snapshot first.
+        Parameters
+        ----------
+        refresh : bool
+            Fetch from source even if a snapshot exists.
+        source : Worksheet_source, optional
+            Where worksheets are fetched from; a Frame_source or Local_grid_source runs fully offline.
+        snapshot_dir : str, optional
+            Snapshot directory, CUPHEROES_CONFIG_SNAPSHOT_DIR or .config_snapshot next to this file by default.
+        """
+        store = Config_snapshot_store.initialize(snapshot_dir)
 
-        gear_levels_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.GEAR_LEVELS_SHEET_NAMEE.value,
-        )
-        gear_merge_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.GEAR_MERGE_SHEET_NAME.value,
-        )
-        chapters_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.CHAPTERS_SHEET_NAME.value,
-        )
-        gacha_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.CHESTS_SHEET_NAME.value,
-        )
-        offers_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.OFFERS_SHEET_NAME.value,
-        )
-        players_df = _fetch_worksheet_df(
-            ConfigSheets.SPREADSHEET_NAME.value,
-            ConfigSheets.PLAYERS_SHEET_NAME.value,
-        )
+        if refresh or not store.exists():
+            source = source or Google_sheets_source()
+            frames = source.fetch(config_worksheet_names())
+            manifest = store.save(frames, source.name)
+        else:
+            frames, manifest = store.load()
 
+        return Config.from_frames(frames, snapshot=manifest)
 
-        config = Config(
-            gear_levels_df=gear_levels_df,
-            gear_merge_df=gear_merge_df,
-            chapters_df=chapters_df,
-            gacha_df=gacha_df,
-            offers_df=offers_df,
-            players_df=players_df
+    @staticmethod
+    def from_frames(frames: Dict[str, pd.DataFrame], snapshot: Optional[Snapshot_manifest] = None) -> 'Config':
+        """Config from DataFrames keyed by worksheet name."""
+        return Config(
+            **{field_name: frames[sheet.value] for field_name, sheet in CONFIG_WORKSHEETS.items()},
+            snapshot=snapshot,
         )
-
-        return config
     
         
     def get_total_chapters(self) -> int:
@@ -154,7 +177,11 @@ class Config:
         self.offers_df = new_offers_config
         self.players_df = new_players_config
 
-def connect_to_API() -> gspread.Client:
+def connect_to_API() -> "gspread.Client":
+    # Imported here so offline runs from a snapshot or a stand-in source do not need the Google client libraries
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive"
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------------------
+# Local config snapshots: every worksheet saved as a Parquet file, plus a
+# manifest with the content hash of each one and when it was fetched, so runs
+# start from disk and only an explicit refresh goes to the network.
+# ---------------------------------------------------------------------------
+
+SNAPSHOT_DIR_ENV = "CUPHEROES_CONFIG_SNAPSHOT_DIR"
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".config_snapshot")
+MANIFEST_NAME = "manifest.json"
+
+
+def default_snapshot_dir() -> str:
+    return os.environ.get(SNAPSHOT_DIR_ENV, DEFAULT_SNAPSHOT_DIR)
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """
+    Content hash of a worksheet: columns, index and every cell with its type, so 1 and "1" differ.
+    Equal frames hash equal whether they come from the sheet, a snapshot or an in-memory stand-in.
+    """
+    content = {
+        "columns": [str(column) for column in df.columns],
+        "index": [_json_value(label) for label in df.index.tolist()],
+        "rows": [[_json_value(value) for value in row] for row in df.itertuples(index=False, name=None)],
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str, allow_nan=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def combined_hash(sheet_hashes: Dict[str, str]) -> str:
+    """One hash over several worksheet hashes, independent of their order."""
+    encoded = json.dumps(sorted(sheet_hashes.items())).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _encode_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Parquet columns need one type; sheet columns often mix numbers and blank strings.
+    Those are stored as JSON text and decoded on load, so every cell keeps its Python type.
+    """
+    encoded = df.copy()
+    json_columns = []
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        types = {type(value) for value in df[column].tolist() if value is not None}
+        if types and types <= {str}:
+            continue
+        encoded[column] = [json.dumps(_json_value(value)) for value in df[column].tolist()]
+        json_columns.append(str(column))
+    return encoded, json_columns
+
+
+def _decode_frame(df: pd.DataFrame, json_columns: List[str]) -> pd.DataFrame:
+    for column in json_columns:
+        df[column] = pd.Series([json.loads(value) for value in df[column].tolist()], index=df.index, dtype=object)
+    return df
+
+
+@dataclass
+class Snapshot_manifest:
+    fetched_at: str
+    source: str
+    content_hash: str
+    sheets: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def sheet_hashes(self) -> Dict[str, str]:
+        return {name: sheet["content_hash"] for name, sheet in self.sheets.items()}
+
+
+class Worksheet_source(ABC):
+    """Where worksheets come from: Google Sheets in production, local frames offline and in tests."""
+
+    name = "worksheet_source"
+
+    @abstractmethod
+    def fetch(self, worksheet_names: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        """Every named worksheet as a DataFrame, keyed by name."""
+
+
+class Frame_source(Worksheet_source):
+    """Stand-in source serving in-memory DataFrames keyed by worksheet name."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], name: str = "frames"):
+        self.frames = frames
+        self.name = name
+
+    def fetch(self, worksheet_names: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        missing = [name for name in worksheet_names if name not in self.frames]
+        if missing:
+            raise KeyError(f"Source {self.name} has no worksheets {missing}")
+        return {name: self.frames[name].copy() for name in worksheet_names}
+
+
+# ---------------------------------------------------------------------------
+# Raw cell grids: a source pulls every worksheet's cells in one round trip,
+# then the grids become DataFrames in parallel, exactly as get_all_records
+# would have built them one worksheet at a time.
+# ---------------------------------------------------------------------------
+
+def numericise(value: Any) -> Any:
+    """Same rules as gspread's numericise: int, then float (thousands commas dropped), else the text unchanged."""
+    if not isinstance(value, str) or "_" in value:
+        return value
+    cleaned = value.replace(",", "")
+    try:
+        return int(cleaned)
+    except ValueError:
+        try:
+            return float(cleaned)
+        except ValueError:
+            return value
+
+
+def grid_to_frame(grid: List[List[Any]]) -> pd.DataFrame:
+    """
+    DataFrame of a worksheet's cells: first row as header, rows padded to the widest one and every
+    cell numericised, matching Worksheet.get_all_records.
+    """
+    if not grid or grid == [[]]:
+        return pd.DataFrame()
+    width = max(len(row) for row in grid)
+    rows = [list(row) + [""] * (width - len(row)) for row in grid]
+    header = rows[0]
+    return pd.DataFrame([dict(zip(header, [numericise(value) for value in row])) for row in rows[1:]])
+
+
+def grids_to_frames(grids: Dict[str, List[List[Any]]], max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Convert every worksheet's grid concurrently, keeping the worksheet order."""
+    if len(grids) <= 1:
+        return {name: grid_to_frame(grid) for name, grid in grids.items()}
+    with ThreadPoolExecutor(max_workers=max_workers or len(grids)) as executor:
+        frames = executor.map(grid_to_frame, grids.values())
+        return dict(zip(grids.keys(), frames))
+
+
+class Grid_source(Worksheet_source):
+    """Source fetching the raw cell grids of all worksheets at once; subclasses implement fetch_grids."""
+
+    name = "grid_source"
+
+    @abstractmethod
+    def fetch_grids(self, worksheet_names: Sequence[str]) -> Dict[str, List[List[Any]]]:
+        """The cells of every named worksheet, header row first, in one round trip."""
+
+    def fetch(self, worksheet_names: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        return grids_to_frames(self.fetch_grids(worksheet_names))
+
+
+class Local_grid_source(Grid_source):
+    """
+    Offline stand-in for the spreadsheet: serves cell grids as the Sheets API renders them,
+    optionally sleeping latency seconds once per fetch to mimic the single round trip.
+    """
+
+    def __init__(self, grids: Dict[str, List[List[Any]]], latency: float = 0.0, name: str = "local_grids"):
+        self.grids = grids
+        self.latency = latency
+        self.name = name
+
+    @staticmethod
+    def from_frames(frames: Dict[str, pd.DataFrame], latency: float = 0.0) -> 'Local_grid_source':
+        """Grids of the given frames with every cell rendered as text, as the sheet would show them."""
+        grids = {}
+        for name, df in frames.items():
+            grid = [[str(column) for column in df.columns]]
+            grid.extend([["" if value is None else str(value) for value in row] for row in df.itertuples(index=False, name=None)])
+            grids[name] = grid
+        return Local_grid_source(grids, latency=latency)
+
+    def fetch_grids(self, worksheet_names: Sequence[str]) -> Dict[str, List[List[Any]]]:
+        missing = [name for name in worksheet_names if name not in self.grids]
+        if missing:
+            raise KeyError(f"Source {self.name} has no worksheets {missing}")
+        if self.latency:
+            time.sleep(self.latency)
+        return {name: [list(row) for row in self.grids[name]] for name in worksheet_names}
+
+
+def benchmark_source(source: Worksheet_source, worksheet_names: Sequence[str], repeats: int = 5) -> Dict[str, Any]:
+    """Wall-clock seconds of repeated full fetches from source: every run plus min, median and mean."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        source.fetch(worksheet_names)
+        timings.append(time.perf_counter() - start)
+    return {
+        "source": source.name,
+        "worksheets": len(worksheet_names),
+        "repeats": repeats,
+        "seconds": timings,
+        "min": float(np.min(timings)),
+        "median": float(np.median(timings)),
+        "mean": float(np.mean(timings)),
+    }
+
+
+@dataclass
+class Config_snapshot_store:
+    directory: str
+
+    @staticmethod
+    def initialize(directory: Optional[str] = None) -> 'Config_snapshot_store':
+        return Config_snapshot_store(directory=directory or default_snapshot_dir())
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def read_manifest(self) -> Optional[Snapshot_manifest]:
+        if not self.exists():
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return Snapshot_manifest(**json.load(f))
+
+    def save(self, frames: Dict[str, pd.DataFrame], source: str) -> Snapshot_manifest:
+        """
+        Write every worksheet and then the manifest. Files are named after their content hash and the
+        manifest is replaced atomically, so readers never see a half-written snapshot. The previous
+        snapshot's files are kept until the next save, so a reader that read the old manifest can still load it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        previous = self.read_manifest()
+
+        sheets = {}
+        for name, df in frames.items():
+            content_hash = frame_hash(df)
+            file_name = f"{name}.{content_hash[:16]}.parquet"
+            encoded, json_columns = _encode_frame(df)
+            encoded.to_parquet(os.path.join(self.directory, file_name))
+            sheets[name] = {
+                "file": file_name,
+                "content_hash": content_hash,
+                "rows": int(len(df)),
+                "json_columns": json_columns,
+            }
+
+        manifest = Snapshot_manifest(
+            fetched_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            source=source,
+            content_hash=combined_hash({name: sheet["content_hash"] for name, sheet in sheets.items()}),
+            sheets=sheets,
+        )
+
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".json")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            json.dump(asdict(manifest), f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+        # Files referenced by neither this snapshot nor the one it replaced are no longer read by anyone
+        referenced = {sheet["file"] for sheet in sheets.values()}
+        if previous is not None:
+            referenced.update(sheet["file"] for sheet in previous.sheets.values())
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".parquet") and file_name not in referenced:
+                os.remove(os.path.join(self.directory, file_name))
+
+        return manifest
+
+    def load(self, verify: bool = True) -> Tuple[Dict[str, pd.DataFrame], Snapshot_manifest]:
+        """The snapshot's worksheets and manifest; with verify, a worksheet whose content hash changed raises ValueError."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"No config snapshot in {self.directory}")
+
+        frames = {}
+        for name, sheet in manifest.sheets.items():
+            df = _decode_frame(pd.read_parquet(os.path.join(self.directory, sheet["file"])), sheet["json_columns"])
+            if verify and frame_hash(df) != sheet["content_hash"]:
+                raise ValueError(f"Snapshot of worksheet {name} does not match its content hash")
+            frames[name] = df
+
+        return frames, manifest
@@ -0,0 +1,51 @@
+from enum import Enum, IntEnum
+
+class Gear_sets(Enum):
+    COLLECTOR = "collector_set"
+    DEFENDER = "defender_set"
+    ROGUE = "rogue_set"
+    TACTICIAN = "tactician_set"
+    WARRIOR = "warrior_set"
+    DEFAULT = "default_set"
+
+class Gear_pieces(Enum):
+    WEAPON = "weapon    "
+    RING = "ring"
+    GLOVES = "gloves"
+    HELMET = "helmet"
+    ARMOR = "armor"
+    BOOTS = "boots"
+    DEFAULT = "default"
+
+class Gear_rarity(IntEnum):
+    COMMON = 1
+    UNCOMMON = 2
+    RARE = 3
+    EPIC = 4
+    MYTHICAL = 5
+    LEGENDARY = 6
+
+    def __str__(self):
+        return self.name.lower()
+    
+    @staticmethod
+    def parse(value: "Gear_rarity | str | int") -> "Gear_rarity":
+        """Accepta enum, string ('common') o int (1-6) i retorna Gear_rarity."""
+        if isinstance(value, Gear_rarity):
+            return value
+        if isinstance(value, (int, float)):
+            return Gear_rarity(int(value))
+        if isinstance(value, str):
+            return Gear_rarity[value.strip().upper()]
+        raise ValueError(f"Unknown rarity value: {value}")
+
+
+# Pieces and sets a player can actually own, in enum order
+GEAR_PIECES = tuple(piece for piece in Gear_pieces if piece != Gear_pieces.DEFAULT)
+GEAR_SETS = tuple(gear_set for gear_set in Gear_sets if gear_set != Gear_sets.DEFAULT)
+# Rarity values index per-rarity arrays directly; index 0 is unused
+RARITY_SLOTS = max(Gear_rarity) + 1
+
+# Position of every set and piece in its enum: gear slots, designs and equipped gear are indexed by it
+SET_INDEX = {gear_set: i for i, gear_set in enumerate(Gear_sets)}
+PIECE_INDEX = {piece: i for i, piece in enumerate(Gear_pieces)}
@@ -0,0 +1,120 @@
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+from gear_types import GEAR_PIECES
+from logger import Log_Action
+
+# ---------------------------------------------------------------------------
+# Plot data: the DataFrames the app charts, derived from a run's per-action
+# log frames. Kept free of Streamlit so they can be reused and benchmarked.
+# ---------------------------------------------------------------------------
+
+GEAR_LEVEL_COLUMNS = [f"{piece.value.strip()}_gear_level" for piece in GEAR_PIECES]
+DESIGNS_COLUMNS = [f"{piece.value.strip()}_designs" for piece in GEAR_PIECES]
+# Actions plot_frames reads
+PLOT_ACTIONS = [Log_Action.WIN_CHAPTER, Log_Action.LOSE_CHAPTER, Log_Action.SESSION_END]
+# Frames of plot_frames drawn as line charts; the rest are tables
+LINE_FRAMES = ("victories_per_day", "chapter_per_day", "chapter_per_session", "gear_levels", "coins", "designs")
+# Points a line chart keeps after downsampling; the browser draws no more than this per series
+DEFAULT_MAX_POINTS = 2000
+
+
+def action_frame(log_frames: Dict[str, pd.DataFrame], action: Log_Action) -> pd.DataFrame:
+    return log_frames.get(action.value, pd.DataFrame(columns=["seq", "action", "current_day"]))
+
+
+def plot_frames(log_frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Every frame the app plots, by name: combats, victories_per_day, chapter_per_day,
+    chapter_per_session, gear_levels, coins and designs.
+    """
+    combats_df = pd.concat(
+        [action_frame(log_frames, Log_Action.LOSE_CHAPTER), action_frame(log_frames, Log_Action.WIN_CHAPTER)],
+        ignore_index=True,
+    ).sort_values("seq")
+
+    results_df = action_frame(log_frames, Log_Action.WIN_CHAPTER)
+
+    counts = (
+        results_df.groupby(["current_day", "action"])
+        .size()
+        .unstack(fill_value=0)
+        .rename_axis(None, axis=1)  # cleaner column labels
+        .sort_index()
+    )
+
+    resources_df = action_frame(log_frames, Log_Action.SESSION_END)
+    per_day = resources_df.set_index("current_day").sort_index()
+    per_session = resources_df.set_index("current_session").sort_index()
+
+    return {
+        "combats": combats_df,
+        "victories_per_day": counts,
+        "chapter_per_day": per_day["chapter_level"],
+        "chapter_per_session": per_session["chapter_level"],
+        "gear_levels": per_session[GEAR_LEVEL_COLUMNS],
+        "coins": per_session["current_coins"],
+        "designs": per_session[DESIGNS_COLUMNS],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Downsampling: Largest-Triangle-Three-Buckets keeps, in every bucket, the point
+# spanning the largest triangle with its neighbours, so peaks, steps and plateaus
+# of a curve survive where a stride would drop them.
+# ---------------------------------------------------------------------------
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions of the threshold points LTTB keeps of (x, y); the first and last are always kept."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    # threshold - 2 buckets between the first and last points; the one after the last bucket is the last point
+    edges = np.append(np.linspace(1, n - 1, threshold - 1).astype(np.int64), n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2]
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample(data: Union[pd.Series, pd.DataFrame], max_points: int = DEFAULT_MAX_POINTS) -> Union[pd.Series, pd.DataFrame]:
+    """
+    data with at most max_points rows, chosen by LTTB against the index (or the row position
+    when the index is not numeric). The columns of a frame share max_points: each keeps its
+    share of the points and the frame keeps their union, so every series stays aligned on the same rows.
+    """
+    if len(data) <= max_points:
+        return data
+
+    index = data.index
+    x = index.to_numpy(dtype=np.float64) if pd.api.types.is_numeric_dtype(index) else np.arange(len(data), dtype=np.float64)
+    columns = [data] if isinstance(data, pd.Series) else [data[column] for column in data.columns]
+    # LTTB needs 3 points (both ends and one bucket); the shared ends make a union of k shares at most k * (share - 2) + 2
+    per_column = max(3, (max_points - 2) // max(1, len(columns)) + 2)
+
+    keep = np.unique(np.concatenate([lttb_indices(x, column.to_numpy(dtype=np.float64), per_column) for column in columns]))
+    return data.iloc[keep]
+
+
+def chart_frames(log_frames: Dict[str, pd.DataFrame], max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, pd.DataFrame]:
+    """plot_frames with every line chart downsampled to max_points."""
+    frames = plot_frames(log_frames)
+    for name in LINE_FRAMES:
+        frames[name] = downsample(frames[name], max_points)
+    return frames
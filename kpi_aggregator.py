@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from gear_types import GEAR_PIECES, Gear_rarity
+
+# ---------------------------------------------------------------------------
+# Online KPIs: the progression curves the app and the batch runner need,
+# written by model.simulate at every session end and chapter win into arrays
+# preallocated for the whole run, so no log has to be kept or parsed.
+# Session s is row s - 1, day d is row d - 1, chapter c is row c.
+# The sizes are estimates: days also roll over when a day's sessions outlast it,
+# so session and day arrays double whenever a row past their end is written.
+# ---------------------------------------------------------------------------
+
+PIECE_NAMES = [piece.value.strip() for piece in GEAR_PIECES]
+SESSION_ARRAYS = ("session_day", "session_chapter", "session_victory", "session_gold", "session_designs",
+                  "session_gear_level", "session_gear_rarity")
+DAY_ARRAYS = ("day_chapter", "day_victories")
+
+
+@dataclass
+class Kpi_aggregator:
+    sessions: int
+    session_day: np.ndarray
+    session_chapter: np.ndarray
+    session_victory: np.ndarray
+    session_gold: np.ndarray
+    session_designs: np.ndarray
+    session_gear_level: np.ndarray
+    session_gear_rarity: np.ndarray
+    day_chapter: np.ndarray
+    day_victories: np.ndarray
+    chapter_sessions: np.ndarray
+    days: int = 0
+    completed_day: Optional[int] = None
+
+    @staticmethod
+    def initialize(max_sessions: int, sessions_per_day: int, total_chapters: int) -> 'Kpi_aggregator':
+        """Arrays for max_sessions sessions, the days they span at sessions_per_day and every chapter."""
+        max_days = max_sessions // max(1, sessions_per_day) + 2
+        n_pieces = len(GEAR_PIECES)
+        return Kpi_aggregator(
+            sessions=0,
+            session_day=np.zeros(max_sessions, dtype=np.int64),
+            session_chapter=np.zeros(max_sessions, dtype=np.int64),
+            session_victory=np.zeros(max_sessions, dtype=np.bool_),
+            session_gold=np.zeros(max_sessions, dtype=np.float64),
+            session_designs=np.zeros((max_sessions, n_pieces), dtype=np.float64),
+            session_gear_level=np.zeros((max_sessions, n_pieces), dtype=np.int64),
+            session_gear_rarity=np.zeros((max_sessions, n_pieces), dtype=np.int8),
+            day_chapter=np.zeros(max_days, dtype=np.int64),
+            day_victories=np.zeros(max_days, dtype=np.int64),
+            chapter_sessions=np.zeros(total_chapters + 1, dtype=np.int64),
+        )
+
+    def _grow(self, names: Tuple[str, ...], rows: int) -> None:
+        """Resize the named arrays to hold at least rows rows, at least doubling them."""
+        for name in names:
+            values = getattr(self, name)
+            grown = np.zeros((max(rows, 2 * len(values)),) + values.shape[1:], dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self, name, grown)
+
+    def session_end(self, day: int, chapter: int, victory: bool, meta) -> None:
+        """Record the session that just ended from the player's meta progression."""
+        row = self.sessions
+        if row >= len(self.session_day):
+            self._grow(SESSION_ARRAYS, row + 1)
+        if day > len(self.day_chapter):
+            self._grow(DAY_ARRAYS, day)
+        self.session_day[row] = day
+        self.session_chapter[row] = chapter
+        self.session_victory[row] = victory
+        self.session_gold[row] = meta.gold
+
+        designs = meta.designs
+        equipped = meta.equipped_gear
+        inventory = meta.gear_inventory
+        # designs and equipped_gear are indexed by PIECE_INDEX, which is the piece's position in GEAR_PIECES
+        for i in range(len(GEAR_PIECES)):
+            self.session_designs[row, i] = designs[i]
+            gear = equipped[i]
+            if gear is not None:
+                self.session_gear_level[row, i] = inventory.level[gear.slot]
+                self.session_gear_rarity[row, i] = inventory.max_rarity[gear.slot]
+            else:
+                self.session_gear_rarity[row, i] = Gear_rarity.COMMON
+
+        self.day_chapter[day - 1] = chapter
+        self.days = max(self.days, day)
+        self.chapter_sessions[chapter] += 1
+        self.sessions = row + 1
+
+    def win(self, day: int) -> None:
+        if day > len(self.day_victories):
+            self._grow(DAY_ARRAYS, day)
+        self.day_victories[day - 1] += 1
+
+    def complete(self, day: int) -> None:
+        self.completed_day = day
+
+    def load(self, arrays: Dict[str, np.ndarray], completed_day: Optional[int] = None) -> None:
+        """Continue from the curves another aggregator's arrays() gave, e.g. a checkpoint's."""
+        sessions, days = len(arrays["session_day"]), len(arrays["day_chapter"])
+        if sessions > len(self.session_day):
+            self._grow(SESSION_ARRAYS, sessions)
+        if days > len(self.day_chapter):
+            self._grow(DAY_ARRAYS, days)
+        for name, values in arrays.items():
+            target = getattr(self, name)
+            if len(values) > len(target):
+                raise ValueError(f"{name} holds {len(values)} rows, this aggregator has {len(target)}.")
+            target[:len(values)] = values
+        self.sessions = sessions
+        self.days = days
+        self.completed_day = completed_day
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every curve trimmed to the sessions and days played; views of the preallocated arrays."""
+        n, d = self.sessions, self.days
+        return {
+            "session_day": self.session_day[:n],
+            "session_chapter": self.session_chapter[:n],
+            "session_victory": self.session_victory[:n],
+            "session_gold": self.session_gold[:n],
+            "session_designs": self.session_designs[:n],
+            "session_gear_level": self.session_gear_level[:n],
+            "session_gear_rarity": self.session_gear_rarity[:n],
+            "day_chapter": self.day_chapter[:d],
+            "day_victories": self.day_victories[:d],
+            "chapter_sessions": self.chapter_sessions,
+        }
+
+    def session_frame(self) -> pd.DataFrame:
+        """One row per session: day, chapter, victory, gold and per piece designs, gear level and rarity."""
+        n = self.sessions
+        data = {
+            "current_day": self.session_day[:n],
+            "chapter_level": self.session_chapter[:n],
+            "victory": self.session_victory[:n],
+            "current_coins": self.session_gold[:n],
+        }
+        for i, name in enumerate(PIECE_NAMES):
+            data[f"{name}_designs"] = self.session_designs[:n, i]
+        for i, name in enumerate(PIECE_NAMES):
+            data[f"{name}_gear_level"] = self.session_gear_level[:n, i]
+        for i, name in enumerate(PIECE_NAMES):
+            data[f"{name}_gear_rarity"] = self.session_gear_rarity[:n, i]
+        return pd.DataFrame(data, index=pd.RangeIndex(1, n + 1, name="current_session"))
+
+    def day_frame(self) -> pd.DataFrame:
+        """One row per day: chapter at the day's last session and chapters won that day."""
+        d = self.days
+        return pd.DataFrame(
+            {"chapter_level": self.day_chapter[:d], "victories": self.day_victories[:d]},
+            index=pd.RangeIndex(1, d + 1, name="current_day"),
+        )
+
+    def sessions_per_chapter(self) -> Dict[int, int]:
+        """Sessions spent on every chapter played."""
+        return {chapter: int(count) for chapter, count in enumerate(self.chapter_sessions) if count}
@@ -0,0 +1,162 @@
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from logger import Log_Action, Log_sink, Log_table
+
+# ---------------------------------------------------------------------------
+# Streaming log sinks: a Sim_logger built with one of these flushes its events
+# to disk in fixed-size batches, so memory stays flat however long the run.
+# The files are read back lazily, by action and column, without loading them whole.
+#   Jsonl_sink    one JSON object per event, readable while the run is going
+#   Parquet_sink  one <action>.parquet per action, one row group per flush
+# ---------------------------------------------------------------------------
+
+DEFAULT_READ_ROWS = 65536
+
+
+class Jsonl_sink(Log_sink):
+    """Events as JSON Lines in logging order: action first, then the time columns, payload and message."""
+
+    def __init__(self, path: str, include_messages: bool = True):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.include_messages = include_messages
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, tables: Dict[Log_Action, Log_table]) -> None:
+        rows = []
+        for action, table in tables.items():
+            decoded = table.decoded_columns()
+            messages = table.messages if self.include_messages else None
+            for row in range(table.size):
+                event = {"action": action.value}
+                event.update({name: values[row] for name, values in decoded.items()})
+                if messages is not None:
+                    event["message"] = messages[row]
+                rows.append(event)
+
+        rows.sort(key=lambda event: event["seq"])
+        self._file.writelines(json.dumps(event) + "\n" for event in rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class Parquet_sink(Log_sink):
+    """
+    One Parquet file per action in directory, each flush appended as a row group.
+    Files are complete once the logger is closed; categorical columns stay dictionary encoded.
+    """
+
+    def __init__(self, directory: str, include_messages: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.include_messages = include_messages
+        self._writers = {}
+
+    def path(self, action: Log_Action) -> str:
+        return os.path.join(self.directory, f"{action.value}.parquet")
+
+    def write(self, tables: Dict[Log_Action, Log_table]) -> None:
+        import pyarrow.parquet as pq
+
+        for action, table in tables.items():
+            if not table.size:
+                continue
+            arrow_table = table.to_arrow(self.include_messages)
+            writer = self._writers.get(action)
+            if writer is None:
+                writer = self._writers[action] = pq.ParquetWriter(self.path(action), arrow_table.schema)
+            writer.write_table(arrow_table)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def _action_values(actions: Optional[Sequence[Log_Action]]) -> Optional[List[str]]:
+    return None if actions is None else [action.value for action in actions]
+
+
+def logged_actions(path: str) -> List[Log_Action]:
+    """Actions with events in a Parquet_sink directory."""
+    by_value = {action.value: action for action in Log_Action}
+    names = sorted(file_name[:-len(".parquet")] for file_name in os.listdir(path) if file_name.endswith(".parquet"))
+    return [by_value[name] for name in names if name in by_value]
+
+
+def _iter_parquet(directory: str, actions: Optional[Sequence[Log_Action]], columns: Optional[Sequence[str]], batch_rows: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    for action in (actions if actions is not None else logged_actions(directory)):
+        path = os.path.join(directory, f"{action.value}.parquet")
+        if not os.path.exists(path):
+            continue
+        parquet_file = pq.ParquetFile(path)
+        present = parquet_file.schema_arrow.names
+        # seq always comes along so events of several actions can be put back in order
+        wanted = None if columns is None else [name for name in present if name == "seq" or name in columns]
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=wanted):
+            df = batch.to_pandas()
+            df.insert(min(1, len(df.columns)), "action", action.value)
+            yield df
+
+
+def _iter_jsonl(path: str, actions: Optional[Sequence[Log_Action]], columns: Optional[Sequence[str]], batch_rows: int) -> Iterator[pd.DataFrame]:
+    wanted_actions = _action_values(actions)
+    # Every line starts with its action, so other actions are skipped without parsing them
+    prefixes = None if wanted_actions is None else tuple(json.dumps({"action": value})[:-1] for value in wanted_actions)
+    keep = None if columns is None else {"seq", "action", *columns}
+
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if prefixes is not None and not line.startswith(prefixes):
+                continue
+            event = json.loads(line)
+            if keep is not None:
+                event = {name: value for name, value in event.items() if name in keep}
+            rows.append(event)
+            if len(rows) >= batch_rows:
+                yield pd.DataFrame(rows)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+def iter_log(path: str, actions: Optional[Sequence[Log_Action]] = None, columns: Optional[Sequence[str]] = None, batch_rows: int = DEFAULT_READ_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Events of a sink's output, at most batch_rows per frame, keeping only actions and columns
+    (seq and action always included). path is a Parquet_sink directory or a Jsonl_sink file.
+    Parquet frames hold one action each; JSON Lines frames follow the file's logging order.
+    """
+    if os.path.isdir(path):
+        return _iter_parquet(path, actions, columns, batch_rows)
+    return _iter_jsonl(path, actions, columns, batch_rows)
+
+
+def read_log(path: str, actions: Optional[Sequence[Log_Action]] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """The events iter_log selects in one frame, ordered by seq."""
+    frames = [df for df in iter_log(path, actions, columns) if len(df)]
+    if not frames:
+        return pd.DataFrame(columns=["seq", "action"])
+    return pd.concat(frames, ignore_index=True).sort_values("seq", kind="stable").reset_index(drop=True)
+
+
+def read_action_frames(path: str, actions: Optional[Sequence[Log_Action]] = None) -> Dict[str, pd.DataFrame]:
+    """One frame per action, keyed by action value like Columnar_log.to_frames, read one action at a time."""
+    if actions is None:
+        actions = logged_actions(path) if os.path.isdir(path) else list(Log_Action)
+    frames = {}
+    for action in actions:
+        df = read_log(path, [action])
+        if len(df):
+            frames[action.value] = df
+    return frames
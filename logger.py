@@ -1,5 +1,12 @@
-from enum import Enum
-import copy
+from abc import ABC, abstractmethod
+from enum import Enum, IntEnum
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from gear_types import Gear_pieces, Gear_rarity, Gear_sets
+from rng import Block_sampler
 
 class Log_Action(Enum) :
     INITIALIZE = "initialize"
@@ -15,7 +22,7 @@ class Log_Action(Enum) :
     ADD_GEAR = "add_gear"
     WIN_CHAPTER = "win_chapter"
     LOSE_CHAPTER = "lose_chapter"
-    ADD_DESIGNS = "add_designs" 
+    ADD_DESIGNS = "add_designs"
     EQUIP_GEAR = "equip_gear"
     DAILY_FREE_GACHA = "daily_free_gacha"
     PURCHASE_OFFER = "purchase_offer"
@@ -23,47 +30,608 @@ class Log_Action(Enum) :
     ERROR = "error"
     SIMULATION_COMPLETED = "simulation_completed"
 
+class Log_level(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    ERROR = 40
+    OFF = 100
+
+# Per-gear bookkeeping is DEBUG; what a run's KPIs and plots are built from is INFO
+ACTION_LEVELS: Dict[Log_Action, Log_level] = {
+    Log_Action.INITIALIZE: Log_level.INFO,
+    Log_Action.SIMULATE: Log_level.INFO,
+    Log_Action.END: Log_level.INFO,
+    Log_Action.PLAYER_ATTACK: Log_level.DEBUG,
+    Log_Action.ENEMY_ATTACK: Log_level.DEBUG,
+    Log_Action.PLAYER_DEFEATED: Log_level.DEBUG,
+    Log_Action.ENEMY_DEFEATED: Log_level.DEBUG,
+    Log_Action.MERGE: Log_level.DEBUG,
+    Log_Action.LEVEL_UP: Log_level.DEBUG,
+    Log_Action.OPEN_GACHA: Log_level.DEBUG,
+    Log_Action.ADD_GEAR: Log_level.DEBUG,
+    Log_Action.WIN_CHAPTER: Log_level.INFO,
+    Log_Action.LOSE_CHAPTER: Log_level.INFO,
+    Log_Action.ADD_DESIGNS: Log_level.DEBUG,
+    Log_Action.EQUIP_GEAR: Log_level.DEBUG,
+    Log_Action.DAILY_FREE_GACHA: Log_level.INFO,
+    Log_Action.PURCHASE_OFFER: Log_level.INFO,
+    Log_Action.SESSION_END: Log_level.INFO,
+    Log_Action.ERROR: Log_level.ERROR,
+    Log_Action.SIMULATION_COMPLETED: Log_level.INFO,
+}
+
+# Messages are formatted from the stored columns only when the log is read
+MESSAGE_TEMPLATES: Dict[Log_Action, str] = {
+    Log_Action.INITIALIZE: "Meta progression initialized",
+    Log_Action.MERGE: "Successfully merged gear of {piece} and {set} to {target_rarity}",
+    Log_Action.LEVEL_UP: "Level up gear of {piece} and {set} and {max_rarity} to level {level} (+{levels_gained})",
+    Log_Action.OPEN_GACHA: "Opened {chests_opened} {chest_name} chests and received {count} gear piece {new_gear_piece}, set {new_gear_set}, rarity {new_gear_rarity}",
+    Log_Action.ADD_GEAR: "Added {count} gear of {piece} and {set} to rarity {rarity}",
+    Log_Action.WIN_CHAPTER: "Chapter {chapter_num} victory: awarded {gold_awarded} gold, {designs_awarded} designs, and opened {gacha_chest_opened} chest",
+    Log_Action.LOSE_CHAPTER: "Chapter {chapter_num} defeat: awarded {gold_awarded} gold, {designs_awarded} designs, and opened {gacha_chest_opened} chest",
+    Log_Action.ADD_DESIGNS: "Added {amount} designs to {piece}",
+    Log_Action.EQUIP_GEAR: "Equipped gear of {piece} with set {set} at level {level}",
+    Log_Action.DAILY_FREE_GACHA: "Daily free gacha: {free_rare_num} rare and {free_epic_num} epic",
+    Log_Action.PURCHASE_OFFER: "Applied offer {offer_name}",
+    Log_Action.SESSION_END: "Chapter {chapter_level} simulation completed, victory: {victory}",
+    Log_Action.ERROR: "Added gear of {piece} and {set} to rarity {rarity}",
+    Log_Action.SIMULATION_COMPLETED: "Simulation completed: reached the last chapter",
+}
+
+# ---------------------------------------------------------------------------
+# Columnar event log: one table per Log_Action with a fixed schema, stored as
+# typed numpy buffers that grow by doubling. Piece, set and rarity are stored
+# as categorical codes; free text (chest and offer names) is dictionary encoded.
+# Gold and design amounts may be fractional when the config's costs are, so they
+# are NUMBER columns: float buffers with NaN for a missing value, read back as
+# ints when whole (Arrow keeps them float, with nulls, for a stable schema).
+# ---------------------------------------------------------------------------
+
+class Column_kind(Enum):
+    INT = "int"
+    FLOAT = "float"
+    NUMBER = "number"
+    BOOL = "bool"
+    PIECE = "piece"
+    SET = "set"
+    RARITY = "rarity"
+    TEXT = "text"
+
+_DTYPES = {
+    Column_kind.INT: np.int64,
+    Column_kind.FLOAT: np.float64,
+    Column_kind.NUMBER: np.float64,
+    Column_kind.BOOL: np.bool_,
+    Column_kind.PIECE: np.int8,
+    Column_kind.SET: np.int8,
+    Column_kind.RARITY: np.int8,
+    Column_kind.TEXT: np.int32,
+}
+
+MISSING_CODE = -1
+
+PIECE_CATEGORIES = [piece.value for piece in Gear_pieces]
+SET_CATEGORIES = [gear_set.value for gear_set in Gear_sets]
+RARITY_CATEGORIES = [str(rarity) for rarity in Gear_rarity]
+
+def _code_map(members, categories: List[str]) -> Dict[Any, int]:
+    """Every accepted spelling of a category (enum member, value, stripped value) to its code."""
+    codes: Dict[Any, int] = {}
+    for code, (member, category) in enumerate(zip(members, categories)):
+        codes[member] = code
+        codes[category] = code
+        codes[category.strip()] = code
+        codes[member.name] = code
+    return codes
+
+_PIECE_CODES = _code_map(list(Gear_pieces), PIECE_CATEGORIES)
+_SET_CODES = _code_map(list(Gear_sets), SET_CATEGORIES)
+_RARITY_CODES = _code_map(list(Gear_rarity), RARITY_CATEGORIES)
+_RARITY_CODES.update({int(rarity): code for code, rarity in enumerate(Gear_rarity)})
+
+@dataclass(frozen=True)
+class Log_column:
+    name: str
+    kind: Column_kind
+
+    @property
+    def dtype(self):
+        return _DTYPES[self.kind]
+
+def _columns(**kinds: Column_kind) -> Tuple[Log_column, ...]:
+    return tuple(Log_column(name, kind) for name, kind in kinds.items())
+
+INT = Column_kind.INT
+FLOAT = Column_kind.FLOAT
+NUMBER = Column_kind.NUMBER
+BOOL = Column_kind.BOOL
+PIECE = Column_kind.PIECE
+SET = Column_kind.SET
+RARITY = Column_kind.RARITY
+TEXT = Column_kind.TEXT
+
+# Columns every event has, taken from the Timer info passed to add_log
+TIME_COLUMNS = _columns(seq=INT, total_time=INT, current_day=INT, session_time=INT)
+
+_PIECE_NAMES = [piece.name.lower() for piece in Gear_pieces if piece != Gear_pieces.DEFAULT]
+
+_CHAPTER_RESULT = _columns(
+    chapter_num=INT, victory=BOOL, player_points=INT, required_points=INT,
+    gold_awarded=NUMBER, designs_awarded=NUMBER, gacha_chest_opened=TEXT,
+)
+
+LOG_SCHEMAS: Dict[Log_Action, Tuple[Log_column, ...]] = {
+    Log_Action.INITIALIZE: _columns(gold=NUMBER, chapter_level=INT, gear_count=INT),
+    Log_Action.SIMULATE: (),
+    Log_Action.END: (),
+    Log_Action.PLAYER_ATTACK: (),
+    Log_Action.ENEMY_ATTACK: (),
+    Log_Action.PLAYER_DEFEATED: (),
+    Log_Action.ENEMY_DEFEATED: (),
+    Log_Action.MERGE: _columns(piece=PIECE, set=SET, target_rarity=RARITY, max_rarity=RARITY, consumed=INT),
+    Log_Action.LEVEL_UP: _columns(
+        level=INT, levels_gained=INT, set=SET, piece=PIECE, max_rarity=RARITY,
+        required_gold=NUMBER, required_designs=NUMBER, required_rarity=RARITY,
+    ),
+    Log_Action.OPEN_GACHA: _columns(
+        chest_name=TEXT, chests_opened=INT, new_gear_piece=PIECE, new_gear_set=SET, new_gear_rarity=RARITY, count=INT,
+    ),
+    Log_Action.ADD_GEAR: _columns(piece=PIECE, set=SET, rarity=RARITY, count=INT),
+    Log_Action.WIN_CHAPTER: _CHAPTER_RESULT,
+    Log_Action.LOSE_CHAPTER: _CHAPTER_RESULT,
+    Log_Action.ADD_DESIGNS: _columns(piece=PIECE, amount=NUMBER, total_designs=NUMBER),
+    Log_Action.EQUIP_GEAR: _columns(piece=PIECE, set=SET, level=INT),
+    Log_Action.DAILY_FREE_GACHA: _columns(free_rare_num=INT, free_epic_num=INT),
+    Log_Action.PURCHASE_OFFER: _columns(
+        offer_name=TEXT, rare_chests_opened=INT, epic_chests_opened=INT, gold_added=NUMBER, designs_added=NUMBER,
+    ),
+    Log_Action.SESSION_END: _columns(
+        chapter_level=INT, victory=BOOL, current_day=INT, current_day_session=INT, current_session=INT, current_coins=NUMBER,
+    )
+        + tuple(Log_column(f"{piece}_designs", NUMBER) for piece in _PIECE_NAMES)
+        + tuple(Log_column(f"{piece}_gear_level", INT) for piece in _PIECE_NAMES)
+        + tuple(Log_column(f"{piece}_gear_rarity", RARITY) for piece in _PIECE_NAMES),
+    Log_Action.ERROR: _columns(piece=PIECE, set=SET, rarity=RARITY),
+    Log_Action.SIMULATION_COMPLETED: _columns(
+        rounds_done=INT, current_day=INT, current_day_session=INT, current_session=INT, chapter_level=INT,
+    ),
+}
+
+INITIAL_CAPACITY = 256
+# Events a Sim_logger with a sink holds before flushing them
+DEFAULT_FLUSH_ROWS = 8192
+
+
+def _number_values(values: np.ndarray) -> np.ndarray:
+    """A NUMBER column as int64 when every value is present and whole, as the float buffer otherwise."""
+    if np.all(np.isfinite(values)) and np.all(values == np.floor(values)):
+        return values.astype(np.int64)
+    return values
+
+
+class Log_table:
+    """The events of one action: one typed buffer per column; messages are only kept when given explicitly."""
+
+    def __init__(self, action: Log_Action, capacity: int = INITIAL_CAPACITY):
+        self.action = action
+        self.payload_columns = LOG_SCHEMAS[action]
+        # SESSION_END carries its own current_day in the payload; the time column keeps the Timer's.
+        time_names = {c.name for c in TIME_COLUMNS}
+        self.columns = TIME_COLUMNS + tuple(column for column in self.payload_columns if column.name not in time_names)
+        # Payload columns written from the payload; a payload current_day is left to the Timer's
+        self._payload_writes = tuple(column for column in self.payload_columns if column.name not in time_names)
+        self.size = 0
+        self.buffers: Dict[str, np.ndarray] = {
+            column.name: np.zeros(capacity, dtype=column.dtype) for column in self.columns
+        }
+        self.explicit_messages: Dict[int, str] = {}
+        self.text_categories: Dict[str, List[str]] = {
+            column.name: [] for column in self.columns if column.kind == Column_kind.TEXT
+        }
+        self._text_codes: Dict[str, Dict[str, int]] = {name: {} for name in self.text_categories}
+
+    def _grow(self) -> None:
+        for name, buffer in self.buffers.items():
+            grown = np.zeros(len(buffer) * 2, dtype=buffer.dtype)
+            grown[:self.size] = buffer[:self.size]
+            self.buffers[name] = grown
+
+    def _encode(self, column: Log_column, value: Any) -> Any:
+        kind = column.kind
+        if value is None:
+            if kind == NUMBER:
+                return np.nan
+            return MISSING_CODE if kind in (PIECE, SET, RARITY, TEXT) else 0
+        if kind == INT:
+            return int(value)
+        if kind == NUMBER:
+            return float(value)
+        if kind == FLOAT:
+            return float(value)
+        if kind == BOOL:
+            return bool(value)
+        if kind == PIECE:
+            return _PIECE_CODES.get(value, MISSING_CODE)
+        if kind == SET:
+            return _SET_CODES.get(value, MISSING_CODE)
+        if kind == RARITY:
+            if isinstance(value, str):
+                value = value.strip().lower()
+            return _RARITY_CODES.get(value, MISSING_CODE)
+        codes = self._text_codes[column.name]
+        text = str(value)
+        code = codes.get(text)
+        if code is None:
+            code = codes[text] = len(codes)
+            self.text_categories[column.name].append(text)
+        return code
+
+    def append(self, seq: int, time: Dict[str, int], message: Optional[str], payload: Dict[str, Any]) -> None:
+        if self.size == len(self.buffers["seq"]):
+            self._grow()
+        row = self.size
+        buffers = self.buffers
+
+        buffers["seq"][row] = seq
+        buffers["total_time"][row] = time.get("total_time", 0)
+        buffers["current_day"][row] = time.get("current_day", 0)
+        buffers["session_time"][row] = time.get("session_time", 0)
+
+        for column in self._payload_writes:
+            buffers[column.name][row] = self._encode(column, payload.get(column.name))
+
+        if message is not None:
+            self.explicit_messages[row] = message
+        self.size += 1
+
+    def categories(self, column: Log_column) -> List[str]:
+        if column.kind == PIECE:
+            return PIECE_CATEGORIES
+        if column.kind == SET:
+            return SET_CATEGORIES
+        if column.kind == RARITY:
+            return RARITY_CATEGORIES
+        return self.text_categories[column.name]
+
+    def column_values(self, name: str) -> np.ndarray:
+        """Raw buffer of a column (codes for categorical columns), without copying."""
+        return self.buffers[name][:self.size]
+
+    def to_frame(self, include_messages: bool = True):
+        """pandas DataFrame of the table; numeric columns are views of the buffers, except NUMBER columns read back as ints."""
+        import pandas as pd
+
+        data = {}
+        for column in self.columns:
+            values = self.column_values(column.name)
+            if column.kind in (PIECE, SET, RARITY, TEXT):
+                data[column.name] = pd.Categorical.from_codes(values, categories=pd.Index(self.categories(column), dtype=object), validate=False)
+            elif column.kind == NUMBER:
+                data[column.name] = _number_values(values)
+            else:
+                data[column.name] = values
+        df = pd.DataFrame(data, copy=False)
+        df.insert(1, "action", self.action.value)
+        if include_messages:
+            df["message"] = self.messages
+        return df
+
+    def to_arrow(self, include_messages: bool = True):
+        """pyarrow Table of the table; numeric columns wrap the buffers without copying."""
+        import pyarrow as pa
+
+        arrays = {}
+        for column in self.columns:
+            values = self.column_values(column.name)
+            if column.kind in (PIECE, SET, RARITY, TEXT):
+                arrays[column.name] = pa.DictionaryArray.from_arrays(
+                    pa.array(values, mask=values == MISSING_CODE),
+                    pa.array(self.categories(column), type=pa.string()),
+                )
+            elif column.kind == NUMBER:
+                # Always float, so every batch a Parquet_sink appends has the same schema
+                arrays[column.name] = pa.array(values, mask=np.isnan(values))
+            else:
+                arrays[column.name] = pa.array(values)
+        if include_messages:
+            arrays["message"] = pa.array(self.messages, type=pa.string())
+        return pa.table(arrays)
+
+    def decoded_columns(self) -> Dict[str, List[Any]]:
+        decoded = {}
+        for column in self.columns:
+            values = self.column_values(column.name).tolist()
+            if column.kind in (PIECE, SET, RARITY, TEXT):
+                categories = self.categories(column)
+                values = [categories[code] if code != MISSING_CODE else None for code in values]
+            elif column.kind == NUMBER:
+                values = [None if value != value else int(value) if value.is_integer() else value for value in values]
+            decoded[column.name] = values
+        return decoded
+
+    @property
+    def messages(self) -> List[str]:
+        """Message of every row, formatted from the action's template unless one was given explicitly."""
+        if len(self.explicit_messages) == self.size:
+            return [self.explicit_messages[row] for row in range(self.size)]
+
+        template = MESSAGE_TEMPLATES.get(self.action, self.action.value)
+        decoded = self.decoded_columns()
+        return [
+            self.explicit_messages[row] if row in self.explicit_messages
+            else template.format_map({name: values[row] for name, values in decoded.items()})
+            for row in range(self.size)
+        ]
+
+    def decoded_rows(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """(seq, legacy log dict) for every row, with categorical codes turned back into strings."""
+        decoded = self.decoded_columns()
+        messages = self.messages
+
+        rows = []
+        for row in range(self.size):
+            rows.append((decoded["seq"][row], {
+                "action": self.action.value,
+                "time": {
+                    "total_time": decoded["total_time"][row],
+                    "current_day": decoded["current_day"][row],
+                    "session_time": decoded["session_time"][row],
+                },
+                "message": messages[row],
+                "payload": {column.name: decoded[column.name][row] for column in self.payload_columns},
+            }))
+        return rows
+
+
+class Columnar_log:
+    """All events of a run, one Log_table per action, ordered globally by seq."""
+
+    def __init__(self):
+        self.tables: Dict[Log_Action, Log_table] = {}
+        self.seq = 0
+
+    def append(self, action: Log_Action, time: Dict[str, int], message: Optional[str], payload: Dict[str, Any]) -> None:
+        table = self.tables.get(action)
+        if table is None:
+            table = self.tables[action] = Log_table(action)
+        table.append(self.seq, time or {}, message, payload or {})
+        self.seq += 1
+
+    def __len__(self) -> int:
+        return self.seq
+
+    def table(self, action: Log_Action) -> Log_table:
+        """The table of action, empty if no event of that action was logged."""
+        return self.tables.get(action) or Log_table(action, capacity=1)
+
+    def to_frame(self, action: Log_Action, include_messages: bool = True):
+        return self.table(action).to_frame(include_messages)
+
+    def to_frames(self, include_messages: bool = True):
+        return {action: table.to_frame(include_messages) for action, table in self.tables.items()}
+
+    def to_combined_frame(self, actions: Optional[List[Log_Action]] = None, include_messages: bool = True):
+        """Events of several actions in one frame, ordered by seq; columns are the union of the schemas."""
+        import pandas as pd
+
+        frames = [
+            table.to_frame(include_messages)
+            for action, table in self.tables.items()
+            if (actions is None or action in actions) and table.size
+        ]
+        if not frames:
+            return pd.DataFrame(columns=[column.name for column in TIME_COLUMNS] + ["action"])
+        return pd.concat(frames, ignore_index=True).sort_values("seq", kind="stable").reset_index(drop=True)
+
+    def to_arrow(self, action: Log_Action, include_messages: bool = True):
+        return self.table(action).to_arrow(include_messages)
+
+    def to_parquet(self, directory: str, include_messages: bool = True) -> Dict[Log_Action, str]:
+        """Write one <action>.parquet file per logged action into directory; returns the paths."""
+        import os
+        import pyarrow.parquet as pq
+
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for action, table in self.tables.items():
+            path = os.path.join(directory, f"{action.value}.parquet")
+            pq.write_table(table.to_arrow(include_messages), path)
+            paths[action] = path
+        return paths
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Events as the legacy list of {action, time, message, payload} dicts, in logging order."""
+        rows = [row for table in self.tables.values() for row in table.decoded_rows()]
+        rows.sort(key=lambda row: row[0])
+        return [log for _, log in rows]
+
+    def drain(self) -> Dict[Log_Action, Log_table]:
+        """Hand over the tables logged so far and start empty ones; seq keeps counting across drains."""
+        tables = self.tables
+        self.tables = {}
+        return tables
+
+
+class Log_sink(ABC):
+    """
+    Destination a Sim_logger flushes its events to in batches, so a run's log never has to fit in memory.
+    write receives the tables of one batch, each holding that batch's events of one action.
+    """
+
+    @abstractmethod
+    def write(self, tables: Dict[Log_Action, Log_table]) -> None:
+        """Persist one batch of events."""
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass(frozen=True)
+class Log_settings:
+    """
+    What gets logged: actions below level or outside actions are dropped before their payload is built.
+    sample_rates keeps only that fraction of the events of chatty actions, drawn from a stream seeded by seed,
+    or from the run's own log sampling stream when seed is None, so a seeded run samples the same events every time.
+    """
+    level: Log_level = Log_level.DEBUG
+    actions: Optional[FrozenSet[Log_Action]] = None
+    sample_rates: Dict[Log_Action, float] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+    def enabled_actions(self) -> FrozenSet[Log_Action]:
+        return frozenset(
+            action for action in Log_Action
+            if ACTION_LEVELS[action] >= self.level and (self.actions is None or action in self.actions)
+        )
+
+# Enough for batch KPIs and the app's progression plots
+KPI_ACTIONS = frozenset({Log_Action.WIN_CHAPTER, Log_Action.LOSE_CHAPTER, Log_Action.SESSION_END, Log_Action.SIMULATION_COMPLETED})
+
+
+class Sim_logger:
+    """
+    The event log of one simulation, with its own settings and sampling stream.
+    Every model owns one and hands it to its components, so simulations running side by side never share a log.
+    """
+
+    def __init__(self, settings: Optional[Log_settings] = None, sink: Optional[Log_sink] = None, flush_rows: int = DEFAULT_FLUSH_ROWS):
+        """
+        With a sink, events are flushed to it every flush_rows events and only the unflushed ones stay in log;
+        call close() after the run to flush the rest and finish the sink.
+        """
+        self.log = Columnar_log()
+        self.sink = sink
+        self.flush_rows = flush_rows
+        self._buffered = 0
+        self._run_sampler: Optional[Block_sampler] = None
+        self.configure(settings or Log_settings())
+
+    def configure(self, settings: Log_settings) -> Optional[Log_settings]:
+        """Apply settings to every following log call; returns the previous settings so they can be restored."""
+        previous = getattr(self, "settings", None)
+        self.settings = settings
+        self._enabled = settings.enabled_actions()
+        self._sample_rates = {action: rate for action, rate in settings.sample_rates.items() if rate < 1}
+        if settings.seed is None and self._run_sampler is not None:
+            self._sampler = self._run_sampler
+        else:
+            self._sampler = Block_sampler(np.random.default_rng(settings.seed))
+        return previous
+
+    def use_run_sampler(self, sampler: Block_sampler) -> None:
+        """Draw sampling decisions from a run's seeded stream whenever the settings give no seed of their own."""
+        self._run_sampler = sampler
+        if self.settings.seed is None:
+            self._sampler = sampler
+
+    def should_log(self, action: Log_Action) -> bool:
+        """
+        Whether to record this event. Call sites check it before building the payload,
+        so a disabled or sampled-out event costs one set lookup (and one draw when sampled).
+        """
+        if action not in self._enabled:
+            return False
+        rate = self._sample_rates.get(action)
+        return rate is None or self._sampler.random() < rate
+
+    def add_log(self, action: Log_Action, time, message: Optional[str] = None, payload: Optional[dict] = None):
+        # Masked actions are dropped here as well; sampling only applies through should_log.
+        # The payload is read into typed columns right away, so callers' objects are never kept or copied
+        if action in self._enabled:
+            self.log.append(action, time, message, payload)
+            if self.sink is not None:
+                self._buffered += 1
+                if self._buffered >= self.flush_rows:
+                    self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered events to the sink and drop them from memory."""
+        if self.sink is not None and self._buffered:
+            self.sink.write(self.log.drain())
+            self._buffered = 0
+
+    def close(self) -> None:
+        """Flush the remaining events and close the sink."""
+        if self.sink is not None:
+            self.flush()
+            self.sink.close()
+
+    def get_logs(self):
+        return self.log.to_records()
+
+    def get_event_log(self) -> Columnar_log:
+        return self.log
+
+    def get_action_frame(self, action: Log_Action):
+        return self.log.to_frame(action)
+
+    def clear_logs(self):
+        self.log = Columnar_log()
+        self._buffered = 0
+
+    def get_logs_as_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.get_logs())
+
+    def has_logs(self):
+        return len(self.log) > 0
+
+    def get_flattened_logs_df(self):
+        """All events in one flat frame, one column per schema field."""
+        return self.log.to_combined_frame()
+
+
 class Logger:
-    _logs = []
+    """
+    Compatibility shim over one process-wide Sim_logger, used by models built without their own logger.
+    Concurrent simulations should each pass a Sim_logger to model.initialize instead.
+    """
+    _default = Sim_logger()
 
     @classmethod
-    def add_log(cls, action: Log_Action, time, message: str, payload: dict):
-        log_entry = {
-            "action": action.value,
-            "time": time,
-            "message": message,
-            "payload": copy.deepcopy(payload) if payload else {},
-        }
-        cls._logs.append(log_entry)
+    def default(cls) -> Sim_logger:
+        return cls._default
+
+    @classmethod
+    def configure(cls, settings: Log_settings) -> Log_settings:
+        return cls._default.configure(settings)
+
+    @classmethod
+    def get_settings(cls) -> Log_settings:
+        return cls._default.settings
+
+    @classmethod
+    def should_log(cls, action: Log_Action) -> bool:
+        return cls._default.should_log(action)
+
+    @classmethod
+    def add_log(cls, action: Log_Action, time, message: Optional[str] = None, payload: Optional[dict] = None):
+        cls._default.add_log(action, time, message, payload)
 
     @classmethod
     def get_logs(cls):
-        return cls._logs
+        return cls._default.get_logs()
+
+    @classmethod
+    def get_event_log(cls) -> Columnar_log:
+        return cls._default.get_event_log()
+
+    @classmethod
+    def get_action_frame(cls, action: Log_Action):
+        return cls._default.get_action_frame(action)
 
     @classmethod
     def clear_logs(cls):
-        cls._logs = []
+        cls._default.clear_logs()
 
     @classmethod
     def get_logs_as_dataframe(cls):
-        import pandas as pd
-        return pd.DataFrame(cls._logs)
+        return cls._default.get_logs_as_dataframe()
 
     @classmethod
     def has_logs(cls):
-        return len(cls._logs) > 0
-    
+        return cls._default.has_logs()
+
     @classmethod
     def get_flattened_logs_df(cls):
-        import pandas as pd
-        raw_logs = cls.get_logs_as_dataframe().to_dict(orient="records")
-
-        flattened_df = pd.json_normalize(
-            raw_logs,
-            sep="."  # aplanar tots els nivells amb noms com 'payload.player_character.hp'
-        )
-
-        if "payload" in flattened_df.columns:
-            flattened_df = flattened_df.drop(columns=["payload"])
-
-        return flattened_df
\ No newline at end of file
+        return cls._default.get_flattened_logs_df()
@@ -1,60 +1,17 @@
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Any, Optional
-import random
-import pandas as pd
-import config_import as config_import
+import bisect
+from array import array
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from config_import import ConfigKeys, Config
-from enum import Enum, IntEnum
-
-from logger import Logger, Log_Action
-
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-
-class Gear_sets(Enum):
-    COLLECTOR = "collector_set"
-    DEFENDER = "defender_set"
-    ROGUE = "rogue_set"
-    TACTICIAN = "tactician_set"
-    WARRIOR = "warrior_set"
-    DEFAULT = "default_set"
-
-class Gear_pieces(Enum):
-    WEAPON = "weapon    "
-    RING = "ring"
-    GLOVES = "gloves"
-    HELMET = "helmet"
-    ARMOR = "armor"
-    BOOTS = "boots"
-    DEFAULT = "default"
-
-class Gear_rarity(IntEnum):
-    COMMON = 1
-    UNCOMMON = 2
-    RARE = 3
-    EPIC = 4
-    MYTHICAL = 5
-    LEGENDARY = 6
-
-    def __str__(self):
-        return self.name.lower()
-    
-    @staticmethod
-    def parse(value: "Gear_rarity | str | int") -> "Gear_rarity":
-        """Accepta enum, string ('common') o int (1-6) i retorna Gear_rarity."""
-        if isinstance(value, Gear_rarity):
-            return value
-        if isinstance(value, (int, float)):
-            return Gear_rarity(int(value))
-        if isinstance(value, str):
-            return Gear_rarity[value.strip().upper()]
-        raise ValueError(f"Unknown rarity value: {value}")
-    
-@dataclass
-class MergeRequirement:
-    piece_requirement: Gear_pieces           
-    rarity_requirement: Gear_rarity      
-    set_requirement: Gear_sets 
+from compiled_config import CompiledConfig, Gear_slot, Chest_table, Chapter_table, Offer, Player_profile
+
+from gear_types import Gear_sets, Gear_pieces, Gear_rarity, GEAR_PIECES, GEAR_SETS, PIECE_INDEX, RARITY_SLOTS, SET_INDEX
+from logger import Logger, Log_Action, Log_level, Log_settings, Sim_logger
+from profiler import Sim_profiler
+from kpi_aggregator import Kpi_aggregator
+from rng import Block_sampler, Sim_rng, SeedLike
+from checkpoint import Model_checkpoint
 
 @dataclass
 class Timer:
@@ -112,172 +69,259 @@ class Timer:
         self.session_time = 0
         return    
 
-@dataclass
-class Gear:
-    level: int
-    set: Gear_sets
-    piece: Gear_pieces
-    max_rarity: Gear_rarity
-    rarity_list: Dict[Gear_rarity, int]
-    merge_rules: Dict[Gear_rarity, List[MergeRequirement]]
-    level_up_rules: pd.DataFrame
+N_GEAR_PIECES = len(GEAR_PIECES)
+
+
+@dataclass(slots=True)
+class Gear_inventory:
+    """
+    Every gear of the player as flat arrays indexed by gear slot; the gears themselves (Gear_slot) and their
+    rules are shared by every player of the config. rarity_counts[slot * RARITY_SLOTS + rarity] is the
+    per-(set, piece, rarity) count, piece_rarity_counts[gear.piece_index * RARITY_SLOTS + rarity] totals it over sets.
+    Rarity counts only change through add and remove, which keep both in step; they are int32 arrays, the bulk
+    of the state, the rest are lists. max_rarity is updated by merges only, as it always was.
+    """
+    gears: Tuple[Gear_slot, ...]
+    level: List[int]
+    max_rarity: List[Gear_rarity]
+    rarity_counts: array
+    piece_rarity_counts: array
     time: Timer
+    logger: Sim_logger
 
     @staticmethod
-    def initialize(gear_set: Gear_sets, gear_piece: Gear_pieces, gear_levels_df: pd.DataFrame, gear_merge_df: pd.DataFrame, time: Timer) -> 'Gear':
-
-        level = 0
-        set = gear_set
-        piece = gear_piece
-        max_rarity = Gear_rarity.COMMON
-        rarity_list = {rarity: 0 for rarity in Gear_rarity}
-        merge_rules = {}
-        level_up_rules = {}
-        level_up_rules = gear_levels_df
-
-        new_gear = Gear(
-            level=level,
-            set=set,
-            piece=piece,
-            max_rarity=max_rarity,
-            rarity_list=rarity_list,
-            merge_rules=merge_rules,
-            level_up_rules=level_up_rules,
-            time=time
+    def initialize(gears: Tuple[Gear_slot, ...], time: Timer, logger: Sim_logger) -> 'Gear_inventory':
+        return Gear_inventory(
+            gears=gears,
+            level=[0] * len(gears),
+            max_rarity=[Gear_rarity.COMMON] * len(gears),
+            rarity_counts=array("i", bytes(4 * len(gears) * RARITY_SLOTS)),
+            # A DEFAULT row too, always empty, so requirements on any piece index it
+            piece_rarity_counts=array("i", bytes(4 * len(Gear_pieces) * RARITY_SLOTS)),
+            time=time,
+            logger=logger,
         )
-        new_gear.merge_rules = new_gear.set_merge_rules(gear_merge_df)
-
-        return new_gear
-
-    def set_merge_rules(self, gear_merge_df: pd.DataFrame) -> Dict[Gear_rarity, List[MergeRequirement]]:
-        rules: Dict[Gear_rarity, List[MergeRequirement]] = {}
-
-        for _, row in gear_merge_df.iterrows():
-            target_rarity = Gear_rarity[row[ConfigKeys.TARGET_RARITY.value].upper()]
-            requirements: List[MergeRequirement] = []
 
-            for i in range(1, 4):
-                rarity_key = f"req{i}_rarity"
-                piece_key = f"req{i}_piece"
-                set_key = f"req{i}_set"
-
-                if pd.isna(row[rarity_key]) or row[rarity_key] == "":
-                    # Skip if rarity is NaN or empty, thus, if the is no requirement
-                    continue
-
-                piece_requirement = self.piece if row[piece_key] == "SAME_PIECE" else Gear_pieces.DEFAULT
-                set_requirement = self.set if row[set_key] == "SAME_SET" else Gear_sets.DEFAULT
-
-                requirements.append(MergeRequirement(
-                    piece_requirement=piece_requirement,
-                    rarity_requirement=Gear_rarity[row[rarity_key].upper()],
-                    set_requirement=set_requirement
-                ))
-
-            rules[target_rarity] = requirements
-
-        return rules
-
-    def merge(self, target_rarity: Gear_rarity, gear_inventory: List['Gear']) -> bool:
+    def __iter__(self):
+        return iter(self.gears)
+
+    def __len__(self) -> int:
+        return len(self.gears)
+
+    def get(self, piece: Gear_pieces, gear_set: Gear_sets) -> Optional[Gear_slot]:
+        if piece == Gear_pieces.DEFAULT or gear_set == Gear_sets.DEFAULT:
+            return None
+        return self.gears[SET_INDEX[gear_set] * N_GEAR_PIECES + PIECE_INDEX[piece]]
+
+    def pieces(self, piece: Gear_pieces) -> Tuple[Gear_slot, ...]:
+        """Gears of one piece, in inventory order."""
+        return self.gears[PIECE_INDEX[piece]::N_GEAR_PIECES]
+
+    def count(self, gear: Gear_slot, rarity: Gear_rarity) -> int:
+        return self.rarity_counts[gear.slot * RARITY_SLOTS + rarity]
+
+    def find(self, piece: Gear_pieces, rarity: Gear_rarity, gear_set: Gear_sets) -> Optional[Gear_slot]:
+        """First gear of piece holding rarity, of gear_set unless that is DEFAULT (any set)."""
+        piece_index = PIECE_INDEX[piece]
+        if self.piece_rarity_counts[piece_index * RARITY_SLOTS + rarity] <= 0:
+            return None
+        counts = self.rarity_counts
+        if gear_set != Gear_sets.DEFAULT:
+            gear = self.gears[SET_INDEX[gear_set] * N_GEAR_PIECES + piece_index]
+            return gear if counts[gear.slot * RARITY_SLOTS + rarity] > 0 else None
+        return next(gear for gear in self.gears[piece_index::N_GEAR_PIECES] if counts[gear.slot * RARITY_SLOTS + rarity] > 0)
+
+    def add(self, gear: Gear_slot, rarity: Gear_rarity, count: int = 1) -> None:
+        self.rarity_counts[gear.slot * RARITY_SLOTS + rarity] += count
+        self.piece_rarity_counts[gear.piece_index * RARITY_SLOTS + rarity] += count
+
+    def remove(self, gear: Gear_slot, rarity: Gear_rarity, count: int = 1) -> None:
+        self.rarity_counts[gear.slot * RARITY_SLOTS + rarity] -= count
+        self.piece_rarity_counts[gear.piece_index * RARITY_SLOTS + rarity] -= count
+
+    def highest_owned_rarity(self, gear: Gear_slot) -> int:
+        """Highest rarity of gear with a count above 0, 0 when nothing is owned."""
+        counts = self.rarity_counts
+        base = gear.slot * RARITY_SLOTS
+        for rarity in range(RARITY_SLOTS - 1, 0, -1):
+            if counts[base + rarity] > 0:
+                return rarity
+        return 0
+
+    def merge(self, gear: Gear_slot, target_rarity: Gear_rarity) -> bool:
 
         # Keep track of affected rarity requirements to restore if merge fails
         affected_requirements = []
 
         # Iterate through the merge requirements for the target rarity
-        for requirement in self.merge_rules[target_rarity]:
+        for requirement in gear.merge_rules[target_rarity]:
             # Check if the required gear exists in the inventory
-            matching_gear = next(
-            (gear for gear in gear_inventory
-             if gear.piece == requirement.piece_requirement
-             and gear.rarity_list.get(requirement.rarity_requirement, 0) > 0
-             and (gear.set == requirement.set_requirement or requirement.set_requirement == Gear_sets.DEFAULT)),
-            None
-            )
+            matching_gear = self.find(requirement.piece_requirement, requirement.rarity_requirement, requirement.set_requirement)
 
             # If no matching gear is found, restore the affected requirements and return False
-            if not matching_gear:
-                for gear, rarity in affected_requirements:
-                    gear.rarity_list[rarity] += 1
+            if matching_gear is None:
+                for consumed_gear, rarity in affected_requirements:
+                    self.add(consumed_gear, rarity)
                 return False
 
             # If there is a matching, Decrease the count of the matching gear's rarity, and store it in case we need to restore
-            matching_gear.rarity_list[requirement.rarity_requirement] -= 1
+            self.remove(matching_gear, requirement.rarity_requirement)
             affected_requirements.append((matching_gear, requirement.rarity_requirement))
 
         # If all requirements are met, add the gear
         # Increase the count of the target rarity in the rarity list
-        self.rarity_list[target_rarity] += 1
+        self.add(gear, target_rarity)
 
         # Update the max_rarity based on the highest rarity with a count greater than 0
-        self.max_rarity = max(
-            (rarity for rarity, count in self.rarity_list.items() if count > 0),
-            default=Gear_rarity.COMMON
-        )
+        highest = self.highest_owned_rarity(gear)
+        self.max_rarity[gear.slot] = Gear_rarity(highest) if highest else Gear_rarity.COMMON
 
-        Logger.add_log(
-            Log_Action.MERGE,
-            self.time.get_timer_info(),   
-            f"Successfully merged gear of {self.piece.value} and {self.set.value} to {target_rarity}",
-            {
-                "piece": self.piece.value,
-                "set": self.set.value,
-                "target_rarity": str(target_rarity),
-                "max_rarity": str(self.max_rarity),
-                "rarity_list": {str(rarity): count for rarity, count in self.rarity_list.items()},
-                "affected_requirements": [(gear.piece.value, str(rarity)) for gear, rarity in affected_requirements]
-            }
-        )
+        if self.logger.should_log(Log_Action.MERGE):
+            self.logger.add_log(
+                Log_Action.MERGE,
+                self.time.get_timer_info(),
+                payload={
+                    "piece": gear.piece,
+                    "set": gear.set,
+                    "target_rarity": target_rarity,
+                    "max_rarity": self.max_rarity[gear.slot],
+                    "consumed": len(affected_requirements)
+                }
+            )
 
         return True
 
-    def level_up(self, meta_progression) -> bool:
+    def next_level_cost(self, gear: Gear_slot) -> Optional[Tuple[Any, Any]]:
+        """(gold, designs) the next level of gear costs, None when it is maxed or its owned rarity blocks it."""
+        rules = gear.level_up_rules
+        next_level = self.level[gear.slot] + 1
+        if next_level > rules.max_level or rules.required_rarity[next_level] > self.highest_owned_rarity(gear):
+            return None
+        return rules.gold_cost[next_level], rules.design_cost[next_level]
+
+    def can_merge(self, gear: Gear_slot, target_rarity: Gear_rarity) -> bool:
+        """Whether merge would succeed right now; the inventory is left as it was."""
+        consumed = []
+        try:
+            for requirement in gear.merge_rules[target_rarity]:
+                matching_gear = self.find(requirement.piece_requirement, requirement.rarity_requirement, requirement.set_requirement)
+                if matching_gear is None:
+                    return False
+                self.remove(matching_gear, requirement.rarity_requirement)
+                consumed.append((matching_gear, requirement.rarity_requirement))
+            return True
+        finally:
+            for consumed_gear, rarity in consumed:
+                self.add(consumed_gear, rarity)
+
+    def level_up(self, gear: Gear_slot, meta_progression) -> bool:
+        """
+        Climb gear as many levels as gold, designs and owned rarity allow, as one update.
+        Costs are non-negative, so the level-by-level climb stops at the highest level whose cumulative cost
+        is affordable and that no rarity requirement blocks; that level is found by binary search.
+        """
+        rules = gear.level_up_rules
+        if not rules.closed_form:
+            return self.level_up_stepwise(gear, meta_progression)
+
+        start_level = self.level[gear.slot]
+        if start_level >= rules.max_level:
+            return False
+
+        rarity_cap = rules.blocked_after[self.highest_owned_rarity(gear)][start_level] - 1
+        if rarity_cap <= start_level:
+            return False
+
+        piece_index = gear.piece_index
+        gold = meta_progression.gold
+        designs = meta_progression.designs[piece_index]
+        cumulative_gold = rules.cumulative_gold
+        cumulative_designs = rules.cumulative_designs
+        spent_gold = cumulative_gold[start_level]
+        spent_designs = cumulative_designs[start_level]
+
+        # Most calls cannot afford a single level: settle those without searching
+        if cumulative_gold[start_level + 1] - spent_gold > gold or cumulative_designs[start_level + 1] - spent_designs > designs:
+            return False
+
+        new_level = min(
+            rarity_cap,
+            bisect.bisect_right(cumulative_gold, spent_gold + gold, start_level, rarity_cap + 1) - 1,
+            bisect.bisect_right(cumulative_designs, spent_designs + designs, start_level, rarity_cap + 1) - 1,
+        )
+
+        required_gold = cumulative_gold[new_level] - spent_gold
+        required_designs = cumulative_designs[new_level] - spent_designs
+        meta_progression.gold -= required_gold
+        meta_progression.designs[piece_index] -= required_designs
+        self.level[gear.slot] = new_level
+
+        if self.logger.should_log(Log_Action.LEVEL_UP):
+            self.logger.add_log(
+                Log_Action.LEVEL_UP,
+                self.time.get_timer_info(),
+                payload={
+                    "level": new_level,
+                    "levels_gained": new_level - start_level,
+                    "set": gear.set,
+                    "piece": gear.piece,
+                    "max_rarity": self.max_rarity[gear.slot],
+                    "required_gold": required_gold,
+                    "required_designs": required_designs,
+                    "required_rarity": int(rules.required_rarity[start_level + 1:new_level + 1].max())
+                }
+            )
+
+        # Like the level-by-level climb, it ends on a level it cannot take
+        return False
+
+    def level_up_stepwise(self, gear: Gear_slot, meta_progression) -> bool:
+        """Level-by-level climb, one LEVEL_UP event per level; used when costs rule out the closed form."""
 
         successful_level_up = True
+        rules = gear.level_up_rules
+        piece_index = gear.piece_index
 
         while (successful_level_up):
 
-            expected_level = self.level + 1
-            # Trobar la fila de configuració per a aquest nivell via l’índex
-            if expected_level not in self.level_up_rules.index:
+            expected_level = self.level[gear.slot] + 1
+            # No more levels in the config
+            if expected_level > rules.max_level:
                 successful_level_up = False
                 break
 
-            row_level = self.level_up_rules.loc[expected_level]
-
-            required_gold = row_level[ConfigKeys.GOLD_COST.value]
-            required_designs = row_level[ConfigKeys.DESIGN_COST.value]
-            required_rarity = row_level[ConfigKeys.REQUIRED_RARITY.value]
+            required_gold = rules.gold_cost[expected_level]
+            required_designs = rules.design_cost[expected_level]
+            required_rarity = Gear_rarity(rules.required_rarity[expected_level])
 
-            has_required_rarity = any(
-                rarity >= required_rarity and count > 0 
-                for rarity, count in self.rarity_list.items()
-            )
+            has_required_rarity = self.highest_owned_rarity(gear) >= required_rarity
 
             if (
                 meta_progression.gold >= required_gold and
-                meta_progression.designs[self.piece] >= required_designs and
+                meta_progression.designs[piece_index] >= required_designs and
                 has_required_rarity
             ):
                 # Deduct the required resources
                 meta_progression.gold -= required_gold
-                meta_progression.designs[self.piece] -= required_designs
+                meta_progression.designs[piece_index] -= required_designs
 
                 # Level up the gear
-                self.level = expected_level
-                Logger.add_log(
-                    Log_Action.LEVEL_UP,
-                    self.time.get_timer_info(),
-                    f"Level up gear of {self.piece.value} and {self.set.value} and {self.max_rarity} to level {expected_level}",
-                    {
-                    "level": self.level,
-                    "set": self.set.value,
-                    "piece": self.piece.value,
-                    "max_rarity": str(self.max_rarity),
-                    "required_gold": required_gold,
-                    "required_designs": required_designs,
-                    "required_rarity": required_rarity
-                    }
-                )
+                self.level[gear.slot] = expected_level
+                if self.logger.should_log(Log_Action.LEVEL_UP):
+                    self.logger.add_log(
+                        Log_Action.LEVEL_UP,
+                        self.time.get_timer_info(),
+                        payload={
+                        "level": expected_level,
+                        "levels_gained": 1,
+                        "set": gear.set,
+                        "piece": gear.piece,
+                        "max_rarity": self.max_rarity[gear.slot],
+                        "required_gold": required_gold,
+                        "required_designs": required_designs,
+                        "required_rarity": required_rarity
+                        }
+                    )
             else:
                 successful_level_up = False
 
@@ -288,31 +332,30 @@ class Gear:
 class Player_meta_progression:
     
     gold: int
-    gear_inventory: List[Gear]
-    designs: Dict[Gear_pieces, int]
-    equipped_gear: Dict[Gear_pieces, Gear]
+    gear_inventory: Gear_inventory
+    # Indexed by PIECE_INDEX: designs over Gear_pieces (DEFAULT last, never awarded), equipped_gear over GEAR_PIECES
+    designs: List[int]
+    equipped_gear: List[Optional[Gear_slot]]
     time: Timer
     chapter_level: int
-    merge_rules: Dict[Gear_rarity, List[MergeRequirement]] = field(default_factory=dict)
-   
+    rng: Block_sampler
+    logger: Sim_logger
+    # Fast-forward: while stuck, merging, levelling up and equipping are known to change nothing until
+    # gold reaches stuck_min_gold or a gear or design gain clears the flag
+    stuck: bool = False
+    stuck_min_gold: Any = 0
+    # Opt-in instrumentation, None unless the run is profiled
+    profiler: Optional["Sim_profiler"] = None
 
     @staticmethod
-    def initialize(gear_levels_config: pd.DataFrame, gear_merge_config: pd.DataFrame, time: Timer) -> 'Player_meta_progression':
-
-        gear_levels_config[ConfigKeys.REQUIRED_RARITY.value] = (gear_levels_config[ConfigKeys.REQUIRED_RARITY.value].apply(Gear_rarity.parse))
+    def initialize(gears: Tuple[Gear_slot, ...], time: Timer, rng: Block_sampler, logger: Sim_logger) -> 'Player_meta_progression':
 
         gold = 0
         chapter_level = 1
 
-        designs = {s: 0 for s in Gear_pieces}
-        equipped_gear = {}
-        merge_rules = {}
-        gear_inventory = [
-                Gear.initialize(gear_set, gear_piece, gear_levels_config, gear_merge_config, time)
-                for gear_set in Gear_sets
-                for gear_piece in Gear_pieces
-                if gear_set != Gear_sets.DEFAULT and gear_piece != Gear_pieces.DEFAULT
-            ]
+        designs = [0] * len(Gear_pieces)
+        equipped_gear = [None] * N_GEAR_PIECES
+        gear_inventory = Gear_inventory.initialize(gears, time, logger)
 
         new_meta = Player_meta_progression(
             gold=gold,
@@ -320,103 +363,106 @@ class Player_meta_progression:
             gear_inventory=gear_inventory,
             designs=designs,
             equipped_gear=equipped_gear,
-            merge_rules=merge_rules,
             time=time,
+            rng=rng,
+            logger=logger,
         )
 
-        Logger.add_log(
-            Log_Action.INITIALIZE,
-            time.get_timer_info(),
-            "Meta progression initialized",
-            {"meta_progression": asdict(new_meta) }
-            )       
+        if logger.should_log(Log_Action.INITIALIZE):
+            logger.add_log(
+                Log_Action.INITIALIZE,
+                time.get_timer_info(),
+                payload={
+                    "gold": new_meta.gold,
+                    "chapter_level": new_meta.chapter_level,
+                    "gear_count": len(new_meta.gear_inventory)
+                }
+                )       
 
         return new_meta
 
-    def add_gear(self, piece: Gear_pieces, set: Gear_sets, rarity: Gear_rarity):
+    def add_gear(self, piece: Gear_pieces, set: Gear_sets, rarity: Gear_rarity, count: int = 1):
 
-        matching_gear = next(
-            (gear for gear in self.gear_inventory if gear.piece == piece and gear.set == set),
-            None
-        )
+        matching_gear = self.gear_inventory.get(piece, set)
 
         if (piece == Gear_pieces.DEFAULT or set == Gear_sets.DEFAULT):
-            Logger.add_log(
-                Log_Action.ERROR,
-                self.time.get_timer_info(),
-                f"Added gear of {piece.value} and {set.value} to rarity {rarity}",
-                {
-                    "piece": piece.value,
-                    "set": set.value,
-                    "rarity": rarity.name
-                }
-            )
+            if self.logger.should_log(Log_Action.ERROR):
+                self.logger.add_log(
+                    Log_Action.ERROR,
+                    self.time.get_timer_info(),
+                    payload={
+                        "piece": piece,
+                        "set": set,
+                        "rarity": rarity
+                    }
+                )
 
         if matching_gear:
-            matching_gear.rarity_list[rarity] += 1
+            self.gear_inventory.add(matching_gear, rarity, count)
 
-            if matching_gear.level == 0: #in case it is the first time this gear is added
-                matching_gear.level = 1
+            if self.gear_inventory.level[matching_gear.slot] == 0: #in case it is the first time this gear is added
+                self.gear_inventory.level[matching_gear.slot] = 1
 
-            Logger.add_log(
-                Log_Action.ADD_GEAR,
-                self.time.get_timer_info(),
-                f"Added gear of {piece.value} and {set.value} to rarity {rarity}",
-                {
-                    "piece": piece.value,
-                    "set": set.value,
-                    "rarity": rarity.name
-                }
-            )
+            if self.stuck:
+                self._watch_gear(matching_gear)
+
+            if self.logger.should_log(Log_Action.ADD_GEAR):
+                self.logger.add_log(
+                    Log_Action.ADD_GEAR,
+                    self.time.get_timer_info(),
+                    payload={
+                        "piece": piece,
+                        "set": set,
+                        "rarity": rarity,
+                        "count": count
+                    }
+                )
         else:
             raise ValueError(f"Gear with piece {piece.value} and set {set.value} not found in inventory.")
         return
     
     def add_designs(self, amount: int):
-        chosen_piece = random.choice([piece for piece in self.designs.keys() if piece != Gear_pieces.DEFAULT])
-        self.designs[chosen_piece] += amount
-
-        Logger.add_log(
-            Log_Action.ADD_DESIGNS,
-            self.time.get_timer_info(),
-            f"Added {amount} designs to {chosen_piece.value}",
-            {
-                "piece": chosen_piece.value,
-                "amount": amount,
-                "total_designs": self.designs[chosen_piece]
-            }
-        )
+        chosen_piece = GEAR_PIECES[self.rng.integers(N_GEAR_PIECES)]
+        self.designs[PIECE_INDEX[chosen_piece]] += amount
 
-    def apply_offer(self, offer_name: str, offers_df: pd.DataFrame, gacha: "Gacha_system") -> None:
+        if self.stuck:
+            for gear in self.gear_inventory.pieces(chosen_piece):
+                self._watch_level_up(gear)
 
-        row = offers_df.loc[offers_df[ConfigKeys.OFFER_NAME.value] == offer_name].iloc[0]
+        if self.logger.should_log(Log_Action.ADD_DESIGNS):
+            self.logger.add_log(
+                Log_Action.ADD_DESIGNS,
+                self.time.get_timer_info(),
+                payload={
+                    "piece": chosen_piece,
+                    "amount": amount,
+                    "total_designs": self.designs[PIECE_INDEX[chosen_piece]]
+                }
+            )
 
-        
-        rare_chest_to_open = int(row.get("rare_chest", 0) or 0)
-        epic_chest_to_open = int(row.get("epic_chest", 0) or 0)
-        gold_to_add = int(row.get("gold", 0) or 0)
-        designs_to_add = int(row.get("design", 0) or 0)
-
-        Logger.add_log(
-            Log_Action.PURCHASE_OFFER,
-            self.time.get_timer_info(),
-            f"Applied offer {offer_name}",
-            {
-                "offer_name": offer_name,
-                "rare_chests_opened": rare_chest_to_open,
-                "epic_chests_opened": epic_chest_to_open,
-                "gold_added": gold_to_add,
-                "designs_added": designs_to_add
-            }
-        )
-        
-        #row = offers_df.loc[offer_name].iloc[0]
+    def apply_offer(self, offer: Offer, gacha: "Gacha_system") -> None:
+
+        offer_name = offer.offer_name
+        rare_chest_to_open = offer.rare_chest
+        epic_chest_to_open = offer.epic_chest
+        gold_to_add = offer.gold
+        designs_to_add = offer.designs
 
-        for _ in range(rare_chest_to_open):
-            gacha.open_chest(self, ConfigKeys.RARE_CHEST_NAME.value)
+        if self.logger.should_log(Log_Action.PURCHASE_OFFER):
+            self.logger.add_log(
+                Log_Action.PURCHASE_OFFER,
+                self.time.get_timer_info(),
+                payload={
+                    "offer_name": offer_name,
+                    "rare_chests_opened": rare_chest_to_open,
+                    "epic_chests_opened": epic_chest_to_open,
+                    "gold_added": gold_to_add,
+                    "designs_added": designs_to_add
+                }
+            )
 
-        for _ in range(epic_chest_to_open):
-            gacha.open_chest(self, ConfigKeys.EPIC_CHEST_NAME.value)
+        gacha.open_chests(self, ConfigKeys.RARE_CHEST_NAME.value, rare_chest_to_open)
+        gacha.open_chests(self, ConfigKeys.EPIC_CHEST_NAME.value, epic_chest_to_open)
 
         if gold_to_add > 0:
             self.gold += gold_to_add
@@ -426,61 +472,125 @@ class Player_meta_progression:
 
         
 
-    def simulate(self):
+    def simulate(self) -> bool:
+        """Merge, level up and equip; returns whether any of them changed the gear."""
 
         # Pass Time
         self.time.increment_meta_progression()
 
+        merged = self.merge_gear()
+        levelled = self.level_up_gear()
+        equipped = self.equip_gear()
+
+        return merged or levelled or equipped
+
+    def merge_gear(self) -> bool:
+        """Try every merge of the equipped gear, lowest level first; returns whether any succeeded."""
+        changed = False
+        profiler = self.profiler
+
         #Merge Gear
-        sorted_gear_equipped = sorted(self.equipped_gear.items(), key=lambda g: g[1].level, reverse=False)
+        inventory = self.gear_inventory
+        levels = inventory.level
+        sorted_gear_equipped = sorted((gear for gear in self.equipped_gear if gear is not None), key=lambda g: levels[g.slot], reverse=False)
 
-        for (piece_type, gear) in sorted_gear_equipped:
+        for gear in sorted_gear_equipped:
             for rarity in Gear_rarity:
                 if rarity != Gear_rarity.COMMON:
-                    success = gear.merge(rarity, self.gear_inventory)
+                    success = inventory.merge(gear, rarity)
+                    changed = changed or success
+                    if profiler is not None:
+                        profiler.count_merge(success)
 
-        """
-        sorted_gear_inventory = sorted(self.gear_inventory, key=lambda g: g.level, reverse=True)
-        for gear in sorted_gear_inventory:
-            for rarity in Gear_rarity:
-                if rarity != Gear_rarity.COMMON:
-                    success = gear.merge(rarity, self.gear_inventory)
-                    """
+        return changed
+
+    def level_up_gear(self) -> bool:
+        """Level up every gear as far as resources allow, lowest level first; returns whether any levelled."""
+        changed = False
+        profiler = self.profiler
 
         # Sort gear inventory by highest level and try to level up
         #Start for the lowest level gear to fast level ups
-        sorted_gear_inventory = sorted(self.gear_inventory, key=lambda g: g.level, reverse=False)
+        inventory = self.gear_inventory
+        levels = inventory.level
+        sorted_gear_inventory = sorted(inventory, key=lambda g: levels[g.slot], reverse=False)
         for gear in sorted_gear_inventory:
-            gear.level_up(self)
+            level = levels[gear.slot]
+            inventory.level_up(gear, self)
+            changed = changed or levels[gear.slot] != level
+            if profiler is not None:
+                profiler.count("level_up_steps", levels[gear.slot] - level)
+
+        return changed
+
+    def equip_gear(self) -> bool:
+        """Equip the highest level gear of every piece; returns whether any equipped gear changed."""
+        changed = False
+
+        levels = self.gear_inventory.level
 
         # Equip Gear
-        for piece_type in Gear_pieces:
-            if piece_type == Gear_pieces.DEFAULT:
-                continue
+        # GEAR_PIECES follows Gear_pieces, so its positions are the pieces' PIECE_INDEX
+        for piece_index, piece_type in enumerate(GEAR_PIECES):
 
             highest_level_gear = max(
-                (gear for gear in self.gear_inventory if gear.piece == piece_type),
-                key=lambda g: g.level
+                self.gear_inventory.pieces(piece_type),
+                key=lambda g: levels[g.slot]
             )
 
-            if highest_level_gear.level == 0:
+            if levels[highest_level_gear.slot] == 0:
                 continue
 
-            prev_equipped = self.equipped_gear.get(piece_type)
-            if prev_equipped is None or highest_level_gear.level > prev_equipped.level:
-                self.equipped_gear[piece_type] = highest_level_gear
-                Logger.add_log(
-                    Log_Action.EQUIP_GEAR,
-                    self.time.get_timer_info(),
-                    f"Equipped gear of {piece_type.value} with set {highest_level_gear.set.value} at level {highest_level_gear.level}",
-                    {
-                        "piece": piece_type.value,
-                        "set": highest_level_gear.set.value,
-                        "level": highest_level_gear.level
-                    }
-                )
+            prev_equipped = self.equipped_gear[piece_index]
+            if prev_equipped is None or levels[highest_level_gear.slot] > levels[prev_equipped.slot]:
+                self.equipped_gear[piece_index] = highest_level_gear
+                changed = True
+                if self.logger.should_log(Log_Action.EQUIP_GEAR):
+                    self.logger.add_log(
+                        Log_Action.EQUIP_GEAR,
+                        self.time.get_timer_info(),
+                        payload={
+                            "piece": piece_type,
+                            "set": highest_level_gear.set,
+                            "level": levels[highest_level_gear.slot]
+                        }
+                    )
 
-        return
+        return changed
+
+    def enter_stuck(self) -> None:
+        """
+        Call right after a simulate that changed nothing: every merge and level-up was just tried and failed,
+        so the gear stays as it is until gold reaches stuck_min_gold or a gain clears the flag.
+        """
+        self.stuck = True
+        self.stuck_min_gold = float("inf")
+        for gear in self.gear_inventory:
+            self._watch_level_up(gear)
+
+    def is_stuck(self) -> bool:
+        """Whether simulate would change nothing this session."""
+        return self.stuck and self.gold < self.stuck_min_gold
+
+    def _watch_level_up(self, gear: Gear_slot) -> None:
+        # While stuck nothing is spent, so once the designs are there the gold needed only matters
+        cost = self.gear_inventory.next_level_cost(gear)
+        if cost is not None and self.designs[gear.piece_index] >= cost[1]:
+            self.stuck_min_gold = min(self.stuck_min_gold, cost[0])
+
+    def _watch_gear(self, gear: Gear_slot) -> None:
+        levels = self.gear_inventory.level
+        equipped = self.equipped_gear[gear.piece_index]
+        if levels[gear.slot] > (levels[equipped.slot] if equipped else 0):
+            self.stuck = False
+            return
+
+        # Only merges of the equipped gear of the same piece can use the new gear
+        if equipped is not None and any(self.gear_inventory.can_merge(equipped, rarity) for rarity in Gear_rarity if rarity != Gear_rarity.COMMON):
+            self.stuck = False
+            return
+
+        self._watch_level_up(gear)
     
     def chapter_level_up(self):
         self.chapter_level += 1
@@ -490,68 +600,97 @@ class Player_meta_progression:
 @dataclass
 class Gacha_system:
 
-    config_df: pd.DataFrame
+    chests: Dict[str, Chest_table]
     time: Timer
+    rng: Block_sampler
+    logger: Sim_logger
 
     @staticmethod
-    def initialize(config_df: pd.DataFrame, time: Timer) -> 'Gacha_system':
+    def initialize(chests: Dict[str, Chest_table], time: Timer, rng: Block_sampler, logger: Sim_logger) -> 'Gacha_system':
 
-        return Gacha_system(config_df = config_df, time=time)
+        return Gacha_system(chests=chests, time=time, rng=rng, logger=logger)
 
     def open_chest(self, meta: Player_meta_progression, chest_name: str):
 
 
-        row = self.config_df.loc[self.config_df['chest_name'] == chest_name].iloc[0]
-
-        rarities: list[Gear_rarity] = []
-        weights: list[float] = []
-
-        for rarity in Gear_rarity:
-            rarity_column = rarity.name.lower()
-            if rarity_column in self.config_df.columns:
-                raw_weight = row[rarity_column]
-
-                if pd.isna(raw_weight) or raw_weight == "":
-                    continue
-                # Convert to float, allowing comma as decimal
-                 #weight_f = float(str(raw_weight).replace(',', '.'))
-                weight_f = float(raw_weight)
-
-                if weight_f > 0:
-                    rarities.append(rarity)
-                    weights.append(weight_f)
-
-        new_gear_rarity = random.choices(rarities, weights=weights, k=1)[0]
-        new_gear_piece = random.choice([p for p in Gear_pieces if p != Gear_pieces.DEFAULT])
-        new_gear_set = random.choice([s for s in Gear_sets if s != Gear_sets.DEFAULT])
-
-        Logger.add_log(
-            Log_Action.OPEN_GACHA,
-            self.time.get_timer_info(),
-            f"Opened {chest_name} chest and received gear piece {new_gear_piece.value}, set {new_gear_set.value}, rarity {new_gear_rarity}",
-            {
-                "chest_name": chest_name,
-                "new_gear_piece": new_gear_piece.value,
-                "new_gear_set": new_gear_set.value,
-                "new_gear_rarity": str(new_gear_rarity)
-            }
-            )
+        chest = self.chests[chest_name]
+        rarities = chest.rarities
+        cumulative_weights = chest.cumulative_weights
+        new_gear_rarity = rarities[bisect.bisect(cumulative_weights, self.rng.random() * cumulative_weights[-1], 0, len(rarities) - 1)]
+
+        pieces = [p for p in Gear_pieces if p != Gear_pieces.DEFAULT]
+        sets = [s for s in Gear_sets if s != Gear_sets.DEFAULT]
+        new_gear_piece = pieces[self.rng.integers(len(pieces))]
+        new_gear_set = sets[self.rng.integers(len(sets))]
+
+        if self.logger.should_log(Log_Action.OPEN_GACHA):
+            self.logger.add_log(
+                Log_Action.OPEN_GACHA,
+                self.time.get_timer_info(),
+                payload={
+                    "chest_name": chest_name,
+                    "chests_opened": 1,
+                    "new_gear_piece": new_gear_piece,
+                    "new_gear_set": new_gear_set,
+                    "new_gear_rarity": new_gear_rarity,
+                    "count": 1
+                }
+                )
 
         meta.add_gear(new_gear_piece, new_gear_set, new_gear_rarity)
         return
 
+    def open_chests(self, meta: Player_meta_progression, chest_name: str, k: int):
+        """
+        Open k chests at once: the k (rarity, piece, set) outcomes are drawn in one vectorized
+        alias-table draw and added to the inventory as aggregated counts.
+        """
+        if k <= 0:
+            return
+
+        chest = self.chests[chest_name]
+        n_outcomes = len(chest.alias.prob)
+        outcomes = chest.alias.sample(self.rng.integers_block(n_outcomes, k), self.rng.random_block(k))
+        counts = np.bincount(outcomes, minlength=n_outcomes)
+        drawn = np.flatnonzero(counts)
+
+        for o in drawn:
+            new_gear_piece = GEAR_PIECES[chest.outcome_piece[o]]
+            new_gear_set = GEAR_SETS[chest.outcome_set[o]]
+            new_gear_rarity = Gear_rarity(chest.outcome_rarity[o])
+            count = int(counts[o])
+
+            if self.logger.should_log(Log_Action.OPEN_GACHA):
+                self.logger.add_log(
+                    Log_Action.OPEN_GACHA,
+                    self.time.get_timer_info(),
+                    payload={
+                        "chest_name": chest_name,
+                        "chests_opened": k,
+                        "new_gear_piece": new_gear_piece,
+                        "new_gear_set": new_gear_set,
+                        "new_gear_rarity": new_gear_rarity,
+                        "count": count
+                    }
+                    )
+
+            meta.add_gear(new_gear_piece, new_gear_set, new_gear_rarity, count)
+        return
+
 
 @dataclass
 class Chapter:
 
-    chapters_config: pd.DataFrame
+    chapters_config: Chapter_table
     time: Timer
+    logger: Sim_logger
 
     @staticmethod
-    def initialize(chapters_config: pd.DataFrame, time: Timer) -> 'Chapter':
+    def initialize(chapters_config: Chapter_table, time: Timer, logger: Sim_logger) -> 'Chapter':
         chapter = Chapter(
             chapters_config=chapters_config,
-            time=time
+            time=time,
+            logger=logger
         )
         return chapter
 
@@ -560,45 +699,44 @@ class Chapter:
         # Pass Time
         self.time.increment_play_chapter()
 
-        chapter_config = self.chapters_config.loc[self.chapters_config[ConfigKeys.CHAPTER_NUM.value] == chapter_num]
+        chapter_config = self.chapters_config
 
         victory = False
 
         # Simulate the battle
 
-        avg_gear_level_required = int(chapter_config[ConfigKeys.AVG_GEAR_LEVEL_REQUIRED.value].iloc[0])
-        unique_gear_pieces_required = int(chapter_config[ConfigKeys.UNIQUE_GEAR_PIECES_REQUIRED.value].iloc[0])
-        total_required_points = avg_gear_level_required * unique_gear_pieces_required
+        total_required_points = int(chapter_config.required_points[chapter_num])
 
         total_player_points = 0
 
-        for piece in meta.equipped_gear.values():
-            if piece.level > 0:
-                total_player_points += piece.level
+        levels = meta.gear_inventory.level
+        for piece in meta.equipped_gear:
+            if piece is not None and levels[piece.slot] > 0:
+                total_player_points += levels[piece.slot]
 
         victory = total_player_points >= total_required_points
 
         # Give rewards based on result
         if(victory):
             victory = True
-            win_reward_gold = chapter_config[ConfigKeys.WIN_REWARD_GOLD.value].iloc[0]
-            win_reward_designs = chapter_config[ConfigKeys.WIN_REWARD_DESIGNS.value].iloc[0]
-            win_reward_gacha = chapter_config[ConfigKeys.WIN_REWARD_GACHA.value].iloc[0]
+            win_reward_gold = chapter_config.win_reward_gold[chapter_num]
+            win_reward_designs = chapter_config.win_reward_designs[chapter_num]
+            win_reward_gacha = chapter_config.win_reward_gacha[chapter_num]
 
-            Logger.add_log(
-                Log_Action.WIN_CHAPTER,
-                self.time.get_timer_info(),
-                f"Chapter {chapter_num} victory: awarded {win_reward_gold} gold, {win_reward_designs} designs, and opened {win_reward_gacha} chest",
-                {
-                    "chapter_num": chapter_num,
-                    "victory": victory,
-                    "player_points": total_player_points,
-                    "required_points": total_required_points,
-                    "gold_awarded": win_reward_gold,
-                    "designs_awarded": win_reward_designs,
-                    "gacha_chest_opened": win_reward_gacha
-                }
-            )
+            if self.logger.should_log(Log_Action.WIN_CHAPTER):
+                self.logger.add_log(
+                    Log_Action.WIN_CHAPTER,
+                    self.time.get_timer_info(),
+                    payload={
+                        "chapter_num": chapter_num,
+                        "victory": victory,
+                        "player_points": total_player_points,
+                        "required_points": total_required_points,
+                        "gold_awarded": win_reward_gold,
+                        "designs_awarded": win_reward_designs,
+                        "gacha_chest_opened": win_reward_gacha
+                    }
+                )
 
             meta.gold += win_reward_gold
             meta.add_designs(win_reward_designs)
@@ -606,24 +744,24 @@ class Chapter:
             
         else:
             victory = False
-            lose_reward_gold = chapter_config[ConfigKeys.LOSE_REWARD_GOLD.value].iloc[0]
-            lose_reward_designs = chapter_config[ConfigKeys.LOSE_REWARD_DESIGNS.value].iloc[0]
-            lose_reward_gacha = chapter_config[ConfigKeys.LOSE_REWARD_GACHA.value].iloc[0]
+            lose_reward_gold = chapter_config.lose_reward_gold[chapter_num]
+            lose_reward_designs = chapter_config.lose_reward_designs[chapter_num]
+            lose_reward_gacha = chapter_config.lose_reward_gacha[chapter_num]
 
-            Logger.add_log(
-                Log_Action.LOSE_CHAPTER,
-                self.time.get_timer_info(),
-                f"Chapter {chapter_num} defeat: awarded {lose_reward_gold} gold, {lose_reward_designs} designs, and opened {lose_reward_gacha} chest",
-                {
-                    "chapter_num": chapter_num,
-                    "victory": victory,
-                    "player_points": total_player_points,
-                    "required_points": total_required_points,
-                    "gold_awarded": lose_reward_gold,
-                    "designs_awarded": lose_reward_designs,
-                    "gacha_chest_opened": lose_reward_gacha
-                }
-            )
+            if self.logger.should_log(Log_Action.LOSE_CHAPTER):
+                self.logger.add_log(
+                    Log_Action.LOSE_CHAPTER,
+                    self.time.get_timer_info(),
+                    payload={
+                        "chapter_num": chapter_num,
+                        "victory": victory,
+                        "player_points": total_player_points,
+                        "required_points": total_required_points,
+                        "gold_awarded": lose_reward_gold,
+                        "designs_awarded": lose_reward_designs,
+                        "gacha_chest_opened": lose_reward_gacha
+                    }
+                )
 
             meta.gold += lose_reward_gold
             meta.add_designs(lose_reward_designs)
@@ -659,50 +797,65 @@ class model:
     current_day_session: int
     current_session: int
 
+    player: Player_profile
     player_behavior: dict[str, int]
 
-    main_config: Config
+    compiled_config: CompiledConfig
 
-    @staticmethod
-    def initialize(main_config: Config) -> 'model':
-        
-        rounds_done = 0
-        max_allowed_rounds = 1000  #value to block infinite loops in any while-true situation
-        total_chapters = main_config.get_total_chapters()
+    rng: Sim_rng
+    logger: Sim_logger
 
-        gear_levels_config = main_config.gear_levels_df
-        gear_merge_config = main_config.gear_merge_df
-        chapters_config = main_config.chapters_df
-        gacha_config = main_config.gacha_df
-        offers_config = main_config.offers_df
-        players_config = main_config.players_df
+    fast_forward: bool = False
+    max_days: Optional[int] = None
+    profiler: Optional[Sim_profiler] = None
+    kpis: Optional[Kpi_aggregator] = None
+    # The starter gear was given / the run ended; a run paused by simulate(until_...) is started, not finished
+    started: bool = False
+    finished: bool = False
 
+    @staticmethod
+    def initialize(main_config: "Config | CompiledConfig", seed: SeedLike = None, player_type: Optional[str] = None, logger: Optional[Sim_logger] = None,
+                   max_allowed_rounds: int = 1000, max_days: Optional[int] = None, fast_forward: bool = False, profiler: Optional[Sim_profiler] = None,
+                   track_kpis: bool = False) -> 'model':
+        """
+        Build a simulation of main_config; a Config is compiled first, pass a CompiledConfig to reuse one across runs.
+        seed: root seed of the run's random streams; the same seed replays the same run. None draws fresh entropy.
+        player_type: player row to simulate, the first one with simulate == TRUE by default.
+        logger: event log of this run; the shared Logger one by default. Give every concurrent run its own.
+        max_allowed_rounds: sessions after which the run stops (one more than that, as the loop always did).
+        max_days: last day played; raise max_allowed_rounds to match for long horizons (a year of 8 daily sessions is 2920).
+        fast_forward: skip merging, levelling up and equipping in sessions where they provably change nothing.
+            Runs are identical with and without it, only faster when the player is stuck on a chapter; sessions are
+            still played one by one, as the random draws that end a stuck spell cannot be skipped.
+        profiler: records time and calls per phase and session and hot-path counters; profiler.report() after simulate.
+        track_kpis: keep the progression curves in a Kpi_aggregator (model.kpis) as the run goes, so they need no log.
+        """
+        compiled_config = main_config if isinstance(main_config, CompiledConfig) else CompiledConfig.initialize(main_config)
+        rng = Sim_rng.initialize(seed)
+        logger = logger if logger is not None else Logger.default()
+        logger.use_run_sampler(rng.log_sampling)
 
-        #Player Behavior
-        players_config[ConfigKeys.PLAYER_SIMULATE.value] = (players_config[ConfigKeys.PLAYER_SIMULATE.value].astype(str).str.upper().eq("TRUE")
-)
-        player_type = players_config.loc[players_config[ConfigKeys.PLAYER_SIMULATE.value] == True, ConfigKeys.PLAYER_TYPE.value].iloc[0]
+        rounds_done = 0
+        total_chapters = compiled_config.chapters.total_chapters
 
-        player_behavior = players_config.loc[players_config[ConfigKeys.PLAYER_TYPE.value] == player_type].to_dict(orient='records')[0]
+        #Player Behavior
+        player = compiled_config.get_player(player_type)
+        player_behavior = player.behavior
 
         # Timer Section
         timer_instance = Timer.initialize(player_behavior)
-        #free_rare_num = gacha_config.loc[gacha_config[ConfigKeys.CHEST_NAME.value] == ConfigKeys.RARE_CHEST_NAME.value,ConfigKeys.FREE_DAILY.value].iloc[0]
-        #free_epic_num = gacha_config.loc[gacha_config[ConfigKeys.CHEST_NAME.value] == ConfigKeys.EPIC_CHEST_NAME.value,ConfigKeys.FREE_DAILY.value].iloc[0]
-        #sessions_per_day = timer_config.loc[timer_config[ConfigKeys.TIMER_ACTION.value] == ConfigKeys.SESSIONS_PER_DAY.value,ConfigKeys.TIMER_AMOUNT.value].iloc[0]
-        #avg_session_length = timer_config.loc[timer_config[ConfigKeys.TIMER_ACTION.value] == ConfigKeys.AVG_SESSION_LENGTH.value,ConfigKeys.TIMER_AMOUNT.value].iloc[0]
         current_day = timer_instance.current_day()
         current_day_session = 1 
         current_session = 1
         
 
-        meta_progression = Player_meta_progression.initialize(gear_levels_config, gear_merge_config, timer_instance)
-        gacha_system = Gacha_system.initialize(gacha_config, timer_instance)
-        chapters = Chapter.initialize(chapters_config, timer_instance)
+        meta_progression = Player_meta_progression.initialize(compiled_config.gear_slots, timer_instance, rng.designs, logger)
+        gacha_system = Gacha_system.initialize(compiled_config.chests, timer_instance, rng.chests, logger)
+        chapters = Chapter.initialize(compiled_config.chapters, timer_instance, logger)
 
         
 
-        return model(
+        new_model = model(
             meta_progression=meta_progression,
             gacha_system=gacha_system,
             rounds_done=rounds_done,
@@ -711,88 +864,293 @@ class model:
             timer=timer_instance,
             chapters=chapters,
             current_day=current_day,
+            player=player,
             player_behavior=player_behavior,
             current_day_session=current_day_session,
             current_session=current_session,
-            main_config=main_config
+            compiled_config=compiled_config,
+            rng=rng,
+            logger=logger,
+            fast_forward=fast_forward,
+            max_days=max_days,
+            kpis=Kpi_aggregator.initialize(max_allowed_rounds + 1, player.sessions_per_day, total_chapters) if track_kpis else None,
+            )
+
+        if profiler is not None:
+            profiler.attach(new_model)
+
+        return new_model
+
+    def checkpoint(self) -> Model_checkpoint:
+        """The mutable state of the run, without the config tables; model.restore continues from it."""
+        meta = self.meta_progression
+        inventory = meta.gear_inventory
+
+        return Model_checkpoint(
+            config_hash=self.compiled_config.content_hash,
+            player_type=self.player.player_type,
+            run={
+                "rounds_done": self.rounds_done,
+                "max_allowed_rounds": self.max_allowed_rounds,
+                "current_day": self.current_day,
+                "current_day_session": self.current_day_session,
+                "current_session": self.current_session,
+                "max_days": self.max_days,
+                "fast_forward": self.fast_forward,
+                "started": self.started,
+                "finished": self.finished,
+            },
+            timer=(self.timer.total_time, self.timer.session_time),
+            gold=meta.gold,
+            chapter_level=meta.chapter_level,
+            designs=tuple(meta.designs),
+            gear_levels=np.array(inventory.level, dtype=np.int64),
+            gear_max_rarity=np.array(inventory.max_rarity, dtype=np.int8),
+            gear_rarity_counts=np.array(inventory.rarity_counts, dtype=np.int64).reshape(len(inventory), RARITY_SLOTS)[:, 1:],
+            equipped=np.array([gear.slot if gear is not None else -1 for gear in meta.equipped_gear], dtype=np.int16),
+            stuck=meta.stuck,
+            stuck_min_gold=meta.stuck_min_gold,
+            rng=self.rng.get_state(),
+            kpis={name: values.copy() for name, values in self.kpis.arrays().items()} if self.kpis is not None else None,
+            kpis_completed_day=self.kpis.completed_day if self.kpis is not None else None,
+        )
+
+    @staticmethod
+    def restore(main_config: "Config | CompiledConfig", checkpoint: Model_checkpoint, logger: Optional[Sim_logger] = None,
+                profiler: Optional[Sim_profiler] = None) -> 'model':
+        """
+        A model continuing the run checkpoint was taken from; main_config must be the config it ran on.
+        logger receives the events from the checkpoint on; a run that tracked KPIs keeps its curves.
+        """
+        compiled_config = main_config if isinstance(main_config, CompiledConfig) else CompiledConfig.initialize(main_config)
+        if checkpoint.config_hash != compiled_config.content_hash:
+            raise ValueError(
+                f"Checkpoint taken on config {checkpoint.config_hash[:12]}, restoring against {compiled_config.content_hash[:12]}."
             )
+
+        run = checkpoint.run
+        restored = model.initialize(
+            compiled_config,
+            player_type=checkpoint.player_type,
+            # The run was initialized long ago: nothing is logged until its components log to logger below
+            logger=Sim_logger(Log_settings(level=Log_level.OFF)),
+            max_allowed_rounds=run["max_allowed_rounds"],
+            max_days=run["max_days"],
+            fast_forward=run["fast_forward"],
+            track_kpis=checkpoint.kpis is not None,
+        )
+        logger = logger if logger is not None else Logger.default()
+        for component in (restored, restored.meta_progression, restored.meta_progression.gear_inventory, restored.gacha_system, restored.chapters):
+            component.logger = logger
+
+        restored.rng = Sim_rng.from_state(checkpoint.rng)
+        logger.use_run_sampler(restored.rng.log_sampling)
+        restored.meta_progression.rng = restored.rng.designs
+        restored.gacha_system.rng = restored.rng.chests
+
+        restored.timer.total_time, restored.timer.session_time = checkpoint.timer
+        for name in ("rounds_done", "current_day", "current_day_session", "current_session", "started", "finished"):
+            setattr(restored, name, run[name])
+
+        meta = restored.meta_progression
+        meta.gold = checkpoint.gold
+        meta.chapter_level = checkpoint.chapter_level
+        meta.designs = list(checkpoint.designs)
+        inventory = meta.gear_inventory
+        inventory.level = [int(level) for level in checkpoint.gear_levels]
+        inventory.max_rarity = [Gear_rarity(int(max_rarity)) for max_rarity in checkpoint.gear_max_rarity]
+        for gear, counts in zip(inventory, checkpoint.gear_rarity_counts):
+            for rarity, count in zip(Gear_rarity, counts):
+                inventory.add(gear, rarity, int(count))
+        meta.equipped_gear = [inventory.gears[index] if index >= 0 else None for index in checkpoint.equipped]
+        meta.stuck = checkpoint.stuck
+        meta.stuck_min_gold = checkpoint.stuck_min_gold
+
+        if checkpoint.kpis is not None:
+            restored.kpis.load(checkpoint.kpis, checkpoint.kpis_completed_day)
+
+        if profiler is not None:
+            profiler.attach(restored)
+
+        return restored
+
+    def fork(self, k: int, behaviors: Optional[List[Optional[Dict[str, Any]]]] = None, seeds: Optional[List[SeedLike]] = None,
+             loggers: Optional[List[Sim_logger]] = None) -> List['model']:
+        """
+        k independent copies of the run as it is now, sharing the compiled config; simulate each to continue it.
+        behaviors: per branch, player behaviour columns to override (see override_behavior), None keeps the player's.
+        seeds: per branch, a seed for fresh random streams, None continues the run's own streams.
+        loggers: per branch, the log its events go to; by default a new logger with this run's settings.
+        Branches with the same behaviour and no seed replay the same continuation.
+        """
+        for name, values in (("behaviors", behaviors), ("seeds", seeds), ("loggers", loggers)):
+            if values is not None and len(values) != k:
+                raise ValueError(f"{name} has {len(values)} entries for {k} branches.")
+
+        checkpoint = self.checkpoint()
+        branches = []
+        for i in range(k):
+            logger = loggers[i] if loggers is not None else Sim_logger(self.logger.settings)
+            branch = model.restore(self.compiled_config, checkpoint, logger=logger)
+            if behaviors is not None and behaviors[i]:
+                branch.override_behavior(behaviors[i])
+            if seeds is not None and seeds[i] is not None:
+                branch.reseed(seeds[i])
+            branches.append(branch)
+        return branches
+
+    def override_behavior(self, behavior: Dict[str, Any]) -> None:
+        """
+        Replace columns of the player's row from now on, e.g. an offer's trigger chapter (0 never buys it)
+        or sessions_per_day; the player profile and the session timings are rebuilt from the new row.
+        """
+        self.player = Player_profile.initialize({**self.player.behavior, **behavior}, list(self.compiled_config.offers))
+        self.player_behavior = self.player.behavior
+
+        timings = Timer.initialize(self.player_behavior)
+        self.timer.play_chapter_time = timings.play_chapter_time
+        self.timer.meta_progression_time = timings.meta_progression_time
+
+    def reseed(self, seed: SeedLike) -> None:
+        """Continue the run on fresh random streams from seed."""
+        self.rng = Sim_rng.initialize(seed)
+        self.meta_progression.rng = self.rng.designs
+        self.gacha_system.rng = self.rng.chests
     
-    def simulate(self):
+    def simulate(self, until_day: Optional[int] = None, until_chapter: Optional[int] = None) -> bool:
+        """
+        Play sessions until the run ends; returns whether it has.
+        until_day pauses it instead before the first session after day until_day, until_chapter before the
+        first session at a chapter at least that high. A paused run can be checkpointed, and calling
+        simulate again continues it exactly as if it had never stopped.
+        """
+        if self.finished:
+            return True
+
+        if self.profiler is not None:
+            self.profiler.start()
+
+        paused = False
+        try:
+            if not self.started:
+                self.start()
+
+            while(self.rounds_done<=self.max_allowed_rounds
+                  and self.meta_progression.chapter_level<=self.total_chapters):
+                if self._pause_before_session(until_day, until_chapter):
+                    paused = True
+                    return False
+                if not self.play_session():
+                    break
+
+            self.finished = True
+        finally:
+            # A pause keeps the phases wrapped for the next simulate; the end of the run, or an error, unwraps them
+            if self.profiler is not None:
+                if paused:
+                    self.profiler.pause()
+                else:
+                    self.profiler.finish()
+
+        return True
 
+    def start(self) -> None:
+        """Reset the session counters and give the player the starter gear."""
         self.current_day = self.timer.current_day()
         self.current_day_session = 0
         self.current_session = 0
 
         # Give to the player enough gear to start
+        starter_sets = [s for s in Gear_sets if s != Gear_sets.DEFAULT]
         for piece in Gear_pieces:
             if piece != Gear_pieces.DEFAULT:
-                self.meta_progression.add_gear(piece, random.choice([s for s in Gear_sets if s != Gear_sets.DEFAULT]), Gear_rarity.COMMON)
+                self.meta_progression.add_gear(piece, starter_sets[self.rng.starter_gear.integers(len(starter_sets))], Gear_rarity.COMMON)
                 continue
 
-        while(self.rounds_done<=self.max_allowed_rounds
-              and self.meta_progression.chapter_level<=self.total_chapters):
-            self.rounds_done+=1 # just for avoiding infinite loops
-            self.current_day_session+= 1 # equivalent to rounds, every round is a session
-            self.current_session += 1
-
-            #fake progression for testing purposes
-            #self.meta_progression.add_designs(1000)
-        
-            
-            # Check current session time
-            #if self.timer.current_session_time() >= self.player_behavior[ConfigKeys.PLAYER_AVG_SESSION_LENGTH.value]:
-            #    self.timer.new_session()
-            #    self.current_day_session += 1
-
-            # Check max sessions per day
-            if self.current_day_session > self.player_behavior[ConfigKeys.PLAYER_SESSIONS_PER_DAY.value]:
-                self.timer.complete_day()
-                self.timer.new_session()
-                self.current_day_session = 1
+        self.started = True
 
-            # Daily Gifts
-            if self.timer.current_day() > self.current_day:
-                self.current_day = self.timer.current_day()
-                self.daily_free_gachas()
-
-            # Purchase Offers
-            offers_list = self.main_config.offers_df[ConfigKeys.OFFER_NAME.value].tolist()
+    def _pause_before_session(self, until_day: Optional[int], until_chapter: Optional[int]) -> bool:
+        if until_chapter is not None and self.meta_progression.chapter_level >= until_chapter:
+            return True
+        # The next session starts a new day when today's sessions are used up
+        return (
+            until_day is not None
+            and self.current_day_session + 1 > self.player.sessions_per_day
+            and self.timer.current_day() >= until_day
+        )
 
-            for offer in offers_list:
-                #purchase_offer = self.player_behavior.get(str(offer), "FALSE").upper() == "TRUE"
-                purchase_offer = self.player_behavior.get(str(offer), 0) > 0 and self.player_behavior.get(str(offer), 0) == self.meta_progression.chapter_level
-                if purchase_offer:
-                    self.meta_progression.apply_offer(str(offer), self.main_config.offers_df, self.gacha_system)
+    def play_session(self) -> bool:
+        """One session: daily gifts, offers, meta progression and one chapter; returns whether the run goes on."""
+        self.rounds_done+=1 # just for avoiding infinite loops
+        self.current_day_session+= 1 # equivalent to rounds, every round is a session
+        self.current_session += 1
+
+        # Check max sessions per day
+        if self.current_day_session > self.player.sessions_per_day:
+            self.timer.complete_day()
+            self.timer.new_session()
+            self.current_day_session = 1
+
+        # Horizon reached: no session is played after day max_days
+        if self.max_days is not None and self.timer.current_day() > self.max_days:
+            return False
+
+        # Daily Gifts
+        if self.timer.current_day() > self.current_day:
+            self.current_day = self.timer.current_day()
+            self.daily_free_gachas()
+
+        # Purchase Offers
+        for offer_name in self.player.offer_triggers.get(self.meta_progression.chapter_level, ()):
+            self.meta_progression.apply_offer(self.compiled_config.offers[offer_name], self.gacha_system)
+
+        # Meta Progression Simulation
+        # Fast-forward skips this pass but still steps session by session: a stuck session still plays its
+        # chapter and draws its design piece and chest from the seeded streams, and whichever draw ends the
+        # stuck state is only known once drawn, so no closed-form jump to the next state change keeps runs
+        # (and their per-session events) identical to unskipped ones
+        if self.fast_forward and self.meta_progression.is_stuck():
+            # Nothing to merge, level up or equip: only the time it takes passes
+            self.timer.increment_meta_progression()
+            if self.profiler is not None:
+                self.profiler.count("fast_forwarded_sessions")
+        else:
+            self.meta_progression.stuck = False
+            if not self.meta_progression.simulate() and self.fast_forward:
+                self.meta_progression.enter_stuck()
 
-            # Meta Progression Simulation
-            self.meta_progression.simulate()
+        # Chapter Simulation
+        chapter_level = self.meta_progression.chapter_level
 
-            # Chapter Simulation
-            chapter_level = self.meta_progression.chapter_level
-            chapter_config = self.main_config.get_chapter_config(chapter_level)
+        victory_bool = self.chapters.simulate(chapter_level, self.meta_progression, self.gacha_system)
 
-            victory_bool = self.chapters.simulate(chapter_level, self.meta_progression, self.gacha_system)
+        inventory = self.meta_progression.gear_inventory
 
-            def _gear_level(piece: Gear_pieces) -> int:
-                gear_obj = self.meta_progression.equipped_gear.get(piece)
-                return gear_obj.level if gear_obj else 0
+        def _gear_level(piece: Gear_pieces) -> int:
+            gear_obj = self.meta_progression.equipped_gear[PIECE_INDEX[piece]]
+            return inventory.level[gear_obj.slot] if gear_obj else 0
 
-            def _gear_max_rarity(piece: Gear_pieces) -> str:
-                gear_obj = self.meta_progression.equipped_gear.get(piece)
-                return str(gear_obj.max_rarity) if gear_obj else str(Gear_rarity.COMMON)
+        def _gear_max_rarity(piece: Gear_pieces) -> str:
+            gear_obj = self.meta_progression.equipped_gear[PIECE_INDEX[piece]]
+            return str(inventory.max_rarity[gear_obj.slot]) if gear_obj else str(Gear_rarity.COMMON)
 
-            Logger.add_log(
+        if self.logger.should_log(Log_Action.SESSION_END):
+            self.logger.add_log(
                 Log_Action.SESSION_END,
                 self.timer.get_timer_info(),
-                f"Chapter {chapter_level} simulation completed with {'victory' if victory_bool else 'defeat'}",
-                {
+                payload={
                     "chapter_level": chapter_level,
                     "victory": victory_bool,
                     "current_day": self.current_day,
                     "current_day_session": self.current_day_session,
                     "current_session": self.current_session,
                     "current_coins": self.meta_progression.gold,
-                    "designs": self.meta_progression.designs,
+                    "weapon_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.WEAPON]],
+                    "ring_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.RING]],
+                    "gloves_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.GLOVES]],
+                    "helmet_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.HELMET]],
+                    "armor_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.ARMOR]],
+                    "boots_designs": self.meta_progression.designs[PIECE_INDEX[Gear_pieces.BOOTS]],
                     "weapon_gear_level": _gear_level(Gear_pieces.WEAPON),
                     "ring_gear_level": _gear_level(Gear_pieces.RING),
                     "gloves_gear_level": _gear_level(Gear_pieces.GLOVES),
@@ -808,14 +1166,25 @@ class model:
                 }
             )
 
-            # If victory, go to next chapter
+        if self.kpis is not None:
+            day = self.timer.current_day()
             if victory_bool:
-                if(self.meta_progression.chapter_level == self.total_chapters):
-                    Logger.add_log(
+                self.kpis.win(day)
+            self.kpis.session_end(day, chapter_level, victory_bool, self.meta_progression)
+
+        if self.profiler is not None:
+            self.profiler.end_session(self.current_session, self.current_day)
+
+        # If victory, go to next chapter
+        if victory_bool:
+            if(self.meta_progression.chapter_level == self.total_chapters):
+                if self.kpis is not None:
+                    self.kpis.complete(self.timer.current_day())
+                if self.logger.should_log(Log_Action.SIMULATION_COMPLETED):
+                    self.logger.add_log(
                         Log_Action.SIMULATION_COMPLETED,
                         self.timer.get_timer_info(),
-                        "Simulation completed: reached the last chapter",
-                        {
+                        payload={
                             "rounds_done": self.rounds_done,
                             "current_day": self.current_day,
                             "current_day_session": self.current_day_session,
@@ -823,24 +1192,21 @@ class model:
                             "chapter_level": self.meta_progression.chapter_level
                         }
                     )
-                    break
-                self.meta_progression.chapter_level += 1
+                return False
+            self.meta_progression.chapter_level += 1
 
-        return
+        return True
     
     def daily_free_gachas(self) -> None:
 
-        Logger.add_log(
-            Log_Action.DAILY_FREE_GACHA,
-            self.timer.get_timer_info(),
-            f"Daily free gacha: {self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value]} rare and {self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_EPIC_CHEST.value]} epic",
-            {
-                "free_rare_num": self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value],
-                "free_epic_num": self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_EPIC_CHEST.value]
-            })
-
-        for _ in range(self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value]):
-            self.gacha_system.open_chest(self.meta_progression, ConfigKeys.RARE_CHEST_NAME.value)
+        if self.logger.should_log(Log_Action.DAILY_FREE_GACHA):
+            self.logger.add_log(
+                Log_Action.DAILY_FREE_GACHA,
+                self.timer.get_timer_info(),
+                payload={
+                    "free_rare_num": self.player.free_daily_rare_chest,
+                    "free_epic_num": self.player.free_daily_epic_chest
+                })
 
-        for _ in range(self.player_behavior[ConfigKeys.PLAYER_FREE_DAILY_EPIC_CHEST.value]):
-            self.gacha_system.open_chest(self.meta_progression, ConfigKeys.EPIC_CHEST_NAME.value)
+        self.gacha_system.open_chests(self.meta_progression, ConfigKeys.RARE_CHEST_NAME.value, self.player.free_daily_rare_chest)
+        self.gacha_system.open_chests(self.meta_progression, ConfigKeys.EPIC_CHEST_NAME.value, self.player.free_daily_epic_chest)
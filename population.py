@@ -0,0 +1,458 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compiled_config import CompiledConfig, Chest_table, Merge_rule_table, Player_profile
+from config_import import Config, ConfigKeys
+from gear_types import GEAR_PIECES, GEAR_SETS, Gear_rarity
+from model import Timer
+from rng import Sim_rng, SeedLike
+
+# ---------------------------------------------------------------------------
+# Population engine: P players of one player type stored as struct-of-arrays
+# and advanced in lockstep, one session per step, with the rules of
+# model.simulate. Every player of a population shares the same clock
+# (same sessions per day and session timings), so the Timer is shared too.
+#
+# Array layout (sets and pieces are indices into GEAR_SETS and GEAR_PIECES,
+# rarities index by Gear_rarity value, index 0 unused):
+#   gold            (P,)
+#   designs         (P, pieces)
+#   level           (P, sets, pieces)
+#   rarity_counts   (P, sets, pieces, 7)
+#   piece_rarity_counts (P, pieces, 7)   rarity_counts summed over sets
+#   max_rarity      (P, sets, pieces)    as Gear.max_rarity, only updated by merges
+#   highest_rarity  (P, sets, pieces)    highest rarity with a positive count, 0 if none
+#   equipped_set    (P, pieces)          -1 while nothing is equipped
+#   chapter_level   (P,)
+# ---------------------------------------------------------------------------
+
+N_SETS = len(GEAR_SETS)
+N_PIECES = len(GEAR_PIECES)
+N_RARITY_SLOTS = max(Gear_rarity) + 1
+NOT_EQUIPPED = -1
+
+
+@dataclass
+class Population_state:
+    gold: np.ndarray
+    designs: np.ndarray
+    level: np.ndarray
+    rarity_counts: np.ndarray
+    piece_rarity_counts: np.ndarray
+    max_rarity: np.ndarray
+    highest_rarity: np.ndarray
+    equipped_set: np.ndarray
+    chapter_level: np.ndarray
+    active: np.ndarray
+    finish_day: np.ndarray
+    finish_session: np.ndarray
+    sessions_per_chapter: np.ndarray
+
+    @staticmethod
+    def initialize(n_players: int, total_chapters: int) -> 'Population_state':
+        return Population_state(
+            gold=np.zeros(n_players, dtype=np.float64),
+            designs=np.zeros((n_players, N_PIECES), dtype=np.float64),
+            level=np.zeros((n_players, N_SETS, N_PIECES), dtype=np.int32),
+            rarity_counts=np.zeros((n_players, N_SETS, N_PIECES, N_RARITY_SLOTS), dtype=np.int32),
+            piece_rarity_counts=np.zeros((n_players, N_PIECES, N_RARITY_SLOTS), dtype=np.int32),
+            max_rarity=np.full((n_players, N_SETS, N_PIECES), int(Gear_rarity.COMMON), dtype=np.int8),
+            highest_rarity=np.zeros((n_players, N_SETS, N_PIECES), dtype=np.int8),
+            equipped_set=np.full((n_players, N_PIECES), NOT_EQUIPPED, dtype=np.int8),
+            chapter_level=np.ones(n_players, dtype=np.int32),
+            active=np.ones(n_players, dtype=bool),
+            finish_day=np.zeros(n_players, dtype=np.int32),
+            finish_session=np.zeros(n_players, dtype=np.int32),
+            sessions_per_chapter=np.zeros((n_players, total_chapters + 1), dtype=np.int32),
+        )
+
+    @property
+    def n_players(self) -> int:
+        return len(self.gold)
+
+    def equipped_levels(self) -> np.ndarray:
+        """(P, pieces) level of the equipped gear of every piece, 0 when nothing is equipped."""
+        equipped = self.equipped_set.astype(np.intp)
+        levels = np.take_along_axis(self.level, np.maximum(equipped, 0)[:, None, :], axis=1)[:, 0, :]
+        return np.where(equipped >= 0, levels, 0)
+
+
+@dataclass
+class Merge_step:
+    """One merge requirement: rarity consumed and whether it must come from the same piece / same set."""
+    rarity: int
+    same_piece: bool
+    same_set: bool
+
+
+@dataclass
+class Population_engine:
+    config: CompiledConfig
+    player: Player_profile
+    state: Population_state
+    timer: Timer
+    rng: Sim_rng
+    merge_steps: Dict[int, List[Merge_step]]
+    merge_needs: Dict[int, Optional[List[Tuple[int, int]]]]
+
+    current_day: int
+    current_day_session: int
+    current_session: int
+
+    @staticmethod
+    def initialize(main_config: "Config | CompiledConfig", n_players: int, seed: SeedLike = None, player_type: Optional[str] = None) -> 'Population_engine':
+        """
+        Build a population of n_players players of player_type (the first one flagged to simulate by default).
+        Every player starts with one common gear per piece of a random set, like model.simulate.
+        """
+        config = main_config if isinstance(main_config, CompiledConfig) else CompiledConfig.initialize(main_config)
+        player = config.get_player(player_type)
+        rng = Sim_rng.initialize(seed)
+        timer = Timer.initialize(player.behavior)
+        merge_steps = _merge_steps(config.merge_rules)
+
+        engine = Population_engine(
+            config=config,
+            player=player,
+            state=Population_state.initialize(n_players, config.chapters.total_chapters),
+            timer=timer,
+            rng=rng,
+            merge_steps=merge_steps,
+            merge_needs=_merge_needs(merge_steps),
+            current_day=timer.current_day(),
+            current_day_session=0,
+            current_session=0,
+        )
+
+        players = np.arange(n_players)
+        for piece_index in range(N_PIECES):
+            sets = rng.starter_gear.integers_block(N_SETS, n_players)
+            engine._add_gear(players, sets, np.full(n_players, piece_index), np.full(n_players, int(Gear_rarity.COMMON)))
+
+        return engine
+
+    # -------------------
+    # Session loop
+    # -------------------
+
+    def run(self, max_sessions: int = 1000) -> 'Population_engine':
+        """Step until every player finished the last chapter or max_sessions sessions were played."""
+        while self.current_session < max_sessions and self.state.active.any():
+            self.step()
+        return self
+
+    def step(self) -> None:
+        """Advance every active player by one session."""
+        state = self.state
+        players = np.flatnonzero(state.active)
+        if len(players) == 0:
+            return
+
+        self.current_day_session += 1
+        self.current_session += 1
+
+        # Check max sessions per day
+        if self.current_day_session > self.player.sessions_per_day:
+            self.timer.complete_day()
+            self.timer.new_session()
+            self.current_day_session = 1
+
+        # Daily Gifts
+        if self.timer.current_day() > self.current_day:
+            self.current_day = self.timer.current_day()
+            self._open_chests_for(players, ConfigKeys.RARE_CHEST_NAME.value, self.player.free_daily_rare_chest)
+            self._open_chests_for(players, ConfigKeys.EPIC_CHEST_NAME.value, self.player.free_daily_epic_chest)
+
+        # Purchase Offers
+        for chapter, offer_names in self.player.offer_triggers.items():
+            buyers = players[state.chapter_level[players] == chapter]
+            if len(buyers) == 0:
+                continue
+            for offer_name in offer_names:
+                offer = self.config.offers[offer_name]
+                self._open_chests_for(buyers, ConfigKeys.RARE_CHEST_NAME.value, offer.rare_chest)
+                self._open_chests_for(buyers, ConfigKeys.EPIC_CHEST_NAME.value, offer.epic_chest)
+                if offer.gold > 0:
+                    state.gold[buyers] += offer.gold
+                if offer.designs > 0:
+                    self._add_designs(buyers, offer.designs)
+
+        # Meta Progression Simulation
+        self.timer.increment_meta_progression()
+        self._merge(players)
+        self._level_up(players)
+        self._equip(players)
+
+        # Chapter Simulation
+        self.timer.increment_play_chapter()
+        self._fight(players)
+
+    # -------------------
+    # Meta progression
+    # -------------------
+
+    def _merge(self, players: np.ndarray) -> None:
+        """Gear.merge for every equipped piece and every rarity above common, in rarity order."""
+        state = self.state
+
+        # Merges of different pieces never touch each other's gear, so the level
+        # ordering of the equipped pieces does not change the outcome.
+        for piece_index in range(N_PIECES):
+            equipped = state.equipped_set[players, piece_index].astype(np.intp)
+            candidates = players[equipped >= 0]
+            target_sets = equipped[equipped >= 0]
+            if len(candidates) == 0:
+                continue
+
+            counts = state.rarity_counts[:, :, piece_index, :]
+            totals = state.piece_rarity_counts[:, piece_index, :]
+
+            for target_rarity, steps in self.merge_steps.items():
+                needed = self.merge_needs[target_rarity]
+                if needed is None:
+                    # Requirements on another piece never match any gear
+                    continue
+
+                # Enough gear of every consumed rarity across sets: a cheap necessary condition
+                enough = np.ones(len(candidates), dtype=bool)
+                for rarity, amount in needed:
+                    enough &= totals[candidates, rarity] >= amount
+                alive = np.flatnonzero(enough)
+                taken = []
+
+                for step in steps:
+                    if len(alive) == 0:
+                        break
+                    who = candidates[alive]
+                    if step.same_set:
+                        sets = target_sets[alive]
+                        available = counts[who, sets, step.rarity] > 0
+                    else:
+                        has = counts[who, :, step.rarity] > 0
+                        sets = has.argmax(axis=1)
+                        available = has[np.arange(len(alive)), sets]
+
+                    alive = alive[available]
+                    sets = sets[available]
+                    counts[candidates[alive], sets, step.rarity] -= 1
+                    taken.append((alive, sets, step.rarity))
+
+                merged = np.zeros(len(candidates), dtype=bool)
+                merged[alive] = True
+
+                # Give back what failed merges consumed
+                for rows, sets, rarity in taken:
+                    failed = ~merged[rows]
+                    counts[candidates[rows[failed]], sets[failed], rarity] += 1
+                    consumed = candidates[rows[~failed]]
+                    totals[consumed, rarity] -= 1
+                    self._refresh_highest_rarity(consumed, sets[~failed], piece_index)
+
+                if len(alive) == 0:
+                    continue
+                who = candidates[alive]
+                merged_sets = target_sets[alive]
+                counts[who, merged_sets, target_rarity] += 1
+                totals[who, target_rarity] += 1
+                self._refresh_highest_rarity(who, merged_sets, piece_index)
+
+                highest = state.highest_rarity[who, merged_sets, piece_index]
+                state.max_rarity[who, merged_sets, piece_index] = np.where(highest > 0, highest, int(Gear_rarity.COMMON))
+
+    def _refresh_highest_rarity(self, players: np.ndarray, sets: np.ndarray, piece_index: int) -> None:
+        """Recompute highest_rarity of the given gear after their counts changed."""
+        if len(players) == 0:
+            return
+        owned = self.state.rarity_counts[players, sets, piece_index, :] > 0
+        highest = N_RARITY_SLOTS - 1 - owned[:, ::-1].argmax(axis=1)
+        self.state.highest_rarity[players, sets, piece_index] = np.where(owned.any(axis=1), highest, 0)
+
+    def _level_up(self, players: np.ndarray) -> None:
+        """Gear.level_up for every gear, lowest level first (stable, inventory order on ties)."""
+        state = self.state
+        levels_table = self.config.gear_levels
+        max_level = levels_table.max_level
+        if max_level == 0:
+            return
+
+        gold_cost = levels_table.gold_cost
+        design_cost = levels_table.design_cost
+        required_rarity = levels_table.required_rarity
+
+        flat_level = state.level.reshape(state.n_players, N_SETS * N_PIECES)
+        piece_of_gear = np.tile(np.arange(N_PIECES), N_SETS)
+
+        # Gold and designs only go down while levelling and rarities do not change,
+        # so a gear that cannot pay its next level now will not later in this pass.
+        levels = flat_level[players]
+        next_level = np.minimum(levels + 1, max_level)
+        affordable = (
+            (levels < max_level)
+            & (gold_cost[next_level] <= state.gold[players, None])
+            & (design_cost[next_level] <= state.designs[players][:, piece_of_gear])
+        )
+        keep = affordable.any(axis=1)
+        players, levels, next_level, affordable = players[keep], levels[keep], next_level[keep], affordable[keep]
+        if len(players) == 0:
+            return
+
+        highest = state.highest_rarity.reshape(state.n_players, N_SETS * N_PIECES)[players]
+        affordable &= highest >= required_rarity[next_level]
+
+        order = np.argsort(levels, axis=1, kind="stable")
+        affordable_in_order = np.take_along_axis(affordable, order, axis=1)
+
+        for rank in range(N_SETS * N_PIECES):
+            rows = np.flatnonzero(affordable_in_order[:, rank])
+            if len(rows) == 0:
+                continue
+            gears = order[rows, rank]
+            pieces = piece_of_gear[gears]
+            owned_rarity = highest[rows, gears]
+            who = players[rows]
+
+            # Greedy climb, one level per pass, for the players that can still pay
+            while len(who):
+                expected_level = flat_level[who, gears] + 1
+                in_table = expected_level <= max_level
+                expected_level = np.minimum(expected_level, max_level)
+
+                can = (
+                    in_table
+                    & (state.gold[who] >= gold_cost[expected_level])
+                    & (state.designs[who, pieces] >= design_cost[expected_level])
+                    & (owned_rarity >= required_rarity[expected_level])
+                )
+                who, gears, pieces, owned_rarity, expected_level = who[can], gears[can], pieces[can], owned_rarity[can], expected_level[can]
+                state.gold[who] -= gold_cost[expected_level]
+                state.designs[who, pieces] -= design_cost[expected_level]
+                flat_level[who, gears] = expected_level
+
+    def _equip(self, players: np.ndarray) -> None:
+        """Equip the highest level gear of every piece when it beats the equipped one."""
+        state = self.state
+        for piece_index in range(N_PIECES):
+            levels = state.level[players, :, piece_index]
+            best_set = levels.argmax(axis=1)
+            best_level = levels[np.arange(len(players)), best_set]
+
+            equipped = state.equipped_set[players, piece_index].astype(np.intp)
+            equipped_level = np.where(equipped >= 0, levels[np.arange(len(players)), np.maximum(equipped, 0)], -1)
+
+            better = (best_level > 0) & (best_level > equipped_level)
+            state.equipped_set[players[better], piece_index] = best_set[better]
+
+    # -------------------
+    # Chapter
+    # -------------------
+
+    def _fight(self, players: np.ndarray) -> None:
+        state = self.state
+        chapters = self.config.chapters
+
+        chapter_level = state.chapter_level[players]
+        player_points = state.equipped_levels()[players].sum(axis=1)
+        victory = player_points >= chapters.required_points[chapter_level]
+
+        state.gold[players] += np.where(victory, chapters.win_reward_gold[chapter_level], chapters.lose_reward_gold[chapter_level])
+        self._add_designs(players, np.where(victory, chapters.win_reward_designs[chapter_level], chapters.lose_reward_designs[chapter_level]))
+
+        # One reward chest per player, grouped by chest name
+        chest_names = np.asarray(chapters.win_reward_gacha, dtype=object)[chapter_level]
+        chest_names = np.where(victory, chest_names, np.asarray(chapters.lose_reward_gacha, dtype=object)[chapter_level])
+        for chest_name in set(chest_names.tolist()):
+            self._open_chests_for(players[chest_names == chest_name], chest_name, 1)
+
+        state.sessions_per_chapter[players, chapter_level] += 1
+
+        # If victory, go to next chapter; winning the last chapter completes the run
+        winners = players[victory]
+        completed = winners[state.chapter_level[winners] == chapters.total_chapters]
+        state.active[completed] = False
+        state.finish_day[completed] = self.current_day
+        state.finish_session[completed] = self.current_session
+        state.chapter_level[winners[state.chapter_level[winners] < chapters.total_chapters]] += 1
+
+    # -------------------
+    # Inventory
+    # -------------------
+
+    def _add_gear(self, players: np.ndarray, sets: np.ndarray, pieces: np.ndarray, rarities: np.ndarray) -> None:
+        """Player_meta_progression.add_gear for one gear per entry; players may repeat."""
+        state = self.state
+        np.add.at(state.rarity_counts, (players, sets, pieces, rarities), 1)
+        np.add.at(state.piece_rarity_counts, (players, pieces, rarities), 1)
+        np.maximum.at(state.highest_rarity, (players, sets, pieces), rarities.astype(np.int8))
+        state.level[players, sets, pieces] = np.maximum(state.level[players, sets, pieces], 1)
+
+    def _add_designs(self, players: np.ndarray, amounts) -> None:
+        """Player_meta_progression.add_designs: every player's amount goes to one random piece."""
+        pieces = self.rng.designs.integers_block(N_PIECES, len(players))
+        np.add.at(self.state.designs, (players, pieces), amounts)
+
+    def _open_chests_for(self, players: np.ndarray, chest_name: str, k: int) -> None:
+        """Every player in players opens k chests of chest_name."""
+        if k <= 0 or len(players) == 0:
+            return
+        chest: Chest_table = self.config.chests[chest_name]
+        n_draws = len(players) * k
+        outcomes = chest.alias.sample(
+            self.rng.chests.integers_block(len(chest.alias.prob), n_draws),
+            self.rng.chests.random_block(n_draws),
+        )
+        self._add_gear(np.repeat(players, k), chest.outcome_set[outcomes], chest.outcome_piece[outcomes], chest.outcome_rarity[outcomes])
+
+    # -------------------
+    # Results
+    # -------------------
+
+    def kpis_df(self) -> pd.DataFrame:
+        """One row per player: completion, finish day and session, chapter reached, final resources."""
+        state = self.state
+        completed = ~state.active & (state.finish_session > 0)
+        df = pd.DataFrame({
+            "completed": completed,
+            "days_to_finish": np.where(completed, state.finish_day, np.nan),
+            "sessions_to_finish": np.where(completed, state.finish_session, np.nan),
+            "final_chapter": state.chapter_level,
+            "final_gold": state.gold,
+            "final_designs": state.designs.sum(axis=1),
+        })
+        for piece_index, piece in enumerate(GEAR_PIECES):
+            df[f"{piece.value.strip()}_gear_level"] = state.equipped_levels()[:, piece_index]
+        return df
+
+    def sessions_per_chapter_df(self) -> pd.DataFrame:
+        """Sessions spent on every chapter, one row per player and one column per chapter."""
+        return pd.DataFrame(self.state.sessions_per_chapter[:, 1:], columns=range(1, self.config.chapters.total_chapters + 1))
+
+
+def _merge_steps(merge_rules: Merge_rule_table) -> Dict[int, List[Merge_step]]:
+    """Merge requirements per target rarity, in the order Gear.merge checks them."""
+    steps: Dict[int, List[Merge_step]] = {
+        int(target_rarity): [Merge_step(rarity=int(t.rarity), same_piece=t.same_piece, same_set=t.same_set) for t in templates]
+        for target_rarity, templates in merge_rules.templates.items()
+    }
+
+    # Gear.merge tries every rarity above common in rarity order
+    missing = [str(rarity) for rarity in Gear_rarity if rarity != Gear_rarity.COMMON and int(rarity) not in steps]
+    if missing:
+        raise KeyError(f"Merge config has no rule for target rarities {missing}")
+    return {int(rarity): steps[int(rarity)] for rarity in Gear_rarity if rarity != Gear_rarity.COMMON}
+
+
+def _merge_needs(merge_steps: Dict[int, List[Merge_step]]) -> Dict[int, Optional[List[Tuple[int, int]]]]:
+    """(rarity, amount) of same-piece gear each merge consumes; None when a requirement can never match."""
+    needs: Dict[int, Optional[List[Tuple[int, int]]]] = {}
+    for target_rarity, steps in merge_steps.items():
+        if not all(step.same_piece for step in steps):
+            needs[target_rarity] = None
+            continue
+        needed: Dict[int, int] = {}
+        for step in steps:
+            needed[step.rarity] = needed.get(step.rarity, 0) + 1
+        needs[target_rarity] = sorted(needed.items())
+    return needs
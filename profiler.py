@@ -0,0 +1,166 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from logger import Logger
+
+# ---------------------------------------------------------------------------
+# Opt-in profiler of one run: wall time and calls per phase, per session and
+# overall, plus counters of the hot paths (chests opened, merge attempts and
+# successes, level-up steps, log events). Phases are timed by wrapping the
+# methods of the run's own components, so a run without a profiler executes
+# exactly the code it always did; counters cost one None check when off.
+# model.simulate unwraps them when the run ends, also when it raises.
+# ---------------------------------------------------------------------------
+
+# (component attribute of the model, method, phase); times are inclusive, so
+# "meta_progression" contains "merge", "level_up" and "equip", and "chapter"
+# contains the chests its rewards open.
+PHASE_METHODS: Tuple[Tuple[Optional[str], str, str], ...] = (
+    ("meta_progression", "simulate", "meta_progression"),
+    ("meta_progression", "merge_gear", "merge"),
+    ("meta_progression", "level_up_gear", "level_up"),
+    ("meta_progression", "equip_gear", "equip"),
+    ("meta_progression", "apply_offer", "offers"),
+    ("chapters", "simulate", "chapter"),
+    ("gacha_system", "open_chest", "open_chest"),
+    ("gacha_system", "open_chests", "open_chests"),
+    (None, "daily_free_gachas", "daily_free_gachas"),
+    ("logger", "add_log", "log"),
+)
+
+
+@dataclass
+class Profile_report:
+    total_seconds: float
+    phases: pd.DataFrame
+    counters: Dict[str, int]
+    sessions: pd.DataFrame
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain structure of the report, for JSON."""
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": self.phases.reset_index().to_dict(orient="records"),
+            "counters": dict(self.counters),
+            "sessions": self.sessions.reset_index().to_dict(orient="records"),
+        }
+
+
+@dataclass
+class Sim_profiler:
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+    phase_calls: Dict[str, int] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    session_rows: List[Dict[str, Any]] = field(default_factory=list)
+    total_seconds: float = 0.0
+    _session_seconds: Dict[str, float] = field(default_factory=dict, repr=False)
+    _session_counters: Dict[str, int] = field(default_factory=dict, repr=False)
+    _originals: List[Tuple[Any, str]] = field(default_factory=list, repr=False)
+    _started: Optional[float] = field(default=None, repr=False)
+
+    def attach(self, model_instance) -> None:
+        """
+        Time the phases of model_instance's components and route their counters here.
+        A run logging to the process-wide Logger.default() has no "log" phase: that logger is shared
+        with every other run, so wrapping it would time their events too.
+        """
+        model_instance.profiler = self
+        model_instance.meta_progression.profiler = self
+        for component_name, method_name, phase in PHASE_METHODS:
+            owner = model_instance if component_name is None else getattr(model_instance, component_name)
+            if owner is Logger.default():
+                continue
+            self._wrap(owner, method_name, phase)
+
+    def detach(self) -> None:
+        """Restore the wrapped methods; the profiler keeps what it measured."""
+        for owner, method_name in self._originals:
+            # The wrapper lives in the instance dict; removing it exposes the class method again
+            owner.__dict__.pop(method_name, None)
+        self._originals.clear()
+
+    def _wrap(self, owner: Any, method_name: str, phase: str) -> None:
+        if method_name in owner.__dict__:
+            return
+        original = getattr(owner, method_name)
+        counts_chests = method_name in ("open_chest", "open_chests")
+        record = self._record
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(phase, time.perf_counter() - start)
+                if counts_chests:
+                    # open_chest(meta, name) opens one, open_chests(meta, name, k) opens k
+                    self.count("chests_opened", max(0, args[2] if len(args) > 2 else kwargs.get("k", 1)))
+
+        owner.__dict__[method_name] = timed
+        self._originals.append((owner, method_name))
+
+    def _record(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        self._session_seconds[phase] = self._session_seconds.get(phase, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+        self._session_counters[name] = self._session_counters.get(name, 0) + amount
+
+    def count_merge(self, success: bool) -> None:
+        self.count("merge_attempts")
+        if success:
+            self.count("merge_successes")
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+
+    def end_session(self, session: int, day: int) -> None:
+        """Close the session: its phase times and counters become one row of the per-session table."""
+        row: Dict[str, Any] = {"session": session, "day": day}
+        row.update({f"{phase}_seconds": seconds for phase, seconds in self._session_seconds.items()})
+        row.update(self._session_counters)
+        self.session_rows.append(row)
+        self._session_seconds = {}
+        self._session_counters = {}
+
+    def pause(self) -> None:
+        """Stop the run clock, keeping the components wrapped; start resumes it."""
+        if self._started is not None:
+            self.total_seconds += time.perf_counter() - self._started
+            self._started = None
+
+    def finish(self) -> None:
+        """Stop the run clock and unwrap the components."""
+        self.pause()
+        self.detach()
+
+    def report(self) -> Profile_report:
+        phases = pd.DataFrame(
+            {
+                "calls": pd.Series(self.phase_calls, dtype="int64"),
+                "total_seconds": pd.Series(self.phase_seconds, dtype="float64"),
+            }
+        )
+        phases.index.name = "phase"
+        if len(phases):
+            phases["mean_microseconds"] = phases["total_seconds"] / phases["calls"] * 1e6
+            phases["share_of_run"] = phases["total_seconds"] / self.total_seconds if self.total_seconds else float("nan")
+            phases = phases.sort_values("total_seconds", ascending=False)
+
+        sessions = pd.DataFrame(self.session_rows)
+        if len(sessions):
+            phase_columns = [f"{phase}_seconds" for _, _, phase in PHASE_METHODS if f"{phase}_seconds" in sessions.columns]
+            counter_columns = sorted(column for column in sessions.columns if column not in phase_columns and column not in ("session", "day"))
+            sessions = sessions.set_index("session")[["day"] + phase_columns + counter_columns].fillna(0)
+
+        return Profile_report(
+            total_seconds=self.total_seconds,
+            phases=phases,
+            counters=dict(self.counters),
+            sessions=sessions,
+        )
@@ -0,0 +1,249 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compiled_config import CompiledConfig
+from logger import Columnar_log
+
+if TYPE_CHECKING:
+    from batch import Run_result
+
+# ---------------------------------------------------------------------------
+# Result cache: finished runs stored on disk under a hash of everything that
+# determines them (config tables, player type, seed, run options and engine
+# version), so identical simulations are computed once. Least recently used
+# entries are evicted beyond a size bound.
+# An entry is <key>.run: a magic header, a format byte and a zlib compressed
+# npz holding the curves plus the scalar KPIs as JSON, so reading it never
+# unpickles anything. A stored event log sits beside it in <key>.log/, one
+# Parquet file per action as Columnar_log.to_parquet writes them. An entry
+# that cannot be read is a cache miss.
+# ---------------------------------------------------------------------------
+
+# Bump when a change to the simulation alters the runs of an unchanged config and seed.
+# The engine modules' source is hashed in as well, so edits to them never serve stale results.
+ENGINE_VERSION = "1"
+ENGINE_MODULES = ("model.py", "compiled_config.py", "rng.py", "gear_types.py", "logger.py", "kpi_aggregator.py", "batch.py")
+
+RESULT_CACHE_DIR_ENV = "CUPHEROES_RESULT_CACHE_DIR"
+DEFAULT_RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".result_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Eviction frees down to this share of max_bytes, so a full cache does not evict on every put
+EVICTION_TARGET = 0.9
+ENTRY_SUFFIX = ".run"
+LOG_SUFFIX = ".log"
+ENTRY_MAGIC = b"CHRUN"
+ENTRY_FORMAT = 1
+CURVES = ("gold_curve", "designs_curve", "chapter_curve")
+# What an unreadable or foreign entry can raise while being decoded
+_ENTRY_ERRORS = (OSError, ValueError, KeyError, TypeError, zlib.error, zipfile.BadZipFile)
+
+_engine_version: Optional[str] = None
+
+
+def engine_version() -> str:
+    """ENGINE_VERSION plus a short hash of the engine modules' source."""
+    global _engine_version
+    if _engine_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for module in ENGINE_MODULES:
+            with open(os.path.join(directory, module), "rb") as f:
+                digest.update(f.read())
+        _engine_version = f"{ENGINE_VERSION}-{digest.hexdigest()[:12]}"
+    return _engine_version
+
+
+def run_key(config: CompiledConfig, seed: int, model_options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key of one run: model_options are the model.initialize options it used, e.g. player_type or max_days.
+    The player type is resolved first, so None and the default type share entries.
+    """
+    options = dict(model_options or {})
+    player_type = options.pop("player_type", None)
+    content = {
+        "config": config.content_hash,
+        "player_type": config.get_player(player_type).player_type,
+        "seed": int(seed),
+        "options": options,
+        "engine": engine_version(),
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class Cached_run:
+    result: 'Run_result'
+    # Parquet directory of the run's event log, when it was stored; a log source for log_sinks.read_log
+    log_dir: Optional[str] = None
+
+
+def _encode_result(result: 'Run_result', has_log: bool) -> bytes:
+    state = {
+        "run_index": result.run_index,
+        "seed": result.seed,
+        "completed": result.completed,
+        "days_to_finish": result.days_to_finish,
+        "final_day": result.final_day,
+        "final_chapter": result.final_chapter,
+        "total_sessions": result.total_sessions,
+        # JSON keys are strings; chapters go as pairs
+        "sessions_per_chapter": [[int(chapter), int(count)] for chapter, count in result.sessions_per_chapter.items()],
+        "has_log": has_log,
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, state=np.frombuffer(json.dumps(state).encode("utf-8"), dtype=np.uint8),
+             **{name: np.asarray(getattr(result, name)) for name in CURVES})
+    return ENTRY_MAGIC + bytes([ENTRY_FORMAT]) + zlib.compress(buffer.getvalue())
+
+
+def _decode_result(data: bytes) -> Tuple['Run_result', bool]:
+    from batch import Run_result
+
+    header = len(ENTRY_MAGIC)
+    if data[:header] != ENTRY_MAGIC or data[header] != ENTRY_FORMAT:
+        raise ValueError("Not a result cache entry of this format.")
+    with np.load(io.BytesIO(zlib.decompress(data[header + 1:])), allow_pickle=False) as archive:
+        state = json.loads(archive["state"].tobytes().decode("utf-8"))
+        curves = {name: archive[name] for name in CURVES}
+
+    has_log = state.pop("has_log")
+    state["sessions_per_chapter"] = {chapter: count for chapter, count in state["sessions_per_chapter"]}
+    return Run_result(**state, **curves), has_log
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.path.getsize(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+@dataclass
+class Result_cache:
+    directory: str
+    max_bytes: int = DEFAULT_MAX_BYTES
+    # Running size estimate, so puts do not list the directory; other processes' writes are caught at eviction
+    _size: Optional[int] = field(default=None, repr=False, compare=False)
+
+    @staticmethod
+    def initialize(directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> 'Result_cache':
+        """Cache in directory, CUPHEROES_RESULT_CACHE_DIR or .result_cache next to this file by default."""
+        directory = directory or os.environ.get(RESULT_CACHE_DIR_ENV, DEFAULT_RESULT_CACHE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return Result_cache(directory=directory, max_bytes=max_bytes)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _log_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key + LOG_SUFFIX)
+
+    def get(self, key: str, with_log: bool = False) -> Optional[Cached_run]:
+        """
+        The cached run, or None. with_log also requires the event log to have been stored.
+        An entry that cannot be read counts as a miss. A hit refreshes the entry's last use.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result, has_log = _decode_result(f.read())
+        except _ENTRY_ERRORS:
+            return None
+
+        log_dir = self._log_dir(key) if has_log and os.path.isdir(self._log_dir(key)) else None
+        if with_log and log_dir is None:
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return Cached_run(result=result, log_dir=log_dir)
+
+    def put(self, key: str, result: 'Run_result', event_log: Optional[Columnar_log] = None) -> None:
+        """Store a run, with its event log if given, then evict down to max_bytes."""
+        log_dir = self._log_dir(key)
+        _remove(log_dir)
+        if event_log is not None:
+            # Written under a temporary name first, so a reader never finds half a log
+            temp_dir = tempfile.mkdtemp(dir=self.directory, suffix=".tmp")
+            event_log.to_parquet(temp_dir)
+            os.replace(temp_dir, log_dir)
+
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(_encode_result(result, event_log is not None))
+        os.replace(temp_path, self._path(key))
+
+        if self._size is None:
+            self._size = self.size_bytes()
+        else:
+            self._size += os.path.getsize(self._path(key)) + _tree_size(log_dir)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(last use, size with its log, path) of every entry."""
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size + _tree_size(path[:-len(ENTRY_SUFFIX)] + LOG_SUFFIX), path))
+        return entries
+
+    def _remove_entry(self, path: str) -> None:
+        _remove(path)
+        _remove(path[:-len(ENTRY_SUFFIX)] + LOG_SUFFIX)
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries once the cache exceeds max_bytes, down to EVICTION_TARGET of it."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICTION_TARGET:
+                    break
+                self._remove_entry(path)
+                total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            self._remove_entry(path)
+        self._size = 0
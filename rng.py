@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Seeded random streams: one root seed per simulation, one spawned substream
+# per subsystem, so runs are reproducible and never share generator state.
+# ---------------------------------------------------------------------------
+
+SeedLike = Union[None, int, np.random.SeedSequence]
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class Block_sampler:
+    """
+    Serves draws of one generator from pre-sampled blocks.
+    The hot paths ask for one number at a time; drawing them in blocks keeps that a list index
+    instead of a numpy call per number. Bulk draws go straight to the generator.
+    Every block remembers the generator state it was drawn from, so get_state can describe
+    the pending draws in a few hundred bytes instead of the blocks themselves.
+    """
+
+    def __init__(self, generator: np.random.Generator, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.generator = generator
+        self.block_size = block_size
+        self._integer_blocks: Dict[int, List[int]] = {}
+        self._integer_positions: Dict[int, int] = {}
+        self._integer_block_states: Dict[int, Dict[str, Any]] = {}
+        self._random_block: List[float] = []
+        self._random_position = 0
+        self._random_block_state: Optional[Dict[str, Any]] = None
+
+    def integers(self, high: int) -> int:
+        """Uniform integer in [0, high)."""
+        block = self._integer_blocks.get(high)
+        position = self._integer_positions.get(high, 0)
+
+        if block is None or position >= len(block):
+            self._integer_block_states[high] = self.generator.bit_generator.state
+            block = self.generator.integers(0, high, size=self.block_size).tolist()
+            self._integer_blocks[high] = block
+            position = 0
+
+        self._integer_positions[high] = position + 1
+        return block[position]
+
+    def random(self) -> float:
+        """Uniform float in [0, 1)."""
+        if self._random_position >= len(self._random_block):
+            self._random_block_state = self.generator.bit_generator.state
+            self._random_block = self.generator.random(self.block_size).tolist()
+            self._random_position = 0
+
+        value = self._random_block[self._random_position]
+        self._random_position += 1
+        return value
+
+    def integers_block(self, high: int, size: int) -> np.ndarray:
+        """size uniform integers in [0, high) in one call."""
+        return self.generator.integers(0, high, size=size)
+
+    def random_block(self, size: int) -> np.ndarray:
+        """size uniform floats in [0, 1) in one call."""
+        return self.generator.random(size)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Generator state plus, per pending block, the state it was drawn from and the position reached."""
+        integer_blocks: Dict[int, Tuple[Dict[str, Any], int]] = {
+            high: (self._integer_block_states[high], self._integer_positions.get(high, 0))
+            for high in self._integer_blocks
+        }
+        random_block = (self._random_block_state, self._random_position) if self._random_block_state is not None else None
+        return {
+            "block_size": self.block_size,
+            "generator": self.generator.bit_generator.state,
+            "integer_blocks": integer_blocks,
+            "random_block": random_block,
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Continue exactly where the sampler that gave state was: its blocks are redrawn, then the generator is set."""
+        if state["block_size"] != self.block_size:
+            raise ValueError(f"State of a sampler with blocks of {state['block_size']} draws, this one draws {self.block_size}.")
+
+        bit_generator = self.generator.bit_generator
+        self._integer_blocks = {}
+        self._integer_positions = {}
+        self._integer_block_states = {}
+        for high, (block_state, position) in state["integer_blocks"].items():
+            bit_generator.state = block_state
+            self._integer_blocks[high] = self.generator.integers(0, high, size=self.block_size).tolist()
+            self._integer_positions[high] = position
+            self._integer_block_states[high] = block_state
+
+        self._random_block = []
+        self._random_position = 0
+        self._random_block_state = None
+        if state["random_block"] is not None:
+            block_state, position = state["random_block"]
+            bit_generator.state = block_state
+            self._random_block = self.generator.random(self.block_size).tolist()
+            self._random_position = position
+            self._random_block_state = block_state
+
+        bit_generator.state = state["generator"]
+
+
+@dataclass
+class Sim_rng:
+    seed_sequence: np.random.SeedSequence
+    chests: Block_sampler
+    designs: Block_sampler
+    starter_gear: Block_sampler
+    log_sampling: Block_sampler
+
+    @staticmethod
+    def initialize(seed: SeedLike = None, block_size: int = DEFAULT_BLOCK_SIZE) -> 'Sim_rng':
+        """
+        Build the generators of one simulation from a root seed.
+        None draws fresh entropy from the OS; the entropy stays in seed_sequence so the run can be replayed.
+        """
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+        # spawn() would advance the caller's SeedSequence; a child built from the same
+        # entropy keeps the subsystem streams a pure function of the seed.
+        root = np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key)
+        # New streams are spawned after the existing ones, which keeps those unchanged for the same seed
+        chests_seed, designs_seed, starter_gear_seed, log_sampling_seed = root.spawn(4)
+
+        return Sim_rng(
+            seed_sequence=seed_sequence,
+            chests=Block_sampler(np.random.default_rng(chests_seed), block_size),
+            designs=Block_sampler(np.random.default_rng(designs_seed), block_size),
+            starter_gear=Block_sampler(np.random.default_rng(starter_gear_seed), block_size),
+            log_sampling=Block_sampler(np.random.default_rng(log_sampling_seed), block_size),
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        """Root seed and the state of every stream, for checkpoints."""
+        return {
+            "entropy": self.seed_sequence.entropy,
+            "spawn_key": tuple(self.seed_sequence.spawn_key),
+            "chests": self.chests.get_state(),
+            "designs": self.designs.get_state(),
+            "starter_gear": self.starter_gear.get_state(),
+            "log_sampling": self.log_sampling.get_state(),
+        }
+
+    @staticmethod
+    def from_state(state: Dict[str, Any]) -> 'Sim_rng':
+        """The streams get_state described, each continuing where it was."""
+        rng = Sim_rng.initialize(
+            np.random.SeedSequence(state["entropy"], spawn_key=state["spawn_key"]),
+            block_size=state["chests"]["block_size"],
+        )
+        rng.chests.set_state(state["chests"])
+        rng.designs.set_state(state["designs"])
+        rng.starter_gear.set_state(state["starter_gear"])
+        # Checkpoints taken before the stream existed start it fresh from the seed
+        if "log_sampling" in state:
+            rng.log_sampling.set_state(state["log_sampling"])
+        return rng
+
+
+def spawn_run_seeds(seed: SeedLike, n_runs: int) -> List[np.random.SeedSequence]:
+    """Independent root seeds for n_runs simulations derived from one batch seed."""
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return root.spawn(n_runs)
@@ -0,0 +1,307 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from batch import simulate_run, spawn_seeds
+from compiled_config import CompiledConfig
+from config_import import Config, CONFIG_WORKSHEETS
+from result_cache import Result_cache, run_key
+
+# ---------------------------------------------------------------------------
+# Parameter sweeps: a base Config, a declared space of config cells to vary,
+# a design of points in that space (grid, random or Latin hypercube) and M
+# seeded runs per point, spread over a process pool.
+# ---------------------------------------------------------------------------
+
+SWEEP_MODES = ("set", "scale")
+SWEEP_DESIGNS = ("grid", "random", "lhs")
+
+
+@dataclass(frozen=True)
+class Sweep_parameter:
+    """
+    One swept quantity: a column of a config sheet, on the rows matching match (all rows by default).
+    'set' writes the value into those cells, 'scale' multiplies their numeric values by it.
+    """
+    name: str
+    sheet: str
+    column: str
+    low: float = 0.0
+    high: float = 1.0
+    match: Dict[str, Any] = field(default_factory=dict)
+    mode: str = "set"
+    values: Optional[Sequence[float]] = None
+    integer: bool = False
+
+    def __post_init__(self):
+        if self.sheet not in CONFIG_WORKSHEETS:
+            raise ValueError(f"Unknown config sheet {self.sheet}, expected one of {list(CONFIG_WORKSHEETS)}")
+        if self.mode not in SWEEP_MODES:
+            raise ValueError(f"Unknown sweep mode {self.mode}, expected one of {SWEEP_MODES}")
+
+    @staticmethod
+    def initialize(spec: Dict[str, Any]) -> 'Sweep_parameter':
+        """Parameter from its JSON description, e.g. {"name": ..., "sheet": "gacha_df", "column": "epic", ...}."""
+        return Sweep_parameter(**spec)
+
+    def from_unit(self, unit: np.ndarray) -> np.ndarray:
+        """Map samples in [0, 1) onto the parameter: its discrete values if given, [low, high] otherwise."""
+        if self.values is not None:
+            indices = np.minimum((unit * len(self.values)).astype(int), len(self.values) - 1)
+            return np.asarray(self.values, dtype=float)[indices]
+        values = self.low + unit * (self.high - self.low)
+        return np.round(values) if self.integer else values
+
+    def grid_values(self, levels: int) -> np.ndarray:
+        if self.values is not None:
+            return np.asarray(self.values, dtype=float)
+        values = np.linspace(self.low, self.high, levels)
+        return np.unique(np.round(values)) if self.integer else values
+
+    def apply(self, df: pd.DataFrame, value: float) -> pd.DataFrame:
+        """Copy of the sheet with the parameter set to value."""
+        if self.column not in df.columns:
+            raise ValueError(f"Sheet {self.sheet} has no column {self.column}")
+
+        rows = np.ones(len(df), dtype=bool)
+        for column, expected in self.match.items():
+            rows &= (df[column] == expected).to_numpy()
+        if not rows.any():
+            raise ValueError(f"No row of sheet {self.sheet} matches {self.match}")
+
+        df = df.copy()
+        if df[self.column].dtype != object:
+            df[self.column] = df[self.column].astype(object)
+
+        value = int(value) if self.integer else float(value)
+        for label in df.index[rows]:
+            current = df.at[label, self.column]
+            if self.mode == "set":
+                df.at[label, self.column] = value
+            elif isinstance(current, (int, float, np.number)) and not isinstance(current, bool):
+                scaled = current * value
+                df.at[label, self.column] = int(round(scaled)) if self.integer else scaled
+            # 'scale' leaves blank and text cells as they are
+
+        return df
+
+
+@dataclass
+class Sweep_space:
+    parameters: List[Sweep_parameter]
+
+    @staticmethod
+    def initialize(specs: Sequence[Dict[str, Any]]) -> 'Sweep_space':
+        parameters = [Sweep_parameter.initialize(spec) for spec in specs]
+        names = [parameter.name for parameter in parameters]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Sweep parameter names must be unique, got {names}")
+        return Sweep_space(parameters=parameters)
+
+    @property
+    def names(self) -> List[str]:
+        return [parameter.name for parameter in self.parameters]
+
+    def _points(self, unit: np.ndarray) -> pd.DataFrame:
+        columns = {parameter.name: parameter.from_unit(unit[:, i]) for i, parameter in enumerate(self.parameters)}
+        return pd.DataFrame(columns, index=pd.RangeIndex(len(unit), name="point_id"))
+
+    def grid(self, levels: int = 5) -> pd.DataFrame:
+        """Every combination of levels evenly spaced values per parameter (or of its discrete values)."""
+        axes = [parameter.grid_values(levels) for parameter in self.parameters]
+        points = list(itertools.product(*axes))
+        return pd.DataFrame(points, columns=self.names, index=pd.RangeIndex(len(points), name="point_id"))
+
+    def random(self, n_points: int, seed: Optional[int] = None) -> pd.DataFrame:
+        """n_points drawn uniformly over the space."""
+        rng = np.random.default_rng(seed)
+        return self._points(rng.random((n_points, len(self.parameters))))
+
+    def latin_hypercube(self, n_points: int, seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        n_points Latin-hypercube samples: every parameter range is cut into n_points strata and each
+        stratum is sampled exactly once, covering every axis evenly with far fewer points than a grid.
+        """
+        rng = np.random.default_rng(seed)
+        strata = np.column_stack([rng.permutation(n_points) for _ in self.parameters]) if self.parameters else np.empty((n_points, 0))
+        unit = (strata + rng.random(strata.shape)) / n_points
+        return self._points(unit)
+
+    def design(self, design: str, n_points: Optional[int] = None, levels: int = 5, seed: Optional[int] = None) -> pd.DataFrame:
+        """Design points by name: 'grid' (levels per axis), 'random' or 'lhs' (n_points)."""
+        if design == "grid":
+            return self.grid(levels)
+        if n_points is None:
+            raise ValueError(f"Design {design} needs n_points")
+        if design == "random":
+            return self.random(n_points, seed)
+        if design == "lhs":
+            return self.latin_hypercube(n_points, seed)
+        raise ValueError(f"Unknown design {design}, expected one of {SWEEP_DESIGNS}")
+
+    def apply(self, base: Config, point: Dict[str, float]) -> Config:
+        """Copy of base with every parameter set to its value at point; untouched sheets are shared."""
+        sheets = {}
+        for parameter in self.parameters:
+            df = sheets.get(parameter.sheet, getattr(base, parameter.sheet))
+            sheets[parameter.sheet] = parameter.apply(df, point[parameter.name])
+        return replace(base, **sheets)
+
+
+# Each worker process receives the base config and the space once, through the pool initializer.
+_worker_base: Optional[Config] = None
+_worker_space: Optional[Sweep_space] = None
+_worker_model_options: Dict[str, Any] = {}
+_worker_cache: Optional[Result_cache] = None
+
+def _init_worker(base: Config, space: Sweep_space, model_options: Optional[Dict[str, Any]] = None, cache: Optional[Result_cache] = None) -> None:
+    global _worker_base, _worker_space, _worker_model_options, _worker_cache
+    _worker_base = base
+    _worker_space = space
+    _worker_model_options = model_options or {}
+    _worker_cache = cache
+
+def _run_point(task: tuple) -> pd.DataFrame:
+    point_id, point, seeds = task
+
+    # One compile per point, shared by all its seeds
+    config = CompiledConfig.initialize(_worker_space.apply(_worker_base, point))
+
+    rows = []
+    for seed_index, seed in seeds:
+        if _worker_cache is None:
+            result = simulate_run(config, seed_index, seed, _worker_model_options)
+        else:
+            key = run_key(config, seed, _worker_model_options)
+            cached = _worker_cache.get(key)
+            if cached is not None:
+                result = cached.result
+            else:
+                result = simulate_run(config, seed_index, seed, _worker_model_options)
+                _worker_cache.put(key, result)
+        kpis = result.kpis()
+        kpis.pop("run_index")
+        rows.append({"point_id": point_id, **point, "seed_index": seed_index, **kpis})
+    frame = pd.DataFrame(rows)
+    # Seeds span the full uint64 range; keep them exact when tasks are concatenated
+    frame["seed"] = frame["seed"].astype(np.uint64)
+    return frame
+
+
+def iter_sweep(base: Config, space: Sweep_space, points: pd.DataFrame, n_seeds: int, seed: Optional[int] = None, workers: Optional[int] = None, seeds_per_task: Optional[int] = None, cache: Optional[Result_cache] = None, **model_options: Any) -> Iterator[pd.DataFrame]:
+    """
+    Run every design point n_seeds times across a process pool and yield the KPI rows of each finished
+    task as it completes, so long sweeps can be written out incrementally.
+    Every point uses the same n_seeds seeds (common random numbers): differences between points come
+    from the config, not from the draws.
+    Parameters
+    ----------
+    base : Config
+        The config the sweep varies.
+    space : Sweep_space
+        Swept parameters.
+    points : pd.DataFrame
+        Design points, one column per parameter, e.g. from Sweep_space.design.
+    n_seeds : int
+        Seeded runs per point.
+    seed : int, optional
+        Root seed the per-run seeds are derived from.
+    workers : int, optional
+        Worker processes, all CPU cores by default. 1 runs in the current process.
+    seeds_per_task : int, optional
+        Seeds of one point run by a worker at once, all of them by default; smaller values spread
+        the seeds of a few points across more workers.
+    cache : Result_cache, optional
+        Runs found in the cache are not simulated again; new runs are added to it.
+    **model_options
+        Passed to model.initialize for every run, e.g. player_type, max_allowed_rounds or fast_forward.
+    """
+    run_seeds = list(enumerate(spawn_seeds(seed, n_seeds)))
+    seeds_per_task = seeds_per_task or n_seeds
+    seed_chunks = [run_seeds[i:i + seeds_per_task] for i in range(0, n_seeds, seeds_per_task)]
+
+    tasks = [
+        (int(point_id), {name: float(value) for name, value in row.items()}, chunk)
+        for point_id, row in points[space.names].iterrows()
+        for chunk in seed_chunks
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        _init_worker(base, space, model_options, cache)
+        for task in tasks:
+            yield _run_point(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base, space, model_options, cache)) as executor:
+        futures = [executor.submit(_run_point, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_sweep(base: Config, space: Sweep_space, points: pd.DataFrame, n_seeds: int, seed: Optional[int] = None, workers: Optional[int] = None, output: Optional[str] = None, **options: Any) -> pd.DataFrame:
+    """
+    Tidy KPI table of a sweep: one row per (point, seed), sorted by point and seed.
+    With output, rows are appended to that CSV file as tasks finish, so an interrupted sweep keeps its results.
+    """
+    frames = []
+    for i, frame in enumerate(iter_sweep(base, space, points, n_seeds, seed=seed, workers=workers, **options)):
+        if output:
+            frame.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values(["point_id", "seed_index"], ignore_index=True)
+
+
+def point_summary(results: pd.DataFrame, space: Sweep_space) -> pd.DataFrame:
+    """Per design point: parameter values, completion rate and mean and standard deviation of every KPI."""
+    kpis = ["days_to_finish", "final_day", "final_chapter", "total_sessions", "final_gold", "final_designs"]
+    grouped = results.groupby("point_id")
+    summary = grouped[space.names].first()
+    summary["completion_rate"] = grouped["completed"].mean()
+    stats = grouped[kpis].agg(["mean", "std"])
+    stats.columns = [f"{kpi}_{stat}" for kpi, stat in stats.columns]
+    return summary.join(stats)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep Cup Heroes config parameters.")
+    parser.add_argument("space", type=str, help="JSON file with the list of swept parameters")
+    parser.add_argument("--design", choices=SWEEP_DESIGNS, default="lhs", help="how design points are chosen")
+    parser.add_argument("--points", type=int, default=100, help="design points for random and lhs designs")
+    parser.add_argument("--levels", type=int, default=5, help="values per parameter for grid designs")
+    parser.add_argument("--seeds", type=int, default=10, help="seeded runs per design point")
+    parser.add_argument("--seed", type=int, default=None, help="root seed of the design and the runs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--player-type", type=str, default=None, help="player type to simulate")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="sessions after which a run stops")
+    parser.add_argument("--fast-forward", action="store_true", help="skip gear updates in sessions where the player is stuck")
+    parser.add_argument("--no-cache", action="store_true", help="simulate every run even if the result cache has it")
+    parser.add_argument("--output", type=str, default="sweep_results.csv", help="CSV file the per-run KPIs are streamed to")
+    args = parser.parse_args(argv)
+
+    with open(args.space, "r", encoding="utf-8") as f:
+        space = Sweep_space.initialize(json.load(f))
+
+    base = Config.initialize()
+    points = space.design(args.design, n_points=args.points, levels=args.levels, seed=args.seed)
+    results = run_sweep(
+        base, space, points, args.seeds, seed=args.seed, workers=args.workers, output=args.output,
+        cache=None if args.no_cache else Result_cache.initialize(),
+        player_type=args.player_type, max_allowed_rounds=args.max_sessions, fast_forward=args.fast_forward,
+    )
+
+    print(point_summary(results, space).to_string())
+
+
+if __name__ == "__main__":
+    main()
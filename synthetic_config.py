@@ -0,0 +1,155 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config_import import Config, ConfigKeys
+from gear_types import Gear_rarity
+
+# ---------------------------------------------------------------------------
+# Synthetic configs: valid Config tables of any size, shaped like the
+# balancing sheet, for benchmarks and offline runs. The same arguments and
+# seed always give the same tables.
+# ---------------------------------------------------------------------------
+
+RARITY_NAMES = [str(rarity) for rarity in Gear_rarity]
+MAX_MERGE_RULES = len(RARITY_NAMES) - 1
+
+
+def _gear_levels_df(gear_levels: int, rng: np.random.Generator) -> pd.DataFrame:
+    rows = []
+    for level in range(gear_levels + 1):
+        rows.append({
+            ConfigKeys.LEVEL.value: level,
+            ConfigKeys.GOLD_COST.value: int(100 + 50 * level + rng.integers(0, 20)),
+            ConfigKeys.DESIGN_COST.value: int(2 + level // 2),
+            # Higher levels need rarer gear, climbing through every rarity over the level range
+            ConfigKeys.REQUIRED_RARITY.value: RARITY_NAMES[min(len(RARITY_NAMES) - 1, level * len(RARITY_NAMES) // (gear_levels + 1))],
+        })
+    return pd.DataFrame(rows)
+
+
+def _gear_merge_df(merge_rules: int) -> pd.DataFrame:
+    rows = []
+    for target in range(1, min(merge_rules, MAX_MERGE_RULES) + 1):
+        source = RARITY_NAMES[target - 1]
+        rows.append({
+            ConfigKeys.TARGET_RARITY.value: RARITY_NAMES[target],
+            ConfigKeys.REQ1_RARITY.value: source, ConfigKeys.REQ1_PIECE.value: "SAME_PIECE", ConfigKeys.REQ1_SET.value: "SAME_SET",
+            ConfigKeys.REQ2_RARITY.value: source, ConfigKeys.REQ2_PIECE.value: "SAME_PIECE", ConfigKeys.REQ2_SET.value: "ANY_SET",
+            # Low tiers take a third copy, as in the sheet; the third slot stays blank above them
+            ConfigKeys.REQ3_RARITY.value: source if target < 3 else "", ConfigKeys.REQ3_PIECE.value: "SAME_PIECE", ConfigKeys.REQ3_SET.value: "ANY_SET",
+        })
+    return pd.DataFrame(rows)
+
+
+def chest_names(chests: int) -> list:
+    """rare_chest and epic_chest, which the free daily chests and offers open, then chest_3, chest_4, ..."""
+    names = [ConfigKeys.RARE_CHEST_NAME.value, ConfigKeys.EPIC_CHEST_NAME.value]
+    return names + [f"chest_{i}" for i in range(3, max(chests, 2) + 1)]
+
+
+def _gacha_df(chests: int, rng: np.random.Generator) -> pd.DataFrame:
+    rows = []
+    for i, name in enumerate(chest_names(chests)):
+        # Better chests shift weight to rarer gear; weights above the chest's tier are left blank like in the sheet
+        top = min(len(RARITY_NAMES), 3 + i)
+        weights = np.sort(rng.integers(1, 100, size=top))[::-1]
+        row = {ConfigKeys.CHEST_NAME.value: name, ConfigKeys.FREE_DAILY.value: int(i == 0)}
+        for rarity_index, rarity_name in enumerate(RARITY_NAMES):
+            row[rarity_name] = int(weights[rarity_index]) if rarity_index < top else ""
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _chapters_df(chapters: int, chests: int) -> pd.DataFrame:
+    names = chest_names(chests)
+    rows = []
+    for chapter in range(1, chapters + 1):
+        rows.append({
+            ConfigKeys.CHAPTER_NUM.value: chapter,
+            ConfigKeys.AVG_GEAR_LEVEL_REQUIRED.value: 1 + chapter,
+            ConfigKeys.UNIQUE_GEAR_PIECES_REQUIRED.value: 6,
+            ConfigKeys.WIN_REWARD_GOLD.value: 300 + 20 * chapter,
+            ConfigKeys.WIN_REWARD_DESIGNS.value: 5,
+            ConfigKeys.WIN_REWARD_GACHA.value: names[chapter % len(names)],
+            ConfigKeys.LOSE_REWARD_GOLD.value: 100 + 5 * chapter,
+            ConfigKeys.LOSE_REWARD_DESIGNS.value: 2,
+            ConfigKeys.LOSE_REWARD_GACHA.value: names[0],
+        })
+    return pd.DataFrame(rows)
+
+
+def _offers_df(offers: int, rng: np.random.Generator) -> pd.DataFrame:
+    rows = []
+    for i in range(offers):
+        rows.append({
+            ConfigKeys.OFFER_NAME.value: f"offer_{i + 1}",
+            ConfigKeys.OFFER_PRICE_AMOUNT.value: int(5 * (i + 1)),
+            ConfigKeys.OFFER_PRICE_UNIT.value: "usd",
+            ConfigKeys.OFFER_RARE_CHEST.value: int(rng.integers(1, 20)),
+            ConfigKeys.OFFER_EPIC_CHEST.value: int(rng.integers(0, 5)),
+            ConfigKeys.OFFER_COIN.value: int(rng.integers(0, 5) * 500),
+            ConfigKeys.OFFER_DESIGN.value: int(rng.integers(0, 50)),
+            ConfigKeys.OFFER_DIAMOND.value: 0,
+        })
+    return pd.DataFrame(rows, columns=[key.value for key in (
+        ConfigKeys.OFFER_NAME, ConfigKeys.OFFER_PRICE_AMOUNT, ConfigKeys.OFFER_PRICE_UNIT, ConfigKeys.OFFER_RARE_CHEST,
+        ConfigKeys.OFFER_EPIC_CHEST, ConfigKeys.OFFER_COIN, ConfigKeys.OFFER_DESIGN, ConfigKeys.OFFER_DIAMOND,
+    )])
+
+
+def _players_df(player_types: int, offers: int, chapters: int, rng: np.random.Generator) -> pd.DataFrame:
+    rows = []
+    for i in range(player_types):
+        # From free players to heavy spenders: more sessions and more offers bought
+        spend = i / max(1, player_types - 1)
+        row = {
+            ConfigKeys.PLAYER_TYPE.value: f"player_{i + 1}",
+            ConfigKeys.PLAYER_SESSIONS_PER_DAY.value: int(4 + round(4 * spend)),
+            ConfigKeys.PLAYER_AVG_SESSION_LENGTH.value: 10,
+            ConfigKeys.PLAYER_PLAY_CHAPTER.value: 5,
+            ConfigKeys.PLAYER_META_PROGRESSION.value: 2,
+            ConfigKeys.PLAYER_PURCHASE_FREQUENCY_DAYS.value: 0 if spend == 0 else int(round(7 * (1 - spend))) + 1,
+            ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value: 1,
+            ConfigKeys.PLAYER_FREE_DAILY_EPIC_CHEST.value: int(spend >= 0.5),
+            ConfigKeys.PLAYER_SIMULATE.value: "TRUE",
+        }
+        for offer in range(offers):
+            # Trigger chapter of every offer, 0 for offers this player never buys
+            buys = spend > 0 and rng.random() < spend
+            row[f"offer_{offer + 1}"] = int(rng.integers(1, chapters + 1)) if buys else 0
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def synthetic_config(chapters: int = 30, gear_levels: int = 60, merge_rules: int = MAX_MERGE_RULES, chests: int = 2,
+                     offers: int = 2, player_types: int = 3, seed: Optional[int] = 0) -> Config:
+    """
+    A valid Config of the given size.
+    Parameters
+    ----------
+    chapters : int
+        Rows of chapters_df.
+    gear_levels : int
+        Highest gear level; gear_levels_df has levels 0 to gear_levels.
+    merge_rules : int
+        Merge rows, one per target rarity from uncommon upwards (at most 5).
+    chests : int
+        Chest tables; rare_chest and epic_chest always exist.
+    offers : int
+        Offers, each with a trigger chapter column in players_df.
+    player_types : int
+        Player archetypes, all flagged to simulate, from free players to heavy spenders.
+    seed : int, optional
+        Seed of the random costs, weights and offer contents.
+    """
+    rng = np.random.default_rng(seed)
+    return Config(
+        gear_merge_df=_gear_merge_df(merge_rules),
+        gear_levels_df=_gear_levels_df(gear_levels, rng),
+        chapters_df=_chapters_df(chapters, chests),
+        gacha_df=_gacha_df(chests, rng),
+        offers_df=_offers_df(offers, rng),
+        players_df=_players_df(player_types, offers, chapters, rng),
+    )
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiled_config import CompiledConfig  # noqa: E402
+from synthetic_config import synthetic_config  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def compiled_config() -> CompiledConfig:
+    """A small synthetic config: 20 chapters, gear up to level 30, three player types."""
+    return CompiledConfig.initialize(synthetic_config(chapters=20, gear_levels=30))
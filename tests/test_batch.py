@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from batch import kpis_from_aggregator, kpis_from_logs, run_batch
+from compiled_config import CompiledConfig
+from config_import import ConfigKeys
+from logger import KPI_ACTIONS, Log_settings, Sim_logger
+from model import model
+from synthetic_config import synthetic_config
+
+
+@pytest.fixture(scope="module")
+def fractional_config() -> CompiledConfig:
+    """Chapter rewards of half a gold and a quarter design, which int64 curves would truncate."""
+    config = synthetic_config(chapters=20, gear_levels=30)
+    for column in (ConfigKeys.WIN_REWARD_GOLD, ConfigKeys.LOSE_REWARD_GOLD):
+        config.chapters_df[column.value] += 0.5
+    config.chapters_df[ConfigKeys.LOSE_REWARD_DESIGNS.value] += 0.25
+    return CompiledConfig.initialize(config)
+
+
+def test_fractional_gold_and_designs_are_kept(fractional_config):
+    logger = Sim_logger(Log_settings(actions=KPI_ACTIONS))
+    run = model.initialize(fractional_config, seed=2, logger=logger, max_allowed_rounds=100, track_kpis=True)
+    run.simulate()
+
+    from_logs = kpis_from_logs(0, 2, logger.get_event_log())
+    from_aggregator = kpis_from_aggregator(0, 2, run.kpis)
+    assert (from_logs.gold_curve % 1 != 0).any()
+    assert (from_logs.designs_curve % 1 != 0).any()
+    assert from_logs.kpis()["final_gold"] == run.meta_progression.gold
+    assert from_logs.kpis()["final_designs"] == sum(run.meta_progression.designs)
+
+    np.testing.assert_array_equal(from_aggregator.gold_curve, from_logs.gold_curve)
+    np.testing.assert_array_equal(from_aggregator.designs_curve, from_logs.designs_curve)
+    assert from_aggregator.kpis() == from_logs.kpis()
+
+
+def test_batch_is_seeded(compiled_config):
+    first = run_batch(compiled_config, 4, seed=3, workers=1, max_allowed_rounds=80).kpis_df()
+    assert first.equals(run_batch(compiled_config, 4, seed=3, workers=1, max_allowed_rounds=80).kpis_df())
+    assert first["seed"].nunique() == 4
+    assert not first.drop(columns="seed").equals(run_batch(compiled_config, 4, seed=4, workers=1, max_allowed_rounds=80).kpis_df().drop(columns="seed"))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from checkpoint import Model_checkpoint
+from compiled_config import CompiledConfig
+from logger import Sim_logger
+from model import model
+from synthetic_config import synthetic_config
+
+
+def new_run(compiled_config, seed, logger, **options):
+    return model.initialize(compiled_config, seed=seed, player_type="player_2", logger=logger,
+                            max_allowed_rounds=400, track_kpis=True, **options)
+
+
+def assert_same_kpis(kpis, expected):
+    actual, wanted = kpis.arrays(), expected.arrays()
+    assert actual.keys() == wanted.keys()
+    for name in wanted:
+        np.testing.assert_array_equal(actual[name], wanted[name], err_msg=name)
+    assert kpis.completed_day == expected.completed_day
+
+
+@pytest.mark.parametrize("stop", [{"until_day": 1}, {"until_day": 4}, {"until_chapter": 3}])
+@pytest.mark.parametrize("options", [{}, {"fast_forward": True}])
+def test_restored_run_continues_like_uninterrupted_run(compiled_config, stop, options):
+    logger = Sim_logger()
+    uninterrupted = new_run(compiled_config, 7, logger, **options)
+    uninterrupted.simulate()
+
+    first_logger, second_logger = Sim_logger(), Sim_logger()
+    paused = new_run(compiled_config, 7, first_logger, **options)
+    assert not paused.simulate(**stop)
+    data = paused.checkpoint().to_bytes()
+
+    restored = model.restore(compiled_config, Model_checkpoint.from_bytes(data), logger=second_logger)
+    restored.simulate()
+
+    assert first_logger.get_logs() + second_logger.get_logs() == logger.get_logs()
+    assert_same_kpis(restored.kpis, uninterrupted.kpis)
+
+
+def test_checkpoint_file_round_trip(compiled_config, tmp_path):
+    paused = new_run(compiled_config, 3, Sim_logger())
+    paused.simulate(until_day=2)
+    checkpoint = paused.checkpoint()
+
+    path = tmp_path / "run.ckpt"
+    checkpoint.save(str(path))
+    loaded = Model_checkpoint.load(str(path))
+
+    assert loaded.rng == Model_checkpoint.from_bytes(checkpoint.to_bytes()).rng
+    assert loaded.timer == checkpoint.timer and loaded.designs == checkpoint.designs
+    np.testing.assert_array_equal(loaded.gear_rarity_counts, checkpoint.gear_rarity_counts)
+
+
+def test_restore_rejects_other_config(compiled_config):
+    paused = new_run(compiled_config, 3, Sim_logger())
+    paused.simulate(until_day=2)
+    other = CompiledConfig.initialize(synthetic_config(chapters=20, gear_levels=30, seed=1))
+    with pytest.raises(ValueError):
+        model.restore(other, paused.checkpoint())
+
+
+def test_from_bytes_rejects_other_data():
+    with pytest.raises(ValueError):
+        Model_checkpoint.from_bytes(b"not a checkpoint")
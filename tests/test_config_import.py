@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import config_import
+from config_import import Google_sheets_source
+from config_snapshot import Local_grid_source, grid_to_frame
+
+
+class Fake_spreadsheet:
+    def __init__(self, grids: dict):
+        self.grids = grids
+        self.calls = []
+
+    def values_batch_get(self, ranges):
+        self.calls.append(list(ranges))
+        # The API leaves "values" out of an empty tab's range
+        return {"valueRanges": [
+            {"range": name, "values": self.grids[name.strip("'")]} if self.grids[name.strip("'")] else {"range": name}
+            for name in ranges
+        ]}
+
+
+def test_google_source_reads_every_tab_in_one_batch_get(monkeypatch):
+    grids = {
+        "gacha": [["chest_name", "common", "legendary"], ["rare_chest", "60"], ["epic_chest", "10", "5"]],
+        "levels": [["level", "gold_cost"], ["1", "1,100"], ["2", "150.5"]],
+        "empty": [],
+    }
+    spreadsheet = Fake_spreadsheet(grids)
+    opened = []
+
+    class Fake_client:
+        def open(self, name):
+            opened.append(name)
+            return spreadsheet
+
+    monkeypatch.setattr(config_import, "connect_to_API", Fake_client)
+    config_import._fetch_worksheet_grids.clear()
+    frames = Google_sheets_source("test_sheet").fetch(["levels", "gacha", "empty"])
+    config_import._fetch_worksheet_grids.clear()
+
+    assert opened == ["test_sheet"]
+    assert spreadsheet.calls == [["'levels'", "'gacha'", "'empty'"]]
+    assert list(frames) == ["levels", "gacha", "empty"]
+    for name in ("levels", "gacha"):
+        pd.testing.assert_frame_equal(frames[name], grid_to_frame(grids[name]))
+    assert frames["empty"].empty
+    assert frames["gacha"].to_dict("records")[0] == {"chest_name": "rare_chest", "common": 60, "legendary": ""}
+    assert frames["levels"]["gold_cost"].tolist() == [1100, 150.5]
+
+
+def test_local_grid_source_round_trips_frames():
+    frames = {
+        "gacha": pd.DataFrame({"chest_name": ["rare_chest", "epic_chest"], "common": [60, 10], "legendary": ["", 5]}),
+        "levels": pd.DataFrame({"level": [1, 2, 3], "gold_cost": [100, 150.5, 210]}),
+    }
+    fetched = Local_grid_source.from_frames(frames).fetch(list(frames))
+    for name, df in frames.items():
+        pd.testing.assert_frame_equal(fetched[name], df, check_dtype=False)
+    with pytest.raises(KeyError):
+        Local_grid_source.from_frames(frames).fetch(["missing"])
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from config_import import Config, config_worksheet_names
+from config_snapshot import MANIFEST_NAME, Config_snapshot_store, Frame_source, combined_hash, frame_hash
+
+
+def sheet_frames(rare_weight: int = 60) -> dict:
+    """Two small worksheets; the gacha one mixes numbers and blank cells in a column, like the sheet."""
+    return {
+        "gacha": pd.DataFrame({"chest_name": ["rare_chest", "epic_chest"], "common": [rare_weight, 10], "legendary": ["", 5]}),
+        "levels": pd.DataFrame({"level": [1, 2, 3], "gold_cost": [100, 150.5, 210]}),
+    }
+
+
+def parquet_files(store: Config_snapshot_store) -> set:
+    return {name for name in os.listdir(store.directory) if name.endswith(".parquet")}
+
+
+def files(manifest) -> set:
+    return {sheet["file"] for sheet in manifest.sheets.values()}
+
+
+# -------------------
+# Hashes
+# -------------------
+
+def test_frame_hash_follows_content():
+    frames = sheet_frames()
+    assert frame_hash(frames["gacha"]) == frame_hash(sheet_frames()["gacha"])
+    assert frame_hash(frames["gacha"]) != frame_hash(sheet_frames(rare_weight=61)["gacha"])
+    # A number and the same text differ
+    assert frame_hash(pd.DataFrame({"a": [1]})) != frame_hash(pd.DataFrame({"a": ["1"]}))
+    assert frame_hash(frames["levels"]) != frame_hash(frames["levels"].rename(columns={"level": "lvl"}))
+
+
+def test_combined_hash_ignores_order():
+    assert combined_hash({"a": "1", "b": "2"}) == combined_hash({"b": "2", "a": "1"})
+    assert combined_hash({"a": "1", "b": "2"}) != combined_hash({"a": "2", "b": "1"})
+
+
+# -------------------
+# Store
+# -------------------
+
+def test_save_and_load(tmp_path):
+    store = Config_snapshot_store.initialize(str(tmp_path))
+    assert not store.exists()
+    with pytest.raises(FileNotFoundError):
+        store.load()
+
+    frames = sheet_frames()
+    manifest = store.save(frames, "frames")
+    loaded, loaded_manifest = store.load()
+
+    assert loaded_manifest == manifest == store.read_manifest()
+    assert manifest.source == "frames"
+    assert manifest.content_hash == combined_hash(manifest.sheet_hashes())
+    assert manifest.sheets["gacha"]["json_columns"] == ["legendary"]
+    assert manifest.sheets["levels"]["rows"] == 3
+    for name, df in frames.items():
+        assert manifest.sheets[name]["content_hash"] == frame_hash(df)
+        pd.testing.assert_frame_equal(loaded[name], df)
+        # Cells keep their Python type through Parquet
+        assert loaded[name].map(type).equals(df.map(type))
+
+
+def test_load_verifies_hashes(tmp_path):
+    store = Config_snapshot_store.initialize(str(tmp_path))
+    manifest = store.save(sheet_frames(), "frames")
+
+    sheet = manifest.sheets["levels"]
+    pd.DataFrame({"level": [1, 2, 3], "gold_cost": [100, 150.5, 999]}).to_parquet(os.path.join(store.directory, sheet["file"]))
+    with pytest.raises(ValueError, match="levels"):
+        store.load()
+    store.load(verify=False)
+
+
+def test_save_keeps_the_previous_snapshot_files(tmp_path):
+    store = Config_snapshot_store.initialize(str(tmp_path))
+    first = store.save(sheet_frames(rare_weight=1), "frames")
+    second = store.save(sheet_frames(rare_weight=2), "frames")
+    third = store.save(sheet_frames(rare_weight=3), "frames")
+
+    # Unchanged worksheets share their file; the first snapshot's own gacha file is gone
+    assert parquet_files(store) == files(second) | files(third)
+    assert not (files(first) - files(second)) & parquet_files(store)
+    assert len({first.content_hash, second.content_hash, third.content_hash}) == 3
+
+
+def test_failed_manifest_replace_keeps_the_old_snapshot(tmp_path, monkeypatch):
+    store = Config_snapshot_store.initialize(str(tmp_path))
+    old = store.save(sheet_frames(rare_weight=1), "frames")
+
+    def failing_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        store.save(sheet_frames(rare_weight=2), "frames")
+    monkeypatch.undo()
+
+    frames, manifest = store.load()
+    assert manifest == old
+    assert frames["gacha"]["common"].tolist() == [1, 10]
+    with open(store.manifest_path, encoding="utf-8") as f:
+        assert json.load(f)["content_hash"] == old.content_hash
+    assert MANIFEST_NAME in os.listdir(store.directory)
+
+
+def test_config_initialize_uses_the_snapshot(tmp_path):
+    frames = {name: pd.DataFrame({"value": [index]}) for index, name in enumerate(config_worksheet_names())}
+    config = Config.initialize(source=Frame_source(frames), snapshot_dir=str(tmp_path))
+    assert config.snapshot.source == "frames"
+
+    # Without refresh the snapshot is read and the source is never asked
+    offline = Config.initialize(source=Frame_source({}), snapshot_dir=str(tmp_path))
+    assert offline.snapshot == config.snapshot
+    pd.testing.assert_frame_equal(offline.chapters_df, config.chapters_df)
+    with pytest.raises(KeyError):
+        Config.initialize(refresh=True, source=Frame_source({}), snapshot_dir=str(tmp_path))
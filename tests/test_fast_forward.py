@@ -0,0 +1,28 @@
+import pytest
+
+from logger import Sim_logger
+from model import model
+from profiler import Sim_profiler
+
+
+def run(compiled_config, player_type, seed, fast_forward, profiler=None):
+    logger = Sim_logger()
+    instance = model.initialize(compiled_config, seed=seed, player_type=player_type, logger=logger,
+                                max_allowed_rounds=600, fast_forward=fast_forward, profiler=profiler)
+    instance.simulate()
+    return instance, logger.get_logs()
+
+
+@pytest.mark.parametrize("player_type", ["player_1", "player_3"])
+@pytest.mark.parametrize("seed", range(2))
+def test_fast_forward_logs_match_normal_run(compiled_config, player_type, seed):
+    normal, normal_logs = run(compiled_config, player_type, seed, fast_forward=False)
+    profiler = Sim_profiler()
+    fast, fast_logs = run(compiled_config, player_type, seed, fast_forward=True, profiler=profiler)
+
+    # The run has to actually skip sessions for the comparison to mean anything
+    assert profiler.counters.get("fast_forwarded_sessions", 0) > 0
+    assert fast_logs == normal_logs
+    assert fast.rounds_done == normal.rounds_done
+    assert fast.meta_progression.gold == normal.meta_progression.gold
+    assert fast.meta_progression.gear_inventory.level == normal.meta_progression.gear_inventory.level
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from logger import Sim_logger
+from model import model
+
+
+def new_run(compiled_config, logger):
+    return model.initialize(compiled_config, seed=11, player_type="player_3", logger=logger,
+                            max_allowed_rounds=400, track_kpis=True)
+
+
+@pytest.mark.parametrize("until_day", [1, 5])
+def test_forks_without_reseed_continue_like_uninterrupted_run(compiled_config, until_day):
+    logger = Sim_logger()
+    uninterrupted = new_run(compiled_config, logger)
+    uninterrupted.simulate()
+
+    parent_logger = Sim_logger()
+    parent = new_run(compiled_config, parent_logger)
+    parent.simulate(until_day=until_day)
+    branches = parent.fork(2)
+    for branch in branches:
+        branch.simulate()
+
+    for branch in branches:
+        assert parent_logger.get_logs() + branch.logger.get_logs() == logger.get_logs()
+        for name, values in uninterrupted.kpis.arrays().items():
+            np.testing.assert_array_equal(branch.kpis.arrays()[name], values, err_msg=name)
+
+    # Forking leaves the parent free to continue the same way
+    parent.simulate()
+    assert parent_logger.get_logs() == logger.get_logs()
+
+
+def test_reseeded_forks_diverge(compiled_config):
+    parent = new_run(compiled_config, Sim_logger())
+    parent.simulate(until_day=2)
+    first, second = parent.fork(2, seeds=[1, 2])
+    first.simulate()
+    second.simulate()
+    assert first.logger.get_logs() != second.logger.get_logs()
+
+
+def test_fork_checks_branch_arguments(compiled_config):
+    parent = new_run(compiled_config, Sim_logger())
+    parent.simulate(until_day=1)
+    with pytest.raises(ValueError):
+        parent.fork(2, seeds=[1])
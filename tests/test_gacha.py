@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from compiled_config import Alias_table
+from config_import import ConfigKeys
+from gear_types import Gear_rarity
+from logger import Sim_logger
+from model import Gacha_system, Timer
+from rng import Block_sampler
+
+DRAWS = 200_000
+
+
+class Recording_meta:
+    """Stands in for Player_meta_progression: records every add_gear call."""
+
+    def __init__(self):
+        self.added = []
+
+    def add_gear(self, piece, gear_set, rarity, count=1):
+        self.added.append((piece, gear_set, rarity, count))
+
+
+def draw(table: Alias_table, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(table.prob)
+    return table.sample(rng.integers(0, n, DRAWS), rng.random(DRAWS))
+
+
+@pytest.mark.parametrize("weights", [[1, 1, 1, 1], [70, 20, 8, 2], [5, 0.5, 94.5], [1]])
+def test_alias_frequencies_follow_weights(weights):
+    outcomes = draw(Alias_table.initialize(weights), seed=0)
+    frequencies = np.bincount(outcomes, minlength=len(weights)) / DRAWS
+    np.testing.assert_allclose(frequencies, np.asarray(weights) / np.sum(weights), atol=0.005)
+
+
+def test_chest_rarity_frequencies_follow_sheet_weights(compiled_config):
+    chest = compiled_config.chests[ConfigKeys.RARE_CHEST_NAME.value]
+    rarities = chest.outcome_rarity[draw(chest.alias, seed=1)]
+
+    weights = np.diff(chest.cumulative_weights, prepend=0.0)
+    frequencies = np.array([np.mean(rarities == int(rarity)) for rarity in chest.rarities])
+    np.testing.assert_allclose(frequencies, weights / weights.sum(), atol=0.005)
+    # Pieces and sets are uniform whatever the rarity
+    pieces = chest.outcome_piece[draw(chest.alias, seed=2)]
+    np.testing.assert_allclose(np.bincount(pieces) / DRAWS, 1 / len(np.unique(chest.outcome_piece)), atol=0.005)
+
+
+def open_chests(compiled_config, seed: int, k: int) -> list:
+    gacha = Gacha_system.initialize(compiled_config.chests, Timer(0, 0, 1, 1), Block_sampler(np.random.default_rng(seed)), Sim_logger())
+    meta = Recording_meta()
+    gacha.open_chests(meta, ConfigKeys.EPIC_CHEST_NAME.value, k)
+    return meta.added
+
+
+def test_open_chests_is_seeded(compiled_config):
+    added = open_chests(compiled_config, seed=3, k=500)
+    assert added == open_chests(compiled_config, seed=3, k=500)
+    assert added != open_chests(compiled_config, seed=4, k=500)
+
+    assert sum(count for *_, count in added) == 500
+    assert all(isinstance(rarity, Gear_rarity) for _, _, rarity, _ in added)
+
+
+def test_open_no_chests(compiled_config):
+    assert open_chests(compiled_config, seed=3, k=0) == []
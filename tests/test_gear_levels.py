@@ -0,0 +1,91 @@
+import copy
+import random
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from compiled_config import Gear_level_table, Gear_slot
+from config_import import ConfigKeys
+from gear_types import PIECE_INDEX, Gear_pieces, Gear_rarity, Gear_sets
+from logger import Log_Action, Sim_logger
+from model import Gear_inventory, Timer
+
+
+def random_level_table(rng: random.Random) -> Gear_level_table:
+    levels = rng.randint(1, 40)
+    df = pd.DataFrame(
+        {
+            ConfigKeys.GOLD_COST.value: [rng.randint(0, 50) for _ in range(levels)],
+            ConfigKeys.DESIGN_COST.value: [rng.randint(0, 5) for _ in range(levels)],
+            ConfigKeys.REQUIRED_RARITY.value: [str(rng.choice(list(Gear_rarity))) for _ in range(levels)],
+        },
+        index=range(1, levels + 1),
+    )
+    return Gear_level_table.initialize(df)
+
+
+def random_state(rng: random.Random, rules: Gear_level_table):
+    """One gear of random level and rarities, and the player's gold and designs."""
+    gear = Gear_slot(slot=0, set=Gear_sets.ROGUE, piece=Gear_pieces.RING, piece_index=PIECE_INDEX[Gear_pieces.RING],
+                     merge_rules={}, level_up_rules=rules)
+    inventory = Gear_inventory.initialize((gear,), Timer(0, 0, 1, 1), Sim_logger())
+    inventory.level[gear.slot] = rng.randint(0, rules.max_level)
+    for rarity in Gear_rarity:
+        if rng.random() < 0.3:
+            inventory.add(gear, rarity, rng.randint(1, 3))
+
+    designs = [0] * len(Gear_pieces)
+    designs[gear.piece_index] = rng.randint(0, 80)
+    meta = SimpleNamespace(gold=rng.randint(0, 800), designs=designs)
+    return gear, inventory, meta
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_closed_form_climb_matches_stepwise(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        rules = random_level_table(rng)
+        assert rules.closed_form
+        gear, inventory, meta = random_state(rng, rules)
+        stepwise_inventory, stepwise_meta = copy.deepcopy((inventory, meta))
+        stepwise_inventory.logger = Sim_logger()
+
+        inventory.level_up(gear, meta)
+        stepwise_inventory.level_up_stepwise(gear, stepwise_meta)
+
+        assert inventory.level == stepwise_inventory.level
+        assert meta.gold == stepwise_meta.gold
+        assert meta.designs == stepwise_meta.designs
+
+        # One LEVEL_UP event covering every level the stepwise climb logged one by one
+        climbed = inventory.logger.get_event_log().table(Log_Action.LEVEL_UP)
+        steps = stepwise_inventory.logger.get_event_log().table(Log_Action.LEVEL_UP)
+        if steps.size:
+            assert climbed.size == 1
+            assert climbed.column_values("levels_gained")[0] == steps.size
+            assert climbed.column_values("required_gold")[0] == steps.column_values("required_gold").sum()
+            assert climbed.column_values("required_designs")[0] == steps.column_values("required_designs").sum()
+        else:
+            assert climbed.size == 0
+
+
+def test_fractional_costs_fall_back_to_stepwise():
+    df = pd.DataFrame(
+        {
+            ConfigKeys.GOLD_COST.value: [1.5, 2.5],
+            ConfigKeys.DESIGN_COST.value: [1, 1],
+            ConfigKeys.REQUIRED_RARITY.value: ["common", "common"],
+        },
+        index=[1, 2],
+    )
+    rules = Gear_level_table.initialize(df)
+    assert not rules.closed_form
+
+    gear, inventory, meta = random_state(random.Random(0), rules)
+    inventory.level[gear.slot] = 0
+    inventory.add(gear, Gear_rarity.COMMON)
+    meta.gold, meta.designs[gear.piece_index] = 10, 10
+    inventory.level_up(gear, meta)
+    assert inventory.level[gear.slot] == 2
+    assert meta.gold == 6
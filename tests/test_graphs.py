@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphs import downsample, lttb_indices
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 100), (1000, 3), (101, 100), (57, 10), (10_000, 500)])
+def test_lttb_keeps_endpoints_and_at_most_threshold_points(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64)
+    y = rng.normal(size=n).cumsum()
+    kept = lttb_indices(x, y, threshold)
+
+    assert len(kept) <= threshold
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert (np.diff(kept) > 0).all()
+
+
+def test_lttb_keeps_short_series_whole():
+    x = np.arange(10, dtype=np.float64)
+    np.testing.assert_array_equal(lttb_indices(x, x, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(x, x, 2), np.arange(10))
+
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(1000)
+    y[[137, 642]] = [50.0, -50.0]
+    kept = lttb_indices(np.arange(1000, dtype=np.float64), y, 20)
+    assert {137, 642} <= set(kept.tolist())
+
+
+def test_downsample_frame_keeps_its_columns_aligned():
+    n = 5000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"gold": rng.normal(size=n).cumsum(), "designs": rng.normal(size=n).cumsum(), "chapter": np.arange(n) // 400},
+                      index=pd.RangeIndex(1, n + 1, name="session"))
+    small = downsample(df, max_points=300)
+
+    assert len(small) <= 300
+    assert list(small.columns) == list(df.columns)
+    assert small.index[0] == 1 and small.index[-1] == n
+    pd.testing.assert_frame_equal(small, df.loc[small.index])
+
+
+def test_downsample_leaves_small_data_alone():
+    series = pd.Series(np.arange(50.0))
+    assert downsample(series, max_points=50) is series
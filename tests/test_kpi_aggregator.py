@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from batch import kpis_from_aggregator, kpis_from_logs
+from compiled_config import CompiledConfig
+from config_import import ConfigKeys
+from logger import KPI_ACTIONS, Log_settings, Sim_logger
+from model import model
+from synthetic_config import synthetic_config
+
+
+@pytest.fixture(scope="module")
+def long_session_config() -> CompiledConfig:
+    """Sessions of 600 minutes: a day's sessions outlast it, so the timer rolls days on its own."""
+    config = synthetic_config(chapters=20, gear_levels=30)
+    config.players_df[ConfigKeys.PLAYER_PLAY_CHAPTER.value] = 600
+    return CompiledConfig.initialize(config)
+
+
+def test_aggregator_matches_log_kpis(compiled_config):
+    for player_type in compiled_config.players:
+        logger = Sim_logger(Log_settings(actions=KPI_ACTIONS))
+        run = model.initialize(compiled_config, seed=4, player_type=player_type, logger=logger,
+                               max_allowed_rounds=300, track_kpis=True)
+        run.simulate()
+        from_aggregator = kpis_from_aggregator(0, 4, run.kpis)
+        from_logs = kpis_from_logs(0, 4, logger.get_event_log())
+        assert from_aggregator.kpis() == from_logs.kpis()
+        np.testing.assert_array_equal(from_aggregator.gold_curve, from_logs.gold_curve)
+        np.testing.assert_array_equal(from_aggregator.chapter_curve, from_logs.chapter_curve)
+
+
+def test_days_rolled_by_long_sessions_fit(long_session_config):
+    logger = Sim_logger(Log_settings(actions=KPI_ACTIONS))
+    run = model.initialize(long_session_config, seed=0, logger=logger, max_allowed_rounds=200, track_kpis=True)
+    run.simulate()
+
+    # More days than the sessions alone would span, each with its row
+    assert run.kpis.days > 200 // run.player.sessions_per_day + 2
+    assert len(run.kpis.day_frame()) == run.kpis.days
+    assert kpis_from_aggregator(0, 0, run.kpis).kpis() == kpis_from_logs(0, 0, logger.get_event_log()).kpis()
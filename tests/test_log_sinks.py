@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+from log_sinks import Jsonl_sink, Parquet_sink, iter_log, logged_actions, read_action_frames, read_log
+from logger import Columnar_log, Log_Action, Sim_logger
+from model import model
+
+SEED = 9
+SESSIONS = 120
+FLUSH_ROWS = 100
+
+
+def simulate(compiled_config, sink=None) -> Sim_logger:
+    logger = Sim_logger(sink=sink, flush_rows=FLUSH_ROWS)
+    model.initialize(compiled_config, seed=SEED, logger=logger, max_allowed_rounds=SESSIONS).simulate()
+    logger.close()
+    return logger
+
+
+@pytest.fixture(scope="module")
+def memory_log(compiled_config) -> Columnar_log:
+    return simulate(compiled_config).get_event_log()
+
+
+def values(series: pd.Series) -> list:
+    """Cells as plain Python values with None for missing ones, whatever the column's dtype."""
+    return [None if pd.isna(value) else value for value in series.astype(object)]
+
+
+def assert_same_events(read: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert len(read) == len(expected)
+    for column in expected.columns:
+        assert values(read[column]) == values(expected[column]), column
+
+
+@pytest.mark.parametrize("sink_kind", ["parquet", "jsonl"])
+def test_flushed_log_reads_back_as_the_memory_log(compiled_config, memory_log, tmp_path, sink_kind):
+    if sink_kind == "parquet":
+        path = str(tmp_path / "log")
+        sink = Parquet_sink(path, include_messages=True)
+    else:
+        path = str(tmp_path / "log.jsonl")
+        sink = Jsonl_sink(path)
+    logger = simulate(compiled_config, sink)
+
+    # Everything went to disk over several flushes; nothing stays in memory
+    assert len(memory_log) > 5 * FLUSH_ROWS
+    assert len(logger.get_event_log().tables) == 0
+
+    frames = read_action_frames(path)
+    assert set(frames) == {action.value for action in memory_log.tables}
+    for action, table in memory_log.tables.items():
+        assert_same_events(frames[action.value], table.to_frame())
+
+    combined = read_log(path)
+    assert combined["seq"].tolist() == list(range(len(memory_log)))
+    assert_same_events(combined[["seq", "action"]], memory_log.to_combined_frame()[["seq", "action"]])
+
+
+@pytest.mark.parametrize("sink_kind", ["parquet", "jsonl"])
+def test_iter_log_selects_actions_and_columns(compiled_config, memory_log, tmp_path, sink_kind):
+    path = str(tmp_path / "log") if sink_kind == "parquet" else str(tmp_path / "log.jsonl")
+    simulate(compiled_config, Parquet_sink(path) if sink_kind == "parquet" else Jsonl_sink(path))
+
+    actions = [Log_Action.SESSION_END, Log_Action.WIN_CHAPTER]
+    frames = list(iter_log(path, actions, columns=["current_coins"], batch_rows=50))
+    assert all(len(df) <= 50 for df in frames)
+
+    read = pd.concat(frames, ignore_index=True).sort_values("seq", ignore_index=True)
+    assert set(read["action"]) == {action.value for action in actions}
+    assert set(read.columns) == {"seq", "action", "current_coins"}
+
+    expected = memory_log.to_combined_frame(actions)
+    assert_same_events(read[["seq", "action", "current_coins"]], expected[["seq", "action", "current_coins"]])
+
+
+def test_logged_actions(compiled_config, memory_log, tmp_path):
+    path = str(tmp_path / "log")
+    simulate(compiled_config, Parquet_sink(path))
+    assert set(logged_actions(path)) == set(memory_log.tables)
+    assert all(os.path.exists(os.path.join(path, f"{action.value}.parquet")) for action in memory_log.tables)
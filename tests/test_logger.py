@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gear_types import Gear_pieces, Gear_rarity, Gear_sets
+from checkpoint import Model_checkpoint
+from logger import Columnar_log, Log_Action, Log_settings, Sim_logger
+from model import model
+
+TIME = {"total_time": 90, "current_day": 2, "session_time": 15}
+SAMPLED = Log_settings(sample_rates={Log_Action.OPEN_GACHA: 0.3, Log_Action.ADD_GEAR: 0.5})
+
+
+@pytest.fixture(scope="module")
+def run_log(compiled_config) -> Columnar_log:
+    logger = Sim_logger()
+    model.initialize(compiled_config, seed=5, logger=logger, max_allowed_rounds=150).simulate()
+    return logger.get_event_log()
+
+
+def test_frames_match_records(run_log):
+    records = run_log.to_records()
+    assert len(records) == len(run_log)
+
+    for action, frame in run_log.to_frames().items():
+        expected = [record for record in records if record["action"] == action.value]
+        assert len(frame) == len(expected)
+        for column, values in frame.items():
+            if column in ("seq", "action"):
+                continue
+            if column == "message":
+                assert values.tolist() == [record["message"] for record in expected]
+            elif column in TIME:
+                assert values.tolist() == [record["time"][column] for record in expected]
+            else:
+                assert values.tolist() == [record["payload"][column] for record in expected]
+
+
+def test_parquet_round_trip(run_log, tmp_path):
+    paths = run_log.to_parquet(str(tmp_path))
+    assert set(paths) == set(run_log.tables)
+
+    for action, path in paths.items():
+        assert os.path.basename(path) == f"{action.value}.parquet"
+        read = pd.read_parquet(path)
+        frame = run_log.to_frame(action)
+        assert list(read.columns) == [column for column in frame.columns if column != "action"]
+        for column in read.columns:
+            # Categories come back as categoricals and NUMBER columns as floats
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                assert read[column].astype(object).tolist() == frame[column].astype(object).tolist()
+            else:
+                np.testing.assert_array_equal(read[column].to_numpy(), frame[column].to_numpy())
+
+
+def test_missing_and_fractional_values(tmp_path):
+    log = Columnar_log()
+    log.append(Log_Action.ADD_DESIGNS, TIME, None, {"piece": Gear_pieces.RING, "amount": 2.5, "total_designs": None})
+    log.append(Log_Action.ADD_DESIGNS, TIME, "explicit", {"piece": None, "amount": 3, "total_designs": 7})
+    log.append(Log_Action.ADD_GEAR, TIME, None, {"piece": Gear_pieces.BOOTS, "set": Gear_sets.ROGUE, "rarity": Gear_rarity.EPIC, "count": 2})
+
+    designs = log.to_frame(Log_Action.ADD_DESIGNS)
+    assert designs["seq"].tolist() == [0, 1]
+    assert designs["amount"].tolist() == [2.5, 3.0]
+    assert designs["total_designs"].isna().tolist() == [True, False]
+    assert designs["piece"].astype(object).tolist()[0] == Gear_pieces.RING.value
+    assert pd.isna(designs["piece"].tolist()[1])
+    assert designs["message"].tolist()[1] == "explicit"
+
+    read = pd.read_parquet(log.to_parquet(str(tmp_path))[Log_Action.ADD_DESIGNS])
+    assert read["amount"].tolist() == [2.5, 3.0]
+    assert read["total_designs"].isna().tolist() == [True, False]
+    assert read["message"].tolist() == designs["message"].tolist()
+
+    # Whole NUMBER columns read back as ints, like the legacy records
+    gear = log.to_records()[2]
+    assert gear["payload"] == {"piece": Gear_pieces.BOOTS.value, "set": Gear_sets.ROGUE.value, "rarity": str(Gear_rarity.EPIC), "count": 2}
+    assert log.to_records()[1]["payload"]["total_designs"] == 7
+
+
+def sampled_run(compiled_config, seed: int, settings: Log_settings = SAMPLED) -> Sim_logger:
+    logger = Sim_logger(settings)
+    model.initialize(compiled_config, seed=seed, logger=logger, max_allowed_rounds=150).simulate()
+    return logger
+
+
+def test_sampling_follows_the_run_seed(compiled_config, run_log):
+    logs = sampled_run(compiled_config, seed=5).get_logs()
+    assert logs == sampled_run(compiled_config, seed=5).get_logs()
+    assert logs != sampled_run(compiled_config, seed=6).get_logs()
+
+    # Only the sampled actions lose events; the run itself is the unsampled one
+    sampled = sampled_run(compiled_config, seed=5).get_event_log()
+    assert 0 < sampled.table(Log_Action.OPEN_GACHA).size < run_log.table(Log_Action.OPEN_GACHA).size
+    pd.testing.assert_frame_equal(
+        sampled.to_frame(Log_Action.SESSION_END).drop(columns="seq"),
+        run_log.to_frame(Log_Action.SESSION_END).drop(columns="seq"),
+    )
+
+
+def test_settings_seed_overrides_the_run_seed(compiled_config):
+    logs = {
+        settings_seed: sampled_run(compiled_config, seed=5, settings=Log_settings(sample_rates=SAMPLED.sample_rates, seed=settings_seed)).get_logs()
+        for settings_seed in (1, 2)
+    }
+    assert logs[1] != logs[2]
+    assert logs[1] != sampled_run(compiled_config, seed=5).get_logs()
+
+
+def test_restored_run_samples_like_uninterrupted_run(compiled_config):
+    logs = sampled_run(compiled_config, seed=5).get_logs()
+
+    first, second = Sim_logger(SAMPLED), Sim_logger(SAMPLED)
+    paused = model.initialize(compiled_config, seed=5, logger=first, max_allowed_rounds=150)
+    paused.simulate(until_day=3)
+    restored = model.restore(compiled_config, Model_checkpoint.from_bytes(paused.checkpoint().to_bytes()), logger=second)
+    restored.simulate()
+
+    assert first.get_logs() + second.get_logs() == logs
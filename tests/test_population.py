@@ -0,0 +1,38 @@
+import numpy as np
+
+from batch import run_batch
+from compiled_config import CompiledConfig
+from config_import import ConfigKeys
+from population import Population_engine
+from synthetic_config import synthetic_config
+
+SESSIONS = 300
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+def test_population_matches_model_runs(compiled_config):
+    population = Population_engine.initialize(compiled_config, 1000, seed=1).run(SESSIONS)
+    # The model logs the chapter each session plays, the population keeps the chapter reached after it:
+    # the chapter reached after session SESSIONS is the one session SESSIONS + 1 plays
+    batch = run_batch(compiled_config, 100, seed=1, workers=1, max_allowed_rounds=SESSIONS + 1)
+
+    population_chapter = population.kpis_df()["final_chapter"].to_numpy()
+    model_chapter = np.array([run.chapter_curve[SESSIONS] for run in batch.runs])
+    assert abs(population_chapter.mean() - model_chapter.mean()) < 0.25
+    np.testing.assert_allclose(np.quantile(population_chapter, QUANTILES), np.quantile(model_chapter, QUANTILES), atol=1)
+
+    population_gold = population.kpis_df()["final_gold"].to_numpy()
+    model_gold = np.array([run.gold_curve[SESSIONS - 1] for run in batch.runs])
+    np.testing.assert_allclose(population_gold.mean(), model_gold.mean(), rtol=0.1)
+    np.testing.assert_allclose(np.quantile(population_gold, QUANTILES), np.quantile(model_gold, QUANTILES), rtol=0.2)
+
+
+def test_fractional_rewards():
+    config = synthetic_config(chapters=10, gear_levels=20)
+    config.chapters_df[ConfigKeys.WIN_REWARD_GOLD.value] += 0.5
+    config.chapters_df[ConfigKeys.LOSE_REWARD_DESIGNS.value] += 0.25
+    population = Population_engine.initialize(CompiledConfig.initialize(config), 50, seed=0).run(40)
+
+    kpis = population.kpis_df()
+    assert (kpis["final_gold"] % 1 != 0).any()
+    assert (kpis["final_designs"] % 1 != 0).any()
@@ -0,0 +1,55 @@
+import pytest
+
+from logger import Logger, Sim_logger
+from model import model
+from profiler import Sim_profiler
+
+
+def wrapped(owner, method_name):
+    return method_name in owner.__dict__
+
+
+def test_profiled_run_on_default_logger_leaves_it_unwrapped(compiled_config):
+    Logger.clear_logs()
+    run = model.initialize(compiled_config, seed=1, max_allowed_rounds=50, profiler=Sim_profiler())
+    assert run.logger is Logger.default()
+    assert not wrapped(Logger.default(), "add_log")
+    run.simulate()
+    assert "log" not in run.profiler.phase_calls
+    Logger.clear_logs()
+
+
+def test_profiled_run_times_its_own_logger(compiled_config):
+    logger = Sim_logger()
+    profiler = Sim_profiler()
+    run = model.initialize(compiled_config, seed=1, logger=logger, max_allowed_rounds=50, profiler=profiler)
+    assert wrapped(logger, "add_log")
+    run.simulate()
+    assert profiler.phase_calls["log"] > 0
+    assert not wrapped(logger, "add_log")
+
+
+def test_raising_run_unwraps_every_phase(compiled_config, monkeypatch):
+    def fail(self):
+        raise RuntimeError("session failed")
+
+    monkeypatch.setattr(model, "play_session", fail)
+    logger = Sim_logger()
+    run = model.initialize(compiled_config, seed=1, logger=logger, max_allowed_rounds=50, profiler=Sim_profiler())
+    with pytest.raises(RuntimeError):
+        run.simulate()
+
+    assert not wrapped(logger, "add_log")
+    assert not wrapped(Logger.default(), "add_log")
+    assert not wrapped(run.meta_progression, "simulate")
+    assert not wrapped(run.chapters, "simulate")
+    assert not wrapped(run.gacha_system, "open_chest")
+
+
+def test_paused_run_stays_wrapped_until_it_ends(compiled_config):
+    logger = Sim_logger()
+    run = model.initialize(compiled_config, seed=1, logger=logger, max_allowed_rounds=100, profiler=Sim_profiler())
+    assert not run.simulate(until_day=2)
+    assert wrapped(logger, "add_log")
+    assert run.simulate()
+    assert not wrapped(logger, "add_log")
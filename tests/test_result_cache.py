@@ -0,0 +1,98 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from batch import kpis_from_logs, run_batch
+from compiled_config import CompiledConfig
+from log_sinks import read_log
+from logger import Sim_logger
+from model import model
+from result_cache import ENTRY_SUFFIX, Result_cache, run_key
+from synthetic_config import synthetic_config
+
+
+@pytest.fixture(scope="module")
+def simulated(compiled_config):
+    logger = Sim_logger()
+    model.initialize(compiled_config, seed=5, logger=logger, max_allowed_rounds=150).simulate()
+    return kpis_from_logs(0, 5, logger.get_event_log()), logger.get_event_log()
+
+
+def assert_same_result(actual, expected):
+    assert actual.kpis() == expected.kpis()
+    assert actual.sessions_per_chapter == expected.sessions_per_chapter
+    for name in ("gold_curve", "designs_curve", "chapter_curve"):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+
+
+def test_hit_and_miss(tmp_path, simulated):
+    result, _ = simulated
+    cache = Result_cache.initialize(str(tmp_path))
+    assert cache.get("missing") is None
+
+    cache.put("key", result)
+    cached = cache.get("key")
+    assert_same_result(cached.result, result)
+    assert cached.log_dir is None
+    # Stored without its log, so a lookup needing the log misses
+    assert cache.get("key", with_log=True) is None
+
+
+def test_log_round_trip(tmp_path, simulated):
+    result, event_log = simulated
+    cache = Result_cache.initialize(str(tmp_path))
+    cache.put("key", result, event_log)
+
+    cached = cache.get("key", with_log=True)
+    stored = read_log(cached.log_dir, columns=["current_day"])
+    expected = event_log.to_combined_frame(include_messages=False)
+    assert stored["seq"].tolist() == expected["seq"].tolist()
+    assert stored["action"].tolist() == expected["action"].tolist()
+
+
+def test_key_depends_on_config_seed_player_and_options(compiled_config):
+    other_config = CompiledConfig.initialize(synthetic_config(chapters=20, gear_levels=30, seed=1))
+    key = run_key(compiled_config, 1)
+    assert run_key(compiled_config, 1) == key
+    assert run_key(compiled_config, 1, {"player_type": compiled_config.get_player().player_type}) == key
+    assert run_key(compiled_config, 2) != key
+    assert run_key(other_config, 1) != key
+    assert run_key(compiled_config, 1, {"player_type": "player_3"}) != key
+    assert run_key(compiled_config, 1, {"max_days": 30}) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, simulated):
+    result, _ = simulated
+    cache = Result_cache.initialize(str(tmp_path))
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, result)
+        os.utime(os.path.join(str(tmp_path), key + ENTRY_SUFFIX), (1000 + i, 1000 + i))
+    entry_size = cache.size_bytes() // 3
+
+    # Using "a" makes "b" the least recently used
+    assert cache.get("a") is not None
+    cache.max_bytes = int(entry_size * 3.5)
+    cache.put("d", result)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+@pytest.mark.parametrize("content", [b"", b"CHRUN\x01garbage", pickle.dumps({"result": 1})])
+def test_unreadable_entry_is_a_miss(tmp_path, content):
+    cache = Result_cache.initialize(str(tmp_path))
+    with open(os.path.join(str(tmp_path), "bad" + ENTRY_SUFFIX), "wb") as f:
+        f.write(content)
+    assert cache.get("bad") is None
+
+
+def test_batch_served_from_cache_matches_simulated(tmp_path, compiled_config):
+    cache = Result_cache.initialize(str(tmp_path))
+    first = run_batch(compiled_config, 3, seed=2, workers=1, cache=cache, max_allowed_rounds=100)
+    assert len(cache) == 3
+    second = run_batch(compiled_config, 3, seed=2, workers=1, cache=cache, max_allowed_rounds=100)
+    for cached, simulated in zip(second.runs, first.runs):
+        assert_same_result(cached, simulated)
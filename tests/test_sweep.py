@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config_import import ConfigKeys
+from sweep import Sweep_space, point_summary, run_sweep
+from synthetic_config import synthetic_config
+
+GOLD = ConfigKeys.WIN_REWARD_GOLD.value
+
+
+@pytest.fixture(scope="module")
+def base():
+    return synthetic_config(chapters=20, gear_levels=30)
+
+
+@pytest.fixture(scope="module")
+def space() -> Sweep_space:
+    return Sweep_space.initialize([
+        {"name": "gold_scale", "sheet": "chapters_df", "column": GOLD, "low": 0.5, "high": 2.0, "mode": "scale"},
+        {"name": "daily_rare", "sheet": "players_df", "column": ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value, "low": 0, "high": 3, "integer": True},
+        {"name": "required", "sheet": "chapters_df", "column": ConfigKeys.AVG_GEAR_LEVEL_REQUIRED.value, "values": [1, 2, 3], "match": {"chapter_num": 1}},
+    ])
+
+
+# -------------------
+# Designs
+# -------------------
+
+def test_grid_size(space):
+    grid = space.grid(levels=5)
+    # Five gold scales, the four whole rare chest counts and the three listed values
+    assert len(grid) == 5 * 4 * 3
+    assert list(grid.columns) == space.names
+    assert sorted(grid["daily_rare"].unique()) == [0, 1, 2, 3]
+    assert sorted(grid["required"].unique()) == [1, 2, 3]
+    assert not grid.duplicated().any()
+
+
+@pytest.mark.parametrize("design", ["random", "lhs"])
+def test_sampled_designs(space, design):
+    points = space.design(design, n_points=40, seed=3)
+    assert len(points) == 40
+    assert points.index.name == "point_id"
+    assert points["gold_scale"].between(0.5, 2.0).all()
+    assert set(points["daily_rare"]) <= {0, 1, 2, 3}
+    assert set(points["required"]) <= {1, 2, 3}
+    pd.testing.assert_frame_equal(points, space.design(design, n_points=40, seed=3))
+    assert not points.equals(space.design(design, n_points=40, seed=4))
+
+
+def test_latin_hypercube_covers_every_stratum(space):
+    n_points = 25
+    points = space.latin_hypercube(n_points, seed=0)
+    strata = np.floor((points["gold_scale"] - 0.5) / 1.5 * n_points).astype(int)
+    assert sorted(strata) == list(range(n_points))
+
+
+def test_design_needs_points(space):
+    with pytest.raises(ValueError):
+        space.design("lhs")
+    with pytest.raises(ValueError):
+        space.design("sobol", n_points=4)
+
+
+def test_apply(base, space):
+    config = space.apply(base, {"gold_scale": 2.0, "daily_rare": 3, "required": 3})
+    assert (config.chapters_df[GOLD] == base.chapters_df[GOLD] * 2).all()
+    assert (config.players_df[ConfigKeys.PLAYER_FREE_DAILY_RARE_CHEST.value] == 3).all()
+    required = ConfigKeys.AVG_GEAR_LEVEL_REQUIRED.value
+    assert config.chapters_df[required].tolist() == [3] + base.chapters_df[required].tolist()[1:]
+    # Sheets no parameter touches are shared with the base
+    assert config.gacha_df is base.gacha_df
+
+
+# -------------------
+# Runs
+# -------------------
+
+def test_points_share_their_seeds(base):
+    # Scaling by 1 leaves the config as it is: with common random numbers both points run identically
+    space = Sweep_space.initialize([{"name": "gold_scale", "sheet": "chapters_df", "column": GOLD, "values": [1.0], "mode": "scale"}])
+    points = pd.DataFrame({"gold_scale": [1.0, 1.0]}, index=pd.RangeIndex(2, name="point_id"))
+    results = run_sweep(base, space, points, n_seeds=3, seed=11, workers=1, seeds_per_task=2, max_allowed_rounds=80)
+
+    assert len(results) == 2 * 3
+    first, second = (results[results["point_id"] == point_id].reset_index(drop=True) for point_id in (0, 1))
+    assert first["seed"].tolist() == second["seed"].tolist()
+    assert first["seed"].nunique() == 3
+    pd.testing.assert_frame_equal(first.drop(columns="point_id"), second.drop(columns="point_id"))
+
+    summary = point_summary(results, space)
+    assert list(summary.index) == [0, 1]
+    assert summary["final_chapter_mean"].iloc[0] == summary["final_chapter_mean"].iloc[1]